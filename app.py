@@ -1,67 +1,184 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, send_file, send_from_directory, jsonify, current_app, g, session, abort, has_app_context
+from flask.cli import with_appcontext
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user, UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
+from collections import namedtuple
+from collections.abc import Mapping
 import json
+import base64
+import mimetypes
+import hashlib
+from bisect import bisect_right
 from io import BytesIO
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs
-from typing import TYPE_CHECKING
-from sqlalchemy import inspect, text, func
+from sqlalchemy import inspect, text, func, or_, and_, case
 import re
 import os
+import sys
+import time
+import threading
 import logging
 from logging.handlers import RotatingFileHandler
-import requests
 from dotenv import load_dotenv
+import click
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import deferred, joinedload, undefer, Session as SASession
+
+from services.assets import ENCODINGS, build_assets, load_manifest
+from services.cache import TTLCache
+from services.certificate_cache import CertificateCache, certificate_key, file_digest
+from services.certificate_pdf import VectorCertificateRenderer
+from services.certificate_render import CertificateRenderer, FontRegistry, default_font_directories
+from services.images import (CERTIFICATE_PREVIEW_WIDTHS, THUMBNAIL_WIDTHS, delete_derivatives, derivative_path,
+                             format_variants, parse_variants, render_derivatives_job, write_derivatives)
+from services.item_analysis import analyze_items, load_numpy, pack_answers
+from services.query_profiler import QueryBudgetExceeded, QueryStats, install_query_listeners
+from services.search_index import CourseSearchIndex
 
-from sqlalchemy.orm import joinedload
-
-try:
-    from PIL import Image, ImageDraw, ImageFont
-except ImportError:  # pragma: no cover - dependency issue surfaced at runtime
-    Image = ImageDraw = ImageFont = None
+load_dotenv()
 
-if TYPE_CHECKING:
-    from PIL.ImageFont import FreeTypeFont as PILFreeTypeFont
-elif ImageFont is not None and hasattr(ImageFont, 'FreeTypeFont'):
-    PILFreeTypeFont = ImageFont.FreeTypeFont
-else:
-    class PILFreeTypeFont:  # pragma: no cover - simple fallback type when Pillow unavailable
-        pass
+BASE_DIR = Path(__file__).resolve().parent
 
-load_dotenv()
+# Ekstensi dibuat tanpa terikat ke aplikasi; create_app() yang menghubungkannya.
+db = SQLAlchemy()
 
-try:
-    from flask_migrate import Migrate
-except ImportError:
-    Migrate = None
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')  # ganti di produksi
-# Koneksi MySQL Laragon (ubah nama DB/password jika berbeda)
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SQLALCHEMY_DATABASE_URI')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Midtrans Payment Gateway Configuration
-app.config['MIDTRANS_SERVER_KEY'] = os.getenv('MIDTRANS_SERVER_KEY', '')
-app.config['MIDTRANS_CLIENT_KEY'] = os.getenv('MIDTRANS_CLIENT_KEY', '')
-app.config['MIDTRANS_IS_PRODUCTION'] = os.getenv('MIDTRANS_IS_PRODUCTION', 'False').lower() == 'true'
-
-db = SQLAlchemy(app)
-if 'Migrate' in globals() and Migrate:
-    migrate = Migrate(app, db)
-else:
-    migrate = None
-
-login_manager = LoginManager(app)
+login_manager = LoginManager()
 login_manager.login_view = 'login'
 
+# Rute utama dikumpulkan di sini lalu didaftarkan oleh create_app(), sehingga
+# nama endpoint tetap sama seperti sebelumnya (tanpa prefix blueprint).
+_url_rules = []
+
+def route(rule, **options):
+    """Pengganti @app.route yang mencatat rute untuk didaftarkan di create_app()."""
+    def decorator(view_func):
+        _url_rules.append((rule, view_func, options))
+        return view_func
+    return decorator
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ['true', '1', 't']
+
+def build_engine_options(database_uri):
+    """Susun SQLALCHEMY_ENGINE_OPTIONS dari environment.
+
+    Pengaturan pool hanya diterapkan untuk database server (MySQL dkk.);
+    SQLite memakai pool bawaan SQLAlchemy. Default dipilih untuk PyMySQL:
+    koneksi di-ping sebelum dipakai dan didaur ulang sebelum wait_timeout MySQL
+    agar tidak muncul "MySQL server has gone away".
+    """
+    if not database_uri or database_uri.startswith('sqlite'):
+        return {}
+    options = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '5')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '280')),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+    }
+    if database_uri.startswith('mysql+pymysql'):
+        connect_args = {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+        }
+        # Batas waktu baca/tulis socket (detik) dan max_execution_time (ms, hanya SELECT) per statement
+        read_timeout = int(os.getenv('DB_READ_TIMEOUT', '30'))
+        if read_timeout > 0:
+            connect_args['read_timeout'] = read_timeout
+            connect_args['write_timeout'] = read_timeout
+        statement_timeout_ms = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '10000'))
+        if statement_timeout_ms > 0:
+            connect_args['init_command'] = f'SET SESSION max_execution_time={statement_timeout_ms}'
+        options['connect_args'] = connect_args
+    return options
+
+# Anggaran jumlah query per endpoint (satu tempat). Endpoint yang tidak tercantum memakai
+# QUERY_BUDGET_DEFAULT. Melebihi anggaran = warning di log, atau QueryBudgetExceeded saat TESTING.
+# Anggaran berlaku untuk request dingin: termasuk query user_loader dan pengisian cache per worker
+# (indeks pencarian, view model kursus, kunci jawaban, ...), bukan hanya request dengan cache hangat.
+QUERY_BUDGETS = {
+    'index': 3,
+    'courses': 8,
+    'course_detail': 6,
+    'view_syllabus': 7,
+    'syllabus_json': 6,
+    'api_courses': 5,
+    'api_course_detail': 8,
+    'my_courses': 6,
+    'instructor_dashboard': 3,
+    'manage_enrollments': 4,
+    'student_detail_for_instructor': 10,
+    'cart': 4,
+    'take_quiz': 14,
+    'quiz_json': 4,
+    'manage_quiz': 5,
+    'quiz_analysis': 7,
+    'login': 3,
+    'register': 3,
+}
+
+def default_config():
+    """Konfigurasi bawaan dari environment (.env)."""
+    return {
+        'SECRET_KEY': os.getenv('SECRET_KEY', 'dev-secret-key'),  # ganti di produksi
+        # Koneksi MySQL Laragon (ubah nama DB/password jika berbeda)
+        'SQLALCHEMY_DATABASE_URI': os.getenv('SQLALCHEMY_DATABASE_URI'),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'SCHEMA_BOOTSTRAP': os.getenv('SCHEMA_BOOTSTRAP', 'create'),
+        # Flask-Migrate (alembic) hanya diperlukan untuk perintah "flask db"; worker web boleh mematikannya.
+        'MIGRATIONS_ENABLED': _env_bool('MIGRATIONS_ENABLED', True),
+        # Midtrans Payment Gateway Configuration
+        'MIDTRANS_SERVER_KEY': os.getenv('MIDTRANS_SERVER_KEY', ''),
+        'MIDTRANS_CLIENT_KEY': os.getenv('MIDTRANS_CLIENT_KEY', ''),
+        'MIDTRANS_IS_PRODUCTION': os.getenv('MIDTRANS_IS_PRODUCTION', 'False').lower() == 'true',
+        'LOG_DIR': os.getenv('LOG_DIR', str(BASE_DIR / 'logs')),
+        # Cache snapshot user per worker untuk Flask-Login (lihat load_user)
+        'USER_CACHE_SIZE': int(os.getenv('USER_CACHE_SIZE', '2048')),
+        'USER_CACHE_TTL': int(os.getenv('USER_CACHE_TTL', '60')),
+        # Indeks pencarian kursus per worker: dibangun ulang di background setiap N detik (0 = tidak pernah)
+        'SEARCH_INDEX_REFRESH': int(os.getenv('SEARCH_INDEX_REFRESH', '300')),
+        'SEARCH_INDEX_WARM': _env_bool('SEARCH_INDEX_WARM', True),
+        'SEARCH_RESULT_LIMIT': int(os.getenv('SEARCH_RESULT_LIMIT', '500')),
+        # Jumlah kursus per halaman di /courses dan /my-courses
+        'COURSES_PAGE_SIZE': int(os.getenv('COURSES_PAGE_SIZE', '12')),
+        # Cache blok "terpopuler"/"terbaru" di beranda (detik); dibuang saat kursus/pendaftaran berubah
+        'HOMEPAGE_CACHE_TTL': int(os.getenv('HOMEPAGE_CACHE_TTL', '30')),
+        # Halaman katalog/detail/silabus untuk pengunjung anonim boleh disimpan reverse proxy selama N detik
+        'PUBLIC_PAGE_SMAXAGE': int(os.getenv('PUBLIC_PAGE_SMAXAGE', '60')),
+        # Jumlah kursus yang bagian publik halaman detailnya di-cache per worker
+        'COURSE_VIEW_CACHE_SIZE': int(os.getenv('COURSE_VIEW_CACHE_SIZE', '512')),
+        # Profil query per request (jumlah, waktu DB, deteksi N+1) dan anggaran query per endpoint
+        'QUERY_PROFILING': _env_bool('QUERY_PROFILING', True),
+        # Header Server-Timing membuka waktu DB dan jumlah query ke klien/proxy; selain debug/TESTING harus diaktifkan
+        'QUERY_SERVER_TIMING': _env_bool('QUERY_SERVER_TIMING', False),
+        'QUERY_BUDGET_DEFAULT': int(os.getenv('QUERY_BUDGET_DEFAULT', '25')),
+        'QUERY_BUDGETS': dict(QUERY_BUDGETS),
+        # Statement yang sama (beda parameter) dijalankan >= N kali dalam satu request dicatat sebagai N+1
+        'QUERY_REPEAT_THRESHOLD': int(os.getenv('QUERY_REPEAT_THRESHOLD', '5')),
+        # None = ikut TESTING: lempar QueryBudgetExceeded alih-alih warning
+        'QUERY_BUDGET_RAISE': None,
+        # Manifest aset statis ber-hash hasil "flask build-assets"; tanpa manifest URL aset tidak diubah
+        'ASSET_MANIFEST': os.getenv('ASSET_MANIFEST', str(BASE_DIR / 'static' / 'dist' / 'manifest.json')),
+        'ASSET_MAX_AGE': int(os.getenv('ASSET_MAX_AGE', str(365 * 24 * 3600))),
+        # Batas limit= per halaman untuk /api/v1/courses
+        'API_MAX_PAGE_SIZE': int(os.getenv('API_MAX_PAGE_SIZE', '50')),
+        # PDF sertifikat ter-render (berbasis isi), dibuang dari yang paling lama tidak dipakai bila melebihi batas
+        'CERTIFICATE_CACHE_DIR': os.getenv('CERTIFICATE_CACHE_DIR', str(BASE_DIR / 'cache' / 'certificates')),
+        'CERTIFICATE_CACHE_MAX_MB': int(os.getenv('CERTIFICATE_CACHE_MAX_MB', '512')),
+        # Render sertifikat di background begitu siswa memenuhi syarat (materi, kuis, latihan)
+        'CERTIFICATE_PREGENERATE': _env_bool('CERTIFICATE_PREGENERATE', True),
+        'CERTIFICATE_RENDER_WORKERS': int(os.getenv('CERTIFICATE_RENDER_WORKERS', '1')),
+        # 'vector': template sebagai gambar + teks PDF (kecil, teks bisa dipilih); 'raster': satu gambar penuh
+        'CERTIFICATE_PDF_MODE': os.getenv('CERTIFICATE_PDF_MODE', 'vector'),
+    }
+
 # Custom Jinja filter for line breaks
-@app.template_filter('nl2br')
 def nl2br_filter(text):
     """Convert newlines to HTML line breaks."""
     if not text:
@@ -70,23 +187,35 @@ def nl2br_filter(text):
     from markupsafe import Markup, escape
     return Markup(str(escape(text)).replace('\n', '<br>'))
 
-# Setup rotating file log handler
-LOG_DIR = Path(app.root_path) / 'logs'
-LOG_DIR.mkdir(exist_ok=True)
-log_file_path = LOG_DIR / 'app.log'
-if not any(isinstance(handler, RotatingFileHandler) for handler in app.logger.handlers):
-    file_handler = RotatingFileHandler(log_file_path, maxBytes=512000, backupCount=5, encoding='utf-8')
-    file_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-app.logger.setLevel(logging.INFO)
+def configure_logging(app):
+    """Setup rotating file log handler."""
+    log_dir = Path(app.config['LOG_DIR'])
+    log_dir.mkdir(exist_ok=True)
+    log_file_path = log_dir / 'app.log'
+    if not any(isinstance(handler, RotatingFileHandler) for handler in app.logger.handlers):
+        file_handler = RotatingFileHandler(log_file_path, maxBytes=512000, backupCount=5, encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
+        file_handler.setLevel(logging.INFO)
+        app.logger.addHandler(file_handler)
+    app.logger.setLevel(logging.INFO)
+
+def load_pillow():
+    """Import Pillow saat pertama kali dibutuhkan (hanya dipakai untuk sertifikat).
+
+    Mengembalikan tuple (Image, ImageDraw, ImageFont) atau None jika Pillow tidak terpasang.
+    """
+    try:
+        from PIL import Image, ImageDraw, ImageFont
+    except ImportError:  # pragma: no cover - dependency issue surfaced at runtime
+        return None
+    return Image, ImageDraw, ImageFont
 
 
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-THUMBNAIL_UPLOAD_DIR = Path(app.static_folder) / 'uploads' / 'thumbnails'
+THUMBNAIL_UPLOAD_DIR = BASE_DIR / 'static' / 'uploads' / 'thumbnails'
 
 ALLOWED_CERTIFICATE_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
-CERTIFICATE_UPLOAD_DIR = Path(app.static_folder) / 'uploads' / 'certificates'
+CERTIFICATE_UPLOAD_DIR = BASE_DIR / 'static' / 'uploads' / 'certificates'
 
 # Memanggil API OpenRouter untuk mendapatkan jawaban AI berbasis chat completion.
 # Fungsi ini menerima daftar pesan percakapan dan mengembalikan teks balasan
@@ -94,12 +223,12 @@ CERTIFICATE_UPLOAD_DIR = Path(app.static_folder) / 'uploads' / 'certificates'
 def call_openrouter(messages, *, max_tokens=600):
     """Kirim permintaan ke OpenRouter dan kembalikan respons teks yang siap ditampilkan."""
     if os.getenv('AI_PROVIDER', '').lower() != 'openrouter':
-        app.logger.warning('AI_PROVIDER bukan openrouter; chatbot dinonaktifkan.')
+        current_app.logger.warning('AI_PROVIDER bukan openrouter; chatbot dinonaktifkan.')
         return None
 
     api_key = os.getenv('AI_API_KEY')
     if not api_key:
-        app.logger.warning('OpenRouter API key belum diatur.')
+        current_app.logger.warning('OpenRouter API key belum diatur.')
         return None
 
     base_url = os.getenv('AI_BASE_URL', 'https://openrouter.ai/api/v1/chat/completions')
@@ -114,27 +243,29 @@ def call_openrouter(messages, *, max_tokens=600):
         'max_tokens': max_tokens,
     }
 
-    app.logger.info('Mengirim permintaan AI model %s dengan %d pesan', payload['model'], len(messages))
+    current_app.logger.info('Mengirim permintaan AI model %s dengan %d pesan', payload['model'], len(messages))
+
+    import requests
 
     try:
         response = requests.post(base_url, headers=headers, json=payload, timeout=20)
     except requests.RequestException:
-        app.logger.exception('Gagal memanggil OpenRouter')
+        current_app.logger.exception('Gagal memanggil OpenRouter')
         return None
 
     if response.status_code >= 400:
-        app.logger.error('OpenRouter error %s: %s', response.status_code, response.text)
+        current_app.logger.error('OpenRouter error %s: %s', response.status_code, response.text)
         return None
 
     try:
         data = response.json()
     except ValueError:
-        app.logger.error('Respons OpenRouter bukan JSON valid: %s', response.text)
+        current_app.logger.error('Respons OpenRouter bukan JSON valid: %s', response.text)
         return None
 
     choices = data.get('choices') or []
     if not choices:
-        app.logger.error('OpenRouter tidak mengembalikan pilihan respons: %s', data)
+        current_app.logger.error('OpenRouter tidak mengembalikan pilihan respons: %s', data)
         return None
 
     message = choices[0].get('message') or {}
@@ -176,7 +307,7 @@ def call_openrouter(messages, *, max_tokens=600):
                 content = reasoning.strip()
 
     if not content:
-        app.logger.error('OpenRouter tidak mengembalikan konten pesan: %s', message)
+        current_app.logger.error('OpenRouter tidak mengembalikan konten pesan: %s', message)
         return None
 
     return content.strip()
@@ -241,16 +372,9 @@ def build_catalog_context() -> str:
         
         # Query kursus populer dengan detail lengkap (harga, instruktur, deskripsi, jumlah lesson)
         popular_courses_query = (
-            db.session.query(
-                Course,
-                func.count(Enrollment.id).label('enrolled'),
-                func.count(Lesson.id).label('lesson_count')
-            )
-            .outerjoin(Enrollment, Enrollment.course_id == Course.id)
-            .outerjoin(Lesson, Lesson.course_id == Course.id)
-            .options(joinedload(Course.instructor))
-            .group_by(Course.id)
-            .order_by(func.count(Enrollment.id).desc(), Course.title.asc())
+            Course.query
+            .options(joinedload(Course.instructor), undefer(Course.description))
+            .order_by(Course.enrollment_count.desc(), Course.title.asc())
             .limit(5)
             .all()
         )
@@ -263,7 +387,7 @@ def build_catalog_context() -> str:
             .all()
         )
     except Exception:  # pragma: no cover - defensive
-        app.logger.exception('Gagal menyiapkan konteks katalog AI')
+        current_app.logger.exception('Gagal menyiapkan konteks katalog AI')
         return ''
 
     parts = []
@@ -293,9 +417,11 @@ def build_catalog_context() -> str:
     # Format kursus populer dengan detail lengkap
     if popular_courses_query:
         popular_details = []
-        for course, enrolled_count, lesson_count in popular_courses_query:
+        for course in popular_courses_query:
             if not course or not course.title:
                 continue
+            enrolled_count = course.enrollment_count
+            lesson_count = course.lesson_count
             
             # Format: "Judul Kursus (Status - Harga, Instruktur: Nama, X materi, Y siswa)"
             detail_parts = [course.title]
@@ -363,15 +489,8 @@ def build_instructor_context(instructor_id: int) -> str:
     try:
         # Query kursus yang dibuat oleh instructor ini
         instructor_courses = (
-            db.session.query(
-                Course,
-                func.count(Enrollment.id).label('student_count'),
-                func.count(Lesson.id).label('lesson_count')
-            )
-            .outerjoin(Enrollment, Enrollment.course_id == Course.id)
-            .outerjoin(Lesson, Lesson.course_id == Course.id)
+            Course.query
             .filter(Course.instructor_id == instructor_id)
-            .group_by(Course.id)
             .order_by(Course.title.asc())
             .all()
         )
@@ -383,9 +502,11 @@ def build_instructor_context(instructor_id: int) -> str:
         parts.append(f"Anda telah membuat {len(instructor_courses)} kursus:")
         
         course_details = []
-        for course, student_count, lesson_count in instructor_courses:
+        for course in instructor_courses:
             if not getattr(course, 'title', None):
                 continue
+            student_count = course.enrollment_count
+            lesson_count = course.lesson_count
             
             # Format: "Judul (Status-Harga, X siswa, Y materi)"
             detail_parts = []
@@ -407,7 +528,7 @@ def build_instructor_context(instructor_id: int) -> str:
         return ' '.join(parts)
     
     except Exception:
-        app.logger.exception('Gagal menyiapkan konteks instructor')
+        current_app.logger.exception('Gagal menyiapkan konteks instructor')
         return ''
 
 def build_chat_messages(user_message: str, *, user=None, include_history=True) -> list[dict]:
@@ -463,7 +584,7 @@ def build_chat_messages(user_message: str, *, user=None, include_history=True) -
                     'content': chat.message
                 })
         except Exception:
-            app.logger.exception('Gagal load chat history untuk user %s', user.id)
+            current_app.logger.exception('Gagal load chat history untuk user %s', user.id)
     
     # Tambahkan pertanyaan user saat ini
     messages.append({'role': 'user', 'content': user_message.strip()})
@@ -472,120 +593,36 @@ def build_chat_messages(user_message: str, *, user=None, include_history=True) -
 
 
 
+def get_certificate_renderer(background_path: Path, kind: str = 'raster'):
+    """Renderer ('raster' atau 'vector') per file template, dipakai bersama oleh semua request dan thread background."""
+    renderers = current_app.extensions['certificate_renderers']
+    key = (kind, str(background_path))
+    renderer = renderers.get(key)
+    if renderer is None:
+        if kind == 'vector':
+            renderer = VectorCertificateRenderer(background_path)
+        else:
+            renderer = CertificateRenderer(background_path, current_app.extensions['certificate_fonts'])
+        renderer = renderers.setdefault(key, renderer)
+    return renderer
+
 def build_certificate_pdf(*, background_path: Path, student_name: str, instructor_name: str,
                           material_type: str, course_title: str, issued_date: str) -> BytesIO:
-    if Image is None or ImageDraw is None or ImageFont is None:
+    if load_pillow() is None:
         raise RuntimeError('Pillow tidak tersedia untuk membuat sertifikat.')
-
-    background = Image.open(background_path).convert('RGB')
-    draw = ImageDraw.Draw(background)
-    width, height = background.size
-    text_color = (20, 45, 85)
-
-    font_directories = [
-        Path(app.root_path) / 'file_pendukung' / 'sertifikat',
-        Path(app.root_path) / 'file_pendukung',
-        Path.home() / 'fonts',
-        Path('C:/Windows/Fonts'),
-        Path('/usr/share/fonts/truetype'),
-        Path('/usr/share/fonts/truetype/dejavu'),
-        Path('/Library/Fonts'),
-        None,
-    ]
-
-    def load_font(size: int, *, bold: bool = False) -> PILFreeTypeFont:
-        regular_candidates = ['Arial.ttf', 'arial.ttf', 'DejaVuSans.ttf', 'LiberationSans-Regular.ttf']
-        bold_candidates = ['Arial Bold.ttf', 'arialbd.ttf', 'DejaVuSans-Bold.ttf', 'LiberationSans-Bold.ttf']
-        candidates = bold_candidates if bold else regular_candidates
-        for directory in font_directories:
-            for candidate in candidates:
-                try:
-                    if directory is None:
-                        font = ImageFont.truetype(candidate, size=size)
-                    else:
-                        font_path = directory / candidate
-                        if not font_path.exists():
-                            continue
-                        font = ImageFont.truetype(str(font_path), size=size)
-                    return font
-                except (OSError, IOError):
-                    continue
-        return ImageFont.load_default()
-
-    student_font = load_font(72, bold=True)
-    body_font = load_font(38)
-    info_font = load_font(30)
-    signature_font = load_font(32, bold=True)
-
-    def draw_centered(text: str, center_x: float, y: float, font: PILFreeTypeFont,
-                      *, fill=text_color, line_gap: int = 10) -> float:
-        if not text:
-            return y
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        x = int(center_x - text_width / 2)
-        draw.text((x, int(y)), text, font=font, fill=fill)
-        return y + text_height + line_gap
-
-    def measure_width(value: str, font: PILFreeTypeFont) -> float:
-        if hasattr(draw, 'textlength'):
-            return draw.textlength(value, font=font)
-        bbox = draw.textbbox((0, 0), value, font=font)
-        return bbox[2] - bbox[0]
-
-    def wrap_text(value: str, font: PILFreeTypeFont, max_width: float) -> list[str]:
-        words = value.split()
-        lines = []
-        current = ''
-        for word in words:
-            candidate = (current + ' ' + word).strip()
-            if candidate and measure_width(candidate, font) <= max_width:
-                current = candidate
-            else:
-                if current:
-                    lines.append(current)
-                current = word
-        if current:
-            lines.append(current)
-        return lines or ['']
-
-    center_x = width / 2
-
-    student_y = height * 0.42
-    body_y = draw_centered(student_name, center_x, student_y, student_font, line_gap=50)
-
-    body_lines = []
-    course_title = (course_title or '').strip()
-    material_label = (material_type or '').strip()
-    if material_label and course_title:
-        program_label = f'{material_label} - {course_title}'
-    elif material_label:
-        program_label = material_label
-    elif course_title:
-        program_label = course_title
-    else:
-        program_label = 'Program'
-
-    paragraph = (
-        'Telah mengikuti dan menyelesaikan seluruh materi serta latihan pada program kursus '
-        f'{program_label} dan dinyatakan lulus dengan hasil yang memuaskan.'
-    )
-    body_lines.extend(wrap_text(paragraph, body_font, max_width=width * 0.75))
-
-    for line in body_lines:
-        body_y = draw_centered(line, center_x, body_y, body_font)
-
-    body_y = draw_centered(f'Diterbitkan pada {issued_date}', center_x, body_y + 30, info_font)
-
-    signature_y = height * 0.84
-    draw_centered(instructor_name, width * 0.27, signature_y, signature_font, line_gap=0)
-    draw_centered('TechNova Academy', width * 0.73, signature_y, signature_font, line_gap=0)
-
-    output = BytesIO()
-    background.save(output, format='PDF')
-    output.seek(0)
-    return output
+    fields = {
+        'student_name': student_name,
+        'instructor_name': instructor_name,
+        'material_type': material_type,
+        'course_title': course_title,
+        'issued_date': issued_date,
+    }
+    if current_app.config['CERTIFICATE_PDF_MODE'] == 'vector':
+        renderer = get_certificate_renderer(background_path, 'vector')
+        # Teks di luar WinAnsi (misal aksara non-Latin) tidak bisa ditulis dengan font standar PDF
+        if renderer.supports(**fields):
+            return renderer.render(**fields)
+    return get_certificate_renderer(background_path).render(**fields)
 
 # ---------- Models ----------
 class User(db.Model, UserMixin):
@@ -599,6 +636,8 @@ class User(db.Model, UserMixin):
     teaching_experience = db.Column(db.Integer, nullable=True) # Lama Mengajar (tahun)
     certificate_type = db.Column(db.String(50), default='default') # Tipe sertifikat (default, pdf, image, link)
     certificate_data = db.Column(db.String(500), nullable=True) # Data sertifikat (path file atau URL)
+    # Lebar pratinjau sertifikat gambar yang sudah dibuat ("480"); NULL = belum diproses
+    certificate_variants = db.Column(db.String(64), nullable=True)
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -612,30 +651,75 @@ class User(db.Model, UserMixin):
             return False
         return self.certificate_type != 'default' and bool(self.certificate_data)
 
+    def update_certificate_variants(self):
+        """Buat pratinjau ringan (WebP/JPEG) untuk sertifikat bertipe gambar; panggil setiap sertifikat diganti."""
+        path = self.certificate_data if self.certificate_type == 'image' else None
+        self.certificate_variants = generate_image_variants(path, CERTIFICATE_PREVIEW_WIDTHS)
+
 class Course(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
-    description = db.Column(db.Text, default='')
+    # Kolom Text besar di-defer: hanya dimuat saat diakses atau lewat undefer()
+    description = deferred(db.Column(db.Text, default=''))
     is_premium = db.Column(db.Boolean, default=False)
     price = db.Column(db.Integer, default=0)
     instructor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     instructor = db.relationship('User')
     thumbnail_path = db.Column(db.String(500), default='')
+    # Lebar turunan thumbnail yang sudah dibuat ("320,480,640"); NULL = belum diproses
+    thumbnail_variants = db.Column(db.String(64), nullable=True)
     material_type = db.Column(db.String(100), nullable=True) # Jenis Materi
     quiz_start_date = db.Column(db.DateTime, nullable=True)
     quiz_end_date = db.Column(db.DateTime, nullable=True)
     passing_grade = db.Column(db.Integer, default=100)  # Passing grade for quiz (default 100)
     attempt_limit = db.Column(db.Integer, default=0)  # 0 = unlimited attempts
+    # Counter denormalisasi, dijaga oleh adjust_course_counters() di transaksi yang sama
+    # dengan perubahan datanya; perbaiki selisih dengan "flask reconcile-course-counters".
+    enrollment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    lesson_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    question_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    has_exercise = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
+    # Versi konten untuk ETag: naik lewat bump_course_version() setiap kali kursus, materi,
+    # kuis, latihan, capaian, atau skill-nya berubah.
+    content_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index('ix_course_popularity', 'enrollment_count', 'id'),)
+
+    def update_thumbnail_variants(self):
+        """Buat turunan thumbnail (beberapa lebar, WebP + JPEG); panggil setiap thumbnail_path diganti."""
+        self.thumbnail_variants = generate_image_variants(self.thumbnail_path, THUMBNAIL_WIDTHS)
 
 class Lesson(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
-    content = db.Column(db.Text, default='')
+    content = deferred(db.Column(db.Text, default=''))
     video_url = db.Column(db.String(500), default='')
     meeting_url = db.Column(db.String(500), default='') # New field for meeting links
     start_date = db.Column(db.DateTime, nullable=True)
     duration_minutes = db.Column(db.Integer, nullable=True) # Duration in minutes
+    # Hasil prepare_video_embed(video_url), dihitung sekali saat materi ditulis (update_embed)
+    embed_type = db.Column(db.String(20), nullable=True)
+    embed_provider = db.Column(db.String(20), nullable=True)
+    embed_url = db.Column(db.String(500), nullable=True)
+
+    def update_embed(self):
+        """Simpan metadata embed dari video_url saat ini; panggil setiap video_url diubah."""
+        embed = prepare_video_embed(self.video_url)
+        self.embed_type = embed['type'] if embed else None
+        self.embed_provider = embed['provider'] if embed else None
+        self.embed_url = embed['embed_url'] if embed else None
+
+    @property
+    def embed(self):
+        """Metadata embed video untuk template, atau None bila materi tanpa video."""
+        if self.embed_type:
+            return {'type': self.embed_type, 'provider': self.embed_provider, 'embed_url': self.embed_url}
+        if self.video_url and self.video_url.strip():
+            # Baris lama yang belum diisi "flask backfill-lesson-embeds"
+            return prepare_video_embed(self.video_url)
+        return None
 
 class Enrollment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -657,10 +741,28 @@ class Choice(db.Model):
 class Attempt(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False, index=True)
     score = db.Column(db.Integer, default=0)
     passed = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Jawaban per soal sebagai int32 ter-pack (services.item_analysis.pack_answers); NULL untuk attempt lama
+    answers = deferred(db.Column(db.LargeBinary, nullable=True))
+
+    __table_args__ = (db.Index('ix_attempt_user_course', 'user_id', 'course_id'),)
+
+class AttemptSummary(db.Model):
+    """Ringkasan percobaan kuis satu user di satu kursus, diperbarui atomik bersama setiap Attempt baru."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False, index=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    best_score = db.Column(db.Integer, nullable=True)
+    last_score = db.Column(db.Integer, nullable=True)
+    last_passed = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
+    passed = db.Column(db.Boolean, nullable=False, default=False, server_default='0')  # pernah lulus
+    last_attempt_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'course_id', name='uq_attempt_summary_user_course'),)
 
 class CartItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -695,11 +797,32 @@ class LessonProgress(db.Model):
 
     __table_args__ = (db.UniqueConstraint('user_id', 'lesson_id', name='uq_user_lesson'),)
 
+class EnrollmentProgress(db.Model):
+    """Ringkasan progres satu siswa di satu kursus, diperbarui inkremental oleh record_*_progress()."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False, index=True)
+    lessons_completed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_lessons = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    quiz_attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_quiz_score = db.Column(db.Integer, nullable=True)  # kelulusan kuis mengikuti percobaan terakhir
+    best_quiz_score = db.Column(db.Integer, nullable=True)
+    exercise_submitted = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
+    exercise_score = db.Column(db.Integer, nullable=True)
+    components_completed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    components_total = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    percent = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Saat siswa pertama kali memenuhi syarat sertifikat; menjadi tanggal terbit di PDF
+    certificate_issued_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'course_id', name='uq_enrollment_progress_user_course'),)
+
 class Exercise(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False, unique=True)
     name = db.Column(db.String(200), nullable=False)
-    description = db.Column(db.Text, default='')
+    description = deferred(db.Column(db.Text, default=''))
     exercise_url = db.Column(db.String(500), default='')
     start_date = db.Column(db.DateTime, nullable=True)
     end_date = db.Column(db.DateTime, nullable=True)
@@ -740,7 +863,7 @@ class Payment(db.Model):
     transaction_status = db.Column(db.String(50), default='pending')
     transaction_time = db.Column(db.DateTime)
     settlement_time = db.Column(db.DateTime)
-    payment_data = db.Column(db.Text)
+    payment_data = deferred(db.Column(db.Text))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -756,7 +879,739 @@ def ensure_course_thumbnail_column():
             with db.engine.begin() as conn:
                 conn.execute(text("ALTER TABLE course ADD COLUMN thumbnail_path VARCHAR(500)"))
     except Exception as exc:
-        app.logger.warning('Could not ensure thumbnail column: %s', exc)
+        current_app.logger.warning('Could not ensure thumbnail column: %s', exc)
+
+# ---------- Schema bootstrap ----------
+# Pemeriksaan skema dilakukan sekali per proses (worker), bukan di setiap request.
+# Hasilnya disimpan di sini agar request path tidak pernah menjalankan DDL/inspector.
+SCHEMA_BOOTSTRAP_MODES = {'create', 'verify', 'off'}
+
+def _schema_state():
+    return current_app.extensions.setdefault('schema_bootstrap', {'checked': False, 'drift': {}})
+
+def find_schema_drift():
+    """Bandingkan metadata model dengan katalog database.
+
+    Mengembalikan dict {nama_tabel: None} untuk tabel yang belum ada dan
+    {nama_tabel: [kolom, ...]} untuk tabel yang kekurangan kolom.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    drift = {}
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            drift[table.name] = None
+            continue
+        existing_columns = {col['name'] for col in inspector.get_columns(table.name)}
+        missing_columns = [column.name for column in table.columns if column.name not in existing_columns]
+        if missing_columns:
+            drift[table.name] = missing_columns
+    return drift
+
+def bootstrap_schema(mode=None, *, force=False):
+    """Jalankan pemeriksaan skema satu kali untuk proses ini.
+
+    mode 'create' membuat tabel yang belum ada (perilaku lama db.create_all()),
+    'verify' hanya memeriksa dan mencatat perbedaan, 'off' melewati pemeriksaan.
+    """
+    mode = (mode or current_app.config.get('SCHEMA_BOOTSTRAP') or 'create').lower()
+    if mode not in SCHEMA_BOOTSTRAP_MODES:
+        current_app.logger.warning('SCHEMA_BOOTSTRAP tidak dikenal: %s; memakai mode verify.', mode)
+        mode = 'verify'
+    state = _schema_state()
+    if mode == 'off':
+        state['checked'] = True
+        return {}
+    if state['checked'] and not force:
+        return state['drift']
+
+    # Tandai sebelum mencoba agar kegagalan tidak diulang di setiap request;
+    # gunakan "flask db-verify" untuk memeriksa ulang.
+    state['checked'] = True
+    try:
+        if mode == 'create':
+            db.create_all()
+            ensure_course_thumbnail_column()
+        drift = find_schema_drift()
+    except Exception as exc:
+        current_app.logger.warning('Pemeriksaan skema database gagal: %s', exc)
+        state['drift'] = None
+        return None
+
+    state['drift'] = drift
+    if drift:
+        for table_name, columns in drift.items():
+            if columns is None:
+                current_app.logger.warning('Skema: tabel %s belum ada.', table_name)
+            else:
+                current_app.logger.warning('Skema: tabel %s kekurangan kolom %s.', table_name, ', '.join(columns))
+    else:
+        current_app.logger.info('Skema database sesuai dengan model.')
+    return drift
+
+@click.command('db-verify')
+@click.option('--create', is_flag=True, help='Buat tabel yang belum ada sebelum memeriksa.')
+@with_appcontext
+def db_verify_command(create):
+    """Periksa skema database terhadap model (jalankan saat deploy)."""
+    drift = bootstrap_schema('create' if create else 'verify', force=True)
+    if drift is None:
+        click.echo('Gagal terhubung ke database untuk memeriksa skema.', err=True)
+        sys.exit(2)
+    if not drift:
+        click.echo('Skema database OK.')
+        return
+    for table_name, columns in drift.items():
+        if columns is None:
+            click.echo(f'Tabel hilang: {table_name}', err=True)
+        else:
+            click.echo(f'Kolom hilang di {table_name}: {", ".join(columns)}', err=True)
+    click.echo('Jalankan "flask db upgrade" untuk menerapkan migrasi.', err=True)
+    sys.exit(1)
+
+# ---------- Hook setelah commit ----------
+
+def run_after_commit(callback):
+    """Jadwalkan callback (misal invalidasi cache) setelah transaksi sesi saat ini berhasil di-commit."""
+    session = db.session()
+    if not session.in_transaction():
+        # Mulai transaksinya sekarang agar rollback() berikutnya juga membuang callback ini
+        session.begin()
+    session.info.setdefault('after_commit_callbacks', []).append(callback)
+
+@event.listens_for(SASession, 'after_commit')
+def _run_after_commit_callbacks(session):
+    # after_commit juga dipanggil untuk savepoint; callback baru jalan setelah transaksi luar di-commit
+    if session.in_nested_transaction():
+        return
+    for callback in session.info.pop('after_commit_callbacks', []):
+        try:
+            callback()
+        except Exception:
+            current_app.logger.exception('Callback setelah commit gagal')
+
+@event.listens_for(SASession, 'after_soft_rollback')
+def _discard_after_commit_callbacks(session, previous_transaction):
+    # Rollback savepoint (begin_nested) tidak membatalkan transaksi luar beserta callback-nya
+    if previous_transaction.nested:
+        return
+    session.info.pop('after_commit_callbacks', None)
+
+# ---------- Counter kursus ----------
+COURSE_COUNTER_COLUMNS = ('enrollment_count', 'lesson_count', 'question_count')
+
+def adjust_course_counters(course_id, **deltas):
+    """Tambah/kurangi counter kursus secara atomik (UPDATE ... SET x = x + n).
+
+    Dipanggil sebelum commit agar counter ikut transaksi yang sama dengan
+    perubahan Enrollment/Lesson/Question-nya.
+    """
+    values = {}
+    for name, delta in deltas.items():
+        if name not in COURSE_COUNTER_COLUMNS:
+            raise ValueError(f'Counter kursus tidak dikenal: {name}')
+        if delta:
+            column = getattr(Course, name)
+            values[column] = column + delta
+    if values:
+        Course.query.filter(Course.id == course_id).update(values, synchronize_session=False)
+        if deltas.get('enrollment_count'):
+            # Urutan "terpopuler" di beranda bergantung pada enrollment_count
+            run_after_commit(invalidate_homepage_cache)
+
+def compute_course_counters():
+    """Hitung ulang counter dari tabel sumber: {course_id: {kolom: nilai}}."""
+    enrollments = dict(db.session.query(Enrollment.course_id, func.count(Enrollment.id)).group_by(Enrollment.course_id))
+    lessons = dict(db.session.query(Lesson.course_id, func.count(Lesson.id)).group_by(Lesson.course_id))
+    questions = dict(db.session.query(Question.course_id, func.count(Question.id)).group_by(Question.course_id))
+    exercises = {course_id for (course_id,) in db.session.query(Exercise.course_id).distinct()}
+    return {
+        course_id: {
+            'enrollment_count': enrollments.get(course_id, 0),
+            'lesson_count': lessons.get(course_id, 0),
+            'question_count': questions.get(course_id, 0),
+            'has_exercise': course_id in exercises,
+        }
+        for (course_id,) in db.session.query(Course.id)
+    }
+
+def reconcile_course_counters(*, dry_run=False):
+    """Samakan counter tersimpan dengan hasil hitung ulang; kembalikan list (course_id, stored, expected)."""
+    expected_counters = compute_course_counters()
+    columns = COURSE_COUNTER_COLUMNS + ('has_exercise',)
+    drifted = []
+    rows = db.session.query(Course.id, *(getattr(Course, name) for name in columns))
+    for course_id, *values in rows:
+        stored = dict(zip(columns, values))
+        stored['has_exercise'] = bool(stored['has_exercise'])
+        expected = expected_counters.get(course_id)
+        if expected is not None and stored != expected:
+            drifted.append((course_id, stored, expected))
+    if drifted and not dry_run:
+        for course_id, _stored, expected in drifted:
+            Course.query.filter(Course.id == course_id).update(expected, synchronize_session=False)
+        db.session.commit()
+        invalidate_homepage_cache()
+    return drifted
+
+@click.command('reconcile-course-counters')
+@click.option('--dry-run', is_flag=True, help='Hanya tampilkan selisih tanpa memperbaiki.')
+@with_appcontext
+def reconcile_course_counters_command(dry_run):
+    """Perbaiki counter enrollment/lesson/question/exercise pada tabel course."""
+    drifted = reconcile_course_counters(dry_run=dry_run)
+    for course_id, stored, expected in drifted:
+        changes = ', '.join(f'{name} {stored[name]} -> {value}' for name, value in expected.items() if stored[name] != value)
+        click.echo(f'Kursus {course_id}: {changes}')
+    if not drifted:
+        click.echo('Semua counter kursus sudah sesuai.')
+    elif dry_run:
+        click.echo(f'{len(drifted)} kursus berbeda (dry run, tidak ada perubahan).')
+    else:
+        click.echo(f'{len(drifted)} kursus diperbaiki.')
+
+# ---------- Progres pendaftaran ----------
+
+def evaluate_progress(course, progress=None):
+    """Status komponen sertifikat (materi, kuis, latihan) dan persentase gabungannya.
+
+    course cukup punya lesson_count, question_count, has_exercise, dan passing_grade;
+    progress berupa EnrollmentProgress (atau None untuk user yang belum mendaftar).
+    """
+    lessons_completed = progress.lessons_completed if progress else 0
+    last_quiz_score = progress.last_quiz_score if progress else None
+    exercise_submitted = progress.exercise_submitted if progress else False
+    exercise_score = (progress.exercise_score or 0) if progress else 0
+    summary = {'lessons': 'incomplete', 'quiz': 'not_attempted', 'exercise': 'not_required', 'completed': 0, 'total': 0}
+
+    if course.lesson_count:
+        summary['total'] += 1
+        if lessons_completed >= course.lesson_count:
+            summary['completed'] += 1
+            summary['lessons'] = 'complete'
+    if course.question_count:
+        summary['total'] += 1
+        if last_quiz_score is not None:
+            if last_quiz_score >= (course.passing_grade or 100):
+                summary['completed'] += 1
+                summary['quiz'] = 'complete'
+            else:
+                summary['quiz'] = 'incomplete'
+    if course.has_exercise:
+        summary['total'] += 1
+        summary['exercise'] = 'not_submitted'
+        if exercise_submitted:
+            if exercise_score > 0:
+                summary['completed'] += 1
+                summary['exercise'] = 'complete'
+            else:
+                summary['exercise'] = 'pending'
+
+    summary['percent'] = int((summary['completed'] / summary['total']) * 100) if summary['total'] else 0
+    return summary
+
+def _apply_progress_components(progress, course):
+    summary = evaluate_progress(course, progress)
+    progress.total_lessons = course.lesson_count or 0
+    progress.components_completed = summary['completed']
+    progress.components_total = summary['total']
+    progress.percent = summary['percent']
+
+def compute_enrollment_progress(user_id, course_id):
+    """Hitung data mentah progres dari LessonProgress, Attempt, dan ExerciseSubmission dalam satu query."""
+    def own(model):
+        return model.user_id == user_id, model.course_id == course_id
+
+    columns = {
+        'lessons_completed': db.select(func.count(LessonProgress.id)).join(Lesson, Lesson.id == LessonProgress.lesson_id)
+                             .where(LessonProgress.user_id == user_id, Lesson.course_id == course_id),
+        'quiz_attempts': db.select(func.count(Attempt.id)).where(*own(Attempt)),
+        'last_quiz_score': db.select(Attempt.score).where(*own(Attempt)).order_by(Attempt.id.desc()).limit(1),
+        'best_quiz_score': db.select(func.max(Attempt.score)).where(*own(Attempt)),
+        'exercise_submitted': db.select(func.count(ExerciseSubmission.id)).where(*own(ExerciseSubmission)),
+        'exercise_score': db.select(func.max(ExerciseSubmission.score)).where(*own(ExerciseSubmission)),
+    }
+    row = db.session.execute(db.select(*(column.scalar_subquery() for column in columns.values()))).one()
+    values = dict(zip(columns, row))
+    values['exercise_submitted'] = bool(values['exercise_submitted'])
+    return values
+
+def _build_progress(user_id, course):
+    progress = EnrollmentProgress(user_id=user_id, course_id=course.id, **compute_enrollment_progress(user_id, course.id))
+    _apply_progress_components(progress, course)
+    return progress
+
+def ensure_enrollment_progress(user_id, course):
+    """Buat baris progres untuk pendaftaran baru (dipanggil sebelum commit Enrollment-nya)."""
+    progress = EnrollmentProgress.query.filter_by(user_id=user_id, course_id=course.id).first()
+    if progress is None:
+        progress = _build_progress(user_id, course)
+        db.session.add(progress)
+    return progress
+
+def record_enrollment_progress(user_id, course, *, lessons_delta=0, quiz_score=None, exercise_score=None):
+    """Perbarui progres siswa secara inkremental; panggil setelah perubahan sumbernya ditambahkan ke sesi.
+
+    quiz_score dicatat sebagai percobaan kuis baru, exercise_score sebagai kiriman/nilai latihan.
+    Bila baris belum ada, baris dibangun dari tabel sumber (yang sudah memuat perubahan ini).
+    """
+    progress = (EnrollmentProgress.query.filter_by(user_id=user_id, course_id=course.id)
+                .with_for_update().first())
+    if progress is None:
+        progress = _build_progress(user_id, course)
+        db.session.add(progress)
+        _note_certificate_eligibility(progress, course, was_eligible=False)
+        return progress
+    was_eligible = certificate_block_reason(course, progress) is None
+    progress.lessons_completed = max(progress.lessons_completed + lessons_delta, 0)
+    if quiz_score is not None:
+        progress.quiz_attempts += 1
+        progress.last_quiz_score = quiz_score
+        progress.best_quiz_score = quiz_score if progress.best_quiz_score is None else max(progress.best_quiz_score, quiz_score)
+    if exercise_score is not None:
+        progress.exercise_submitted = True
+        progress.exercise_score = exercise_score
+    _apply_progress_components(progress, course)
+    _note_certificate_eligibility(progress, course, was_eligible=was_eligible)
+    return progress
+
+def discount_lesson_progress(course_id, lesson_id):
+    """Kurangi lessons_completed siswa yang menyelesaikan materi yang akan dihapus."""
+    completed_by = db.select(LessonProgress.user_id).where(LessonProgress.lesson_id == lesson_id)
+    EnrollmentProgress.query.filter(EnrollmentProgress.course_id == course_id,
+                                    EnrollmentProgress.user_id.in_(completed_by)).update(
+        {EnrollmentProgress.lessons_completed: EnrollmentProgress.lessons_completed - 1}, synchronize_session=False)
+
+def refresh_course_progress(course_id):
+    """Hitung ulang komponen dan persentase semua siswa setelah struktur kursus berubah.
+
+    Dipakai setelah materi/soal ditambah atau dihapus, latihan dibuat, atau passing grade diubah.
+    """
+    course = (db.session.query(Course.id, Course.lesson_count, Course.question_count, Course.has_exercise, Course.passing_grade)
+              .filter(Course.id == course_id).first())
+    if course is None:
+        return
+    for progress in EnrollmentProgress.query.filter_by(course_id=course_id).populate_existing().all():
+        # Kelayakan lama dibaca dari komponen tersimpan: course sudah membawa nilai baru (mis. passing grade)
+        was_eligible = progress.certificate_issued_at is not None or (
+            0 < progress.components_total == progress.components_completed)
+        _apply_progress_components(progress, course)
+        _note_certificate_eligibility(progress, course, was_eligible=was_eligible)
+
+def get_enrollment_progress(user_id, course):
+    """Progres satu siswa (satu query berindeks); dihitung dari tabel sumber bila barisnya belum ada."""
+    progress = EnrollmentProgress.query.filter_by(user_id=user_id, course_id=course.id).first()
+    return progress if progress is not None else _build_progress(user_id, course)
+
+def get_enrollment_progress_map(user_id, courses):
+    """Progres siswa untuk beberapa kursus sekaligus: {course_id: EnrollmentProgress}."""
+    course_ids = [course.id for course in courses]
+    progress_map = {progress.course_id: progress for progress in EnrollmentProgress.query.filter(
+        EnrollmentProgress.user_id == user_id, EnrollmentProgress.course_id.in_(course_ids))} if course_ids else {}
+    for course in courses:
+        if course.id not in progress_map:
+            progress_map[course.id] = _build_progress(user_id, course)
+    return progress_map
+
+def rebuild_enrollment_progress(*, dry_run=False):
+    """Bangun ulang seluruh tabel enrollment_progress dari tabel sumber; kembalikan jumlah baris yang berubah."""
+    def pair(model):
+        return model.user_id, model.course_id
+
+    lessons = dict(((user_id, course_id), count) for user_id, course_id, count in
+                   db.session.query(LessonProgress.user_id, Lesson.course_id, func.count(LessonProgress.id))
+                   .join(Lesson, Lesson.id == LessonProgress.lesson_id).group_by(LessonProgress.user_id, Lesson.course_id))
+    attempts = {(user_id, course_id): (count, best) for user_id, course_id, count, best in
+                db.session.query(*pair(Attempt), func.count(Attempt.id), func.max(Attempt.score)).group_by(*pair(Attempt))}
+    latest_ids = db.session.query(func.max(Attempt.id)).group_by(*pair(Attempt)).subquery()
+    last_scores = {(user_id, course_id): score for user_id, course_id, score in
+                   db.session.query(*pair(Attempt), Attempt.score).filter(Attempt.id.in_(db.select(latest_ids)))}
+    submissions = {(user_id, course_id): score for user_id, course_id, score in
+                   db.session.query(*pair(ExerciseSubmission), ExerciseSubmission.score)}
+    courses = {course.id: course for course in db.session.query(
+        Course.id, Course.lesson_count, Course.question_count, Course.has_exercise, Course.passing_grade)}
+    existing = {(progress.user_id, progress.course_id): progress for progress in EnrollmentProgress.query}
+
+    changed = 0
+    enrolled = set()
+    for user_id, course_id in db.session.query(*pair(Enrollment)):
+        key = (user_id, course_id)
+        course = courses.get(course_id)
+        if course is None or key in enrolled:
+            continue
+        enrolled.add(key)
+        attempt_count, best_score = attempts.get(key, (0, None))
+        values = {
+            'lessons_completed': lessons.get(key, 0),
+            'quiz_attempts': attempt_count,
+            'last_quiz_score': last_scores.get(key),
+            'best_quiz_score': best_score,
+            'exercise_submitted': key in submissions,
+            'exercise_score': submissions.get(key),
+        }
+        progress = existing.get(key)
+        if progress is None:
+            progress = EnrollmentProgress(user_id=user_id, course_id=course_id)
+            if not dry_run:
+                db.session.add(progress)
+        before = {column: getattr(progress, column) for column in values} | {
+            'components_completed': progress.components_completed, 'percent': progress.percent}
+        for column, value in values.items():
+            setattr(progress, column, value)
+        _apply_progress_components(progress, course)
+        after = {column: getattr(progress, column) for column in before}
+        if before != after:
+            changed += 1
+    orphans = [progress for key, progress in existing.items() if key not in enrolled]
+    changed += len(orphans)
+    if dry_run:
+        db.session.rollback()
+    else:
+        for progress in orphans:
+            db.session.delete(progress)
+        db.session.commit()
+    return changed
+
+@click.command('rebuild-enrollment-progress')
+@click.option('--dry-run', is_flag=True, help='Hanya hitung baris yang berbeda tanpa menyimpan.')
+@with_appcontext
+def rebuild_enrollment_progress_command(dry_run):
+    """Samakan tabel enrollment_progress dengan LessonProgress, Attempt, dan ExerciseSubmission."""
+    changed = rebuild_enrollment_progress(dry_run=dry_run)
+    if not changed:
+        click.echo('Semua progres pendaftaran sudah sesuai.')
+    elif dry_run:
+        click.echo(f'{changed} baris progres berbeda (dry run, tidak ada perubahan).')
+    else:
+        click.echo(f'{changed} baris progres diperbaiki.')
+
+# ---------- Ringkasan percobaan kuis ----------
+
+def _attempt_summary_values(user_id, course_id):
+    """Nilai ringkasan dari tabel attempt; dipakai saat baris ringkasan (user, kursus) belum ada.
+
+    Percobaan satu user di satu kursus sedikit, jadi cukup dibaca semua lewat indeks (user_id, course_id).
+    """
+    attempts = (db.session.query(Attempt.score, Attempt.passed, Attempt.created_at)
+                .filter(Attempt.user_id == user_id, Attempt.course_id == course_id).order_by(Attempt.id).all())
+    scores = [attempt.score for attempt in attempts if attempt.score is not None]
+    latest = attempts[-1] if attempts else None
+    return {
+        'attempt_count': len(attempts),
+        'best_score': max(scores) if scores else None,
+        'last_score': latest.score if latest else None,
+        'last_passed': bool(latest.passed) if latest else False,
+        'passed': any(attempt.passed for attempt in attempts),
+        'last_attempt_at': latest.created_at if latest else None,
+    }
+
+def record_quiz_attempt(attempt, *, attempt_limit=0):
+    """Catat Attempt baru (sudah ditambahkan ke sesi) di attempt_summary; False bila attempt_limit (> 0) terlampaui.
+
+    Batas diperiksa di klausa WHERE dari satu UPDATE, jadi kiriman bersamaan tidak bisa sama-sama
+    lolos. Baris pertama dibangun dari tabel attempt (sudah termasuk attempt ini); bila dua kiriman
+    pertama bentrok di unique constraint, yang kalah mengulang lewat UPDATE. Panggil tepat sebelum
+    commit agar lock baris ringkasan dipegang sesingkat mungkin; rollback bila hasilnya False.
+    """
+    db.session.flush()
+    user_id, course_id, score, passed = attempt.user_id, attempt.course_id, attempt.score, bool(attempt.passed)
+    for _ in range(2):
+        conditions = [AttemptSummary.user_id == user_id, AttemptSummary.course_id == course_id]
+        if attempt_limit > 0:
+            conditions.append(AttemptSummary.attempt_count < attempt_limit)
+        updated = AttemptSummary.query.filter(*conditions).update({
+            AttemptSummary.attempt_count: AttemptSummary.attempt_count + 1,
+            AttemptSummary.best_score: case(
+                (or_(AttemptSummary.best_score.is_(None), AttemptSummary.best_score < score), score),
+                else_=AttemptSummary.best_score),
+            AttemptSummary.last_score: score,
+            AttemptSummary.last_passed: passed,
+            AttemptSummary.passed: True if passed else AttemptSummary.passed,
+            AttemptSummary.last_attempt_at: attempt.created_at,
+        }, synchronize_session=False)
+        if updated:
+            return True
+        # Tanpa batas, UPDATE yang tidak mengenai baris berarti ringkasannya belum ada
+        if attempt_limit > 0 and db.session.query(AttemptSummary.id).filter_by(
+                user_id=user_id, course_id=course_id).first() is not None:
+            return False
+        values = _attempt_summary_values(user_id, course_id)
+        if attempt_limit > 0 and values['attempt_count'] > attempt_limit:
+            return False
+        try:
+            with db.session.begin_nested():
+                db.session.add(AttemptSummary(user_id=user_id, course_id=course_id, **values))
+        except IntegrityError:
+            continue
+        return True
+    return False
+
+def attempt_read_model(summary):
+    """Percobaan terakhir (score, passed, created_at) dari ringkasan, atau None bila belum pernah mencoba."""
+    if summary is None or not summary.attempt_count:
+        return None
+    return ReadModel(score=summary.last_score, passed=bool(summary.last_passed), created_at=summary.last_attempt_at)
+
+def rebuild_attempt_summaries(*, dry_run=False):
+    """Bangun ulang seluruh tabel attempt_summary dari tabel attempt; kembalikan jumlah baris yang berubah."""
+    def pair(model):
+        return model.user_id, model.course_id
+
+    aggregates = {(user_id, course_id): (count, best, bool(passed)) for user_id, course_id, count, best, passed in
+                  db.session.query(*pair(Attempt), func.count(Attempt.id), func.max(Attempt.score),
+                                   func.max(case((Attempt.passed.is_(True), 1), else_=0))).group_by(*pair(Attempt))}
+    latest_ids = db.session.query(func.max(Attempt.id)).group_by(*pair(Attempt)).subquery()
+    latest = {(user_id, course_id): (score, bool(passed), created_at) for user_id, course_id, score, passed, created_at in
+              db.session.query(*pair(Attempt), Attempt.score, Attempt.passed, Attempt.created_at)
+              .filter(Attempt.id.in_(db.select(latest_ids)))}
+    existing = {(summary.user_id, summary.course_id): summary for summary in AttemptSummary.query}
+
+    changed = 0
+    for key, (count, best_score, passed) in aggregates.items():
+        last_score, last_passed, last_attempt_at = latest[key]
+        values = {'attempt_count': count, 'best_score': best_score, 'last_score': last_score,
+                  'last_passed': last_passed, 'passed': passed, 'last_attempt_at': last_attempt_at}
+        summary = existing.get(key)
+        if summary is None:
+            summary = AttemptSummary(user_id=key[0], course_id=key[1])
+            if not dry_run:
+                db.session.add(summary)
+        before = {column: getattr(summary, column) for column in values}
+        if before != values:
+            changed += 1
+            for column, value in values.items():
+                setattr(summary, column, value)
+    orphans = [summary for key, summary in existing.items() if key not in aggregates]
+    changed += len(orphans)
+    if dry_run:
+        db.session.rollback()
+    else:
+        for summary in orphans:
+            db.session.delete(summary)
+        db.session.commit()
+    return changed
+
+@click.command('rebuild-attempt-summaries')
+@click.option('--dry-run', is_flag=True, help='Hanya hitung baris yang berbeda tanpa menyimpan.')
+@with_appcontext
+def rebuild_attempt_summaries_command(dry_run):
+    """Samakan tabel attempt_summary dengan tabel attempt."""
+    changed = rebuild_attempt_summaries(dry_run=dry_run)
+    if not changed:
+        click.echo('Semua ringkasan percobaan kuis sudah sesuai.')
+    elif dry_run:
+        click.echo(f'{changed} baris ringkasan berbeda (dry run, tidak ada perubahan).')
+    else:
+        click.echo(f'{changed} baris ringkasan diperbaiki.')
+
+# ---------- Sertifikat (cache PDF) ----------
+
+CERTIFICATE_TEMPLATE = ('file_pendukung', 'sertifikat', 'docx', 'template Sertifikat LMS.png')
+# Naikkan bila tata letak build_certificate_pdf() berubah agar PDF lama di cache tidak terpakai lagi
+CERTIFICATE_RENDERER_VERSION = 2
+
+_template_digests = {}
+
+def certificate_block_reason(course, progress):
+    """Pesan mengapa sertifikat belum bisa diunduh, atau None bila syarat latihan, kuis, dan materi terpenuhi.
+
+    course cukup punya has_exercise dan passing_grade; progress berupa EnrollmentProgress.
+    """
+    if course.has_exercise and (not progress.exercise_submitted or (progress.exercise_score or 0) <= 0):
+        return 'Anda harus menyelesaikan latihan dan mendapatkan skor sebelum mengunduh sertifikat.'
+    passing_grade = course.passing_grade if course.passing_grade else 100
+    if progress.last_quiz_score is None or progress.last_quiz_score < passing_grade:
+        return f'Dapatkan skor minimal {passing_grade} pada kuis terlebih dahulu sebelum mengunduh sertifikat.'
+    if (progress.total_lessons or 0) > 0 and progress.lessons_completed < progress.total_lessons:
+        return 'Anda harus menyelesaikan semua materi pelajaran sebelum mengunduh sertifikat.'
+    return None
+
+def _note_certificate_eligibility(progress, course, *, was_eligible):
+    # Dipanggil record_enrollment_progress() dan refresh_course_progress(): catat tanggal terbit dan render PDF setelah commit
+    if was_eligible or certificate_block_reason(course, progress) is not None:
+        return
+    if progress.certificate_issued_at is None:
+        progress.certificate_issued_at = datetime.utcnow()
+    user_id, course_id = progress.user_id, progress.course_id
+    run_after_commit(lambda: schedule_certificate_render(user_id, course_id))
+
+def certificate_template_path():
+    return Path(current_app.root_path).joinpath(*CERTIFICATE_TEMPLATE)
+
+def certificate_template_digest(path):
+    """sha256 isi template, dihitung ulang hanya bila ukuran/mtime file berubah."""
+    stat = path.stat()
+    token = (str(path), stat.st_mtime_ns, stat.st_size)
+    digest = _template_digests.get(token)
+    if digest is None:
+        digest = _template_digests[token] = file_digest(path)
+    return digest
+
+def certificate_render_inputs(*, student_id, student_name, course_id, course_title, material_type,
+                              instructor_name, issued_at):
+    return {
+        'student_id': student_id,
+        'course_id': course_id,
+        'student_name': student_name,
+        'instructor_name': instructor_name or 'Instruktur',
+        'material_type': material_type or course_title or 'Program',
+        'course_title': course_title,
+        'issued_date': issued_at.strftime('%d %B %Y'),
+    }
+
+def render_certificate(inputs):
+    """PDF sertifikat sebagai file biner terbuka; dirender lalu disimpan di cache bila kombinasi masukan ini
+    belum pernah dibuat. File dari cache dibuka di sini agar evict() worker lain tidak menghapusnya sebelum dikirim.
+    """
+    template = certificate_template_path()
+    renderer_version = f"{CERTIFICATE_RENDERER_VERSION}-{current_app.config['CERTIFICATE_PDF_MODE']}"
+    key = certificate_key(template_hash=certificate_template_digest(template),
+                          renderer_version=renderer_version, **inputs)
+    cache = current_app.extensions['certificate_cache']
+    handle = cache.open(key)
+    if handle is None:
+        pdf_buffer = build_certificate_pdf(
+            background_path=template,
+            student_name=inputs['student_name'],
+            instructor_name=inputs['instructor_name'],
+            material_type=inputs['material_type'],
+            course_title=inputs['course_title'],
+            issued_date=inputs['issued_date'],
+        )
+        cache.put(key, pdf_buffer.getvalue())
+        pdf_buffer.seek(0)
+        handle = pdf_buffer
+    return handle
+
+def pregenerate_certificate(user_id, course_id):
+    """Render sertifikat siswa yang sudah memenuhi syarat ke cache; True bila tersedia, None bila belum memenuhi syarat."""
+    progress = EnrollmentProgress.query.filter_by(user_id=user_id, course_id=course_id).first()
+    course = (db.session.query(Course.id, Course.title, Course.material_type, Course.has_exercise,
+                               Course.passing_grade, User.name.label('instructor_name'))
+              .outerjoin(User, User.id == Course.instructor_id).filter(Course.id == course_id).first())
+    student_name = db.session.query(User.name).filter(User.id == user_id).scalar()
+    if progress is None or course is None or student_name is None:
+        return None
+    if certificate_block_reason(course, progress) is not None or progress.certificate_issued_at is None:
+        return None
+    if not certificate_template_path().exists() or load_pillow() is None:
+        return None
+    with render_certificate(certificate_render_inputs(
+            student_id=user_id, student_name=student_name, course_id=course_id, course_title=course.title,
+            material_type=course.material_type, instructor_name=course.instructor_name,
+            issued_at=progress.certificate_issued_at)):
+        return True
+
+def schedule_certificate_render(user_id, course_id):
+    """Jalankan pregenerate_certificate() di thread pool worker ini (dipanggil setelah commit)."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    app = current_app._get_current_object()
+    if not app.config['CERTIFICATE_PREGENERATE']:
+        return
+    state = app.extensions['certificate_render']
+    with state['lock']:
+        # Dibuat saat pertama dipakai, setelah fork worker Gunicorn
+        if state['executor'] is None:
+            state['executor'] = ThreadPoolExecutor(max_workers=max(app.config['CERTIFICATE_RENDER_WORKERS'], 1),
+                                                   thread_name_prefix='certificate-render')
+        executor = state['executor']
+
+    def render():
+        with app.app_context():
+            try:
+                pregenerate_certificate(user_id, course_id)
+            except Exception:
+                app.logger.exception('Gagal membuat sertifikat di background (user %s, kursus %s)', user_id, course_id)
+
+    executor.submit(render)
+
+# ---------- Embed video materi ----------
+
+def backfill_lesson_embeds(*, recompute=False, batch_size=500):
+    """Isi embed_type/embed_provider/embed_url materi lama; kembalikan jumlah materi yang diperbarui.
+
+    Tampilan tidak berubah (materi lama sudah di-parse saat dibaca), jadi content_version tidak dinaikkan.
+    """
+    query = Lesson.query.filter(Lesson.video_url.isnot(None), Lesson.video_url != '')
+    if not recompute:
+        query = query.filter(Lesson.embed_type.is_(None))
+    updated = 0
+    last_id = 0
+    while True:
+        lessons = query.filter(Lesson.id > last_id).order_by(Lesson.id).limit(batch_size).all()
+        if not lessons:
+            break
+        for lesson in lessons:
+            before = (lesson.embed_type, lesson.embed_provider, lesson.embed_url)
+            lesson.update_embed()
+            if (lesson.embed_type, lesson.embed_provider, lesson.embed_url) != before:
+                updated += 1
+        last_id = lessons[-1].id
+        db.session.commit()
+        db.session.expunge_all()
+    return updated
+
+@click.command('backfill-lesson-embeds')
+@click.option('--recompute', is_flag=True, help='Hitung ulang semua materi, bukan hanya yang belum terisi.')
+@with_appcontext
+def backfill_lesson_embeds_command(recompute):
+    """Simpan metadata embed video (tipe, provider, URL embed) pada materi yang sudah ada."""
+    updated = backfill_lesson_embeds(recompute=recompute)
+    click.echo(f'{updated} materi diperbarui.')
+
+# ---------- Aset statis (fingerprint + precompressed) ----------
+
+def load_asset_manifest(app):
+    """Muat manifest aset ke app.extensions['asset_manifest'] (dipanggil saat startup dan setelah build)."""
+    manifest = load_manifest(app.config['ASSET_MANIFEST'])
+    app.extensions['asset_manifest'] = {
+        'assets': manifest['assets'],
+        'encodings': manifest['encodings'],
+        'files': frozenset(manifest['assets'].values()),
+    }
+
+def fingerprint_static_url(endpoint, values):
+    """url_defaults: url_for('static', filename='styles.css') -> /static/dist/styles.<hash>.css bila sudah di-build."""
+    if endpoint != 'static':
+        return
+    fingerprinted = current_app.extensions['asset_manifest']['assets'].get(values.get('filename'))
+    if fingerprinted:
+        values['filename'] = fingerprinted
+
+def serve_static(filename):
+    """Pengganti view 'static': aset ber-hash disajikan immutable, memakai varian .br/.gz bila klien menerimanya."""
+    manifest = current_app.extensions['asset_manifest']
+    if filename not in manifest['files']:
+        return current_app.send_static_file(filename)
+    max_age = current_app.config['ASSET_MAX_AGE']
+    available = manifest['encodings'].get(filename, ())
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = None
+    for encoding, suffix in ENCODINGS:
+        if encoding in available and request.accept_encodings[encoding]:
+            response = send_from_directory(current_app.static_folder, filename + suffix,
+                                           mimetype=mimetype, max_age=max_age)
+            response.headers['Content-Encoding'] = encoding
+            break
+    if response is None:
+        response = send_from_directory(current_app.static_folder, filename, mimetype=mimetype, max_age=max_age)
+    if available:
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Tulis salinan aset statis ber-hash beserta varian gzip/brotli dan manifest-nya."""
+    app = current_app._get_current_object()
+    manifest = build_assets(app.static_folder, Path(app.config['ASSET_MANIFEST']).parent.name)
+    load_asset_manifest(app)
+    click.echo(f"{len(manifest['assets'])} aset ditulis, {len(manifest['encodings'])} dengan varian terkompresi.")
+    if not manifest['brotli']:
+        click.echo('Paket brotli tidak terpasang; hanya varian gzip yang dibuat.')
 
 def _is_allowed_image(filename):
     if not filename or '.' not in filename:
@@ -776,6 +1631,101 @@ def save_course_thumbnail(file_storage):
     relative_path = Path('uploads') / 'thumbnails' / sanitized
     return str(relative_path).replace('\\', '/')
 
+def generate_image_variants(relative_path, widths):
+    """Tulis turunan gambar upload lokal; kembalikan nilai kolom *_variants.
+
+    None bila tidak ada file lokal (kosong atau URL), '' bila gambar gagal diproses.
+    """
+    if not relative_path or relative_path.startswith('http'):
+        return None
+    try:
+        return format_variants(write_derivatives(current_app.static_folder, relative_path, widths))
+    except Exception as exc:
+        current_app.logger.warning('Gagal membuat turunan gambar %s: %s', relative_path, exc)
+        return ''
+
+def image_sources(relative_path, variants):
+    """srcset WebP/JPEG dan src fallback untuk template; None bila gambar belum punya turunan."""
+    widths = parse_variants(variants)
+    if not widths or not relative_path or relative_path.startswith('http'):
+        return None
+    def srcset(ext):
+        return ', '.join(f"{url_for('static', filename=derivative_path(relative_path, width, ext))} {width}w"
+                         for width in widths)
+    return {
+        'webp': srcset('webp'),
+        'jpeg': srcset('jpg'),
+        'src': url_for('static', filename=derivative_path(relative_path, widths[0], 'jpg')),
+        'width': widths[0],
+    }
+
+def backfill_image_variants(*, recompute=False, workers=None, batch_size=200):
+    """Buat turunan thumbnail kursus dan pratinjau sertifikat gambar untuk upload lama.
+
+    Resize/encode gambar (CPU-bound) berjalan di process pool; database hanya disentuh
+    proses utama, per batch. Mengembalikan (jumlah diproses, jumlah gagal).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    static_dir = current_app.static_folder
+    course_query = db.session.query(Course.id, Course.thumbnail_path).filter(
+        Course.thumbnail_path.isnot(None), Course.thumbnail_path != '', ~Course.thumbnail_path.startswith('http'))
+    user_query = db.session.query(User.id, User.certificate_data).filter(
+        User.certificate_type == 'image', User.certificate_data.isnot(None), ~User.certificate_data.startswith('http'))
+    if not recompute:
+        course_query = course_query.filter(Course.thumbnail_variants.is_(None))
+        user_query = user_query.filter(User.certificate_variants.is_(None))
+    jobs = [(('course', course_id), static_dir, path, THUMBNAIL_WIDTHS) for course_id, path in course_query]
+    jobs += [(('user', user_id), static_dir, path, CERTIFICATE_PREVIEW_WIDTHS) for user_id, path in user_query]
+    if not jobs:
+        return 0, 0
+
+    processed = failed = 0
+    pending = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for key, variants, error in executor.map(render_derivatives_job, jobs, chunksize=4):
+            if error:
+                failed += 1
+                current_app.logger.warning('Gagal membuat turunan gambar %s #%s: %s', key[0], key[1], error)
+            pending.append((key, variants))
+            processed += 1
+            if len(pending) >= batch_size:
+                _store_image_variants(pending)
+                pending = []
+    _store_image_variants(pending)
+    return processed, failed
+
+def _store_image_variants(results):
+    """Simpan satu batch hasil backfill; versi kursus terkait dinaikkan agar cache dan ETag ikut berganti."""
+    if not results:
+        return
+    course_ids = set()
+    instructor_ids = []
+    for (kind, row_id), variants in results:
+        if kind == 'course':
+            Course.query.filter(Course.id == row_id).update({Course.thumbnail_variants: variants},
+                                                            synchronize_session=False)
+            course_ids.add(row_id)
+        else:
+            User.query.filter(User.id == row_id).update({User.certificate_variants: variants},
+                                                        synchronize_session=False)
+            instructor_ids.append(row_id)
+    if instructor_ids:
+        course_ids.update(course_id for (course_id,) in
+                          db.session.query(Course.id).filter(Course.instructor_id.in_(instructor_ids)))
+    bump_course_version(*course_ids)
+    db.session.commit()
+    invalidate_homepage_cache()
+
+@click.command('backfill-image-variants')
+@click.option('--recompute', is_flag=True, help='Buat ulang semua turunan, bukan hanya yang belum ada.')
+@click.option('--workers', type=int, default=None, help='Jumlah proses (default: jumlah CPU).')
+@with_appcontext
+def backfill_image_variants_command(recompute, workers):
+    """Buat turunan thumbnail kursus (WebP/JPEG beberapa lebar) dan pratinjau sertifikat untuk upload lama."""
+    processed, failed = backfill_image_variants(recompute=recompute, workers=workers)
+    click.echo(f'{processed} gambar diproses, {failed} gagal.')
+
 def is_valid_thumbnail_url(url):
     if not url:
         return False
@@ -786,13 +1736,14 @@ def delete_course_thumbnail(thumbnail_path):
     if not thumbnail_path or thumbnail_path.startswith('http'):
         return
     try:
-        base = Path(app.static_folder).resolve()
+        base = Path(current_app.static_folder).resolve()
         target = (base / thumbnail_path).resolve()
         if base in target.parents or target == base:
             if target.is_file():
                 target.unlink()
+            delete_derivatives(base, thumbnail_path)
     except Exception as exc:
-        app.logger.warning('Failed to delete thumbnail %s: %s', thumbnail_path, exc)
+        current_app.logger.warning('Failed to delete thumbnail %s: %s', thumbnail_path, exc)
 
 def resolve_thumbnail_input(thumbnail_file, thumbnail_url, existing_path=None, mode=None):
     mode = (mode or '').lower()
@@ -864,13 +1815,14 @@ def delete_certificate_file(certificate_path):
     if not certificate_path or certificate_path.startswith('http'):
         return
     try:
-        base = Path(app.static_folder).resolve()
+        base = Path(current_app.static_folder).resolve()
         target = (base / certificate_path).resolve()
         if base in target.parents or target == base:
             if target.is_file():
                 target.unlink()
+            delete_derivatives(base, certificate_path)
     except Exception as exc:
-        app.logger.warning('Failed to delete certificate %s: %s', certificate_path, exc)
+        current_app.logger.warning('Failed to delete certificate %s: %s', certificate_path, exc)
 
 def is_valid_url(url):
     return is_valid_thumbnail_url(url)
@@ -907,31 +1859,868 @@ def prepare_video_embed(video_url):
         return {'type': 'video', 'provider': 'file', 'embed_url': url}
     return {'type': 'iframe', 'provider': 'external', 'embed_url': url}
 
+class UserSnapshot(UserMixin):
+    """Representasi ringan current_user yang dibangun dari cache identitas.
+
+    Hanya menyimpan field yang dibaca hampir di setiap halaman (id, nama, role,
+    status verifikasi). Atribut lain (email, keahlian, sertifikat, ...) memicu
+    pemuatan entitas User lengkap satu kali per request.
+    """
+
+    def __init__(self, data):
+        self.__dict__.update(data)
+        self._entity = None
+
+    @staticmethod
+    def snapshot_data(user):
+        return {
+            'id': user.id,
+            'name': user.name,
+            'role': user.role,
+            'is_verified': user.is_verified,
+        }
+
+    def entity(self):
+        """Entitas User dari database (dimuat saat pertama kali dibutuhkan)."""
+        if self._entity is None:
+            self._entity = db.session.get(User, self.id)
+        return self._entity
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        entity = self.entity()
+        if entity is None:
+            raise AttributeError(name)
+        return getattr(entity, name)
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.id} {self.role}>'
+
+def get_user_cache():
+    return current_app.extensions['user_cache']
+
+def invalidate_user_cache(user_id):
+    """Buang snapshot user dari cache worker ini setelah datanya berubah."""
+    get_user_cache().delete(int(user_id))
+
+def get_current_user_entity():
+    """Entitas User (ORM) untuk current_user, dipakai oleh route yang mengubah data user."""
+    user = current_user._get_current_object()
+    if isinstance(user, UserSnapshot):
+        return user.entity()
+    return user
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    cache = get_user_cache()
+    data = cache.get(user_id)
+    if data is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        data = UserSnapshot.snapshot_data(user)
+        cache.set(user_id, data)
+        snapshot = UserSnapshot(data)
+        snapshot._entity = user
+        return snapshot
+    return UserSnapshot(data)
+
+# ---------- Pencarian kursus ----------
+
+def _course_search_document(course, lesson_titles):
+    return {
+        'id': course.id,
+        'title': course.title,
+        'description': course.description,
+        'material_type': course.material_type,
+        'lessons': lesson_titles,
+        'instructor_id': course.instructor_id,
+        'is_premium': course.is_premium,
+    }
+
+_COURSE_SEARCH_COLUMNS = (Course.id, Course.title, Course.description, Course.material_type,
+                          Course.instructor_id, Course.is_premium)
+
+def _iter_course_search_documents():
+    lesson_titles = {}
+    for course_id, title in db.session.query(Lesson.course_id, Lesson.title).order_by(Lesson.course_id, Lesson.id).yield_per(5000):
+        lesson_titles.setdefault(course_id, []).append(title)
+    rows = db.session.query(*_COURSE_SEARCH_COLUMNS).yield_per(5000)
+    for row in rows:
+        yield _course_search_document(row, lesson_titles.pop(row.id, []))
+
+def rebuild_course_search_index():
+    started = time.perf_counter()
+    index = current_app.extensions['course_search']['index']
+    changed = index.build(_iter_course_search_documents())
+    # Kursus yang disinkronkan selama build mungkin tertimpa snapshot lama; baca ulang dari database
+    for course_id in changed:
+        sync_course_search_index(course_id)
+    current_app.logger.info('Indeks pencarian kursus dibangun: %d kursus dalam %.0f ms',
+                            len(index), (time.perf_counter() - started) * 1000)
+    return index
+
+def _schedule_course_search_refresh(state):
+    # Worker lain tidak melihat pembaruan inkremental worker ini, jadi indeks
+    # dibangun ulang di background secara berkala; request tetap memakai indeks lama.
+    if not state['build_lock'].acquire(blocking=False):
+        return
+    app = current_app._get_current_object()
+
+    def refresh():
+        try:
+            with app.app_context():
+                rebuild_course_search_index()
+        except Exception:
+            app.logger.exception('Gagal membangun ulang indeks pencarian kursus')
+        finally:
+            state['build_lock'].release()
+
+    threading.Thread(target=refresh, name='course-search-refresh', daemon=True).start()
+
+def get_course_search_index():
+    """Indeks pencarian kursus milik worker ini; dibangun saat pertama kali dibutuhkan."""
+    state = current_app.extensions['course_search']
+    index = state['index']
+    if index.built_at is None:
+        with state['build_lock']:
+            if index.built_at is None:
+                rebuild_course_search_index()
+    else:
+        refresh_after = current_app.config.get('SEARCH_INDEX_REFRESH', 0)
+        if refresh_after and time.monotonic() - index.built_at > refresh_after:
+            _schedule_course_search_refresh(state)
+    return index
+
+def sync_course_search_index(course_id):
+    """Perbarui satu kursus di indeks setelah kursus/materinya berubah (dipanggil setelah commit)."""
+    index = current_app.extensions['course_search']['index']
+    if index.built_at is None:
+        return
+    course = db.session.query(*_COURSE_SEARCH_COLUMNS).filter(Course.id == course_id).first()
+    if course is None:
+        index.remove_document(course_id)
+        return
+    lesson_titles = [title for (title,) in db.session.query(Lesson.title).filter_by(course_id=course_id).order_by(Lesson.id)]
+    index.add_document(_course_search_document(course, lesson_titles))
+
+def search_course_ids(search, *, limit=None, **filters):
+    """Cari kursus dan kembalikan list course_id, paling relevan lebih dulu."""
+    max_results = current_app.config.get('SEARCH_RESULT_LIMIT')
+    if max_results:
+        limit = min(limit, max_results) if limit is not None else max_results
+    ranked = get_course_search_index().search(search, limit=limit, **filters)
+    return [course_id for course_id, _score in ranked]
+
+# ---------- Beranda ----------
+
+def _course_card(course):
+    """View model kartu kursus di beranda (tanpa objek ORM agar aman di-cache)."""
+    return {
+        'id': course.id,
+        'title': course.title,
+        'thumbnail_path': course.thumbnail_path or '',
+        'thumbnail_variants': course.thumbnail_variants,
+        'is_premium': bool(course.is_premium),
+        'price': course.price or 0,
+        'instructor': {'name': course.instructor.name if course.instructor else ''},
+    }
+
+def get_homepage_sections():
+    """Blok kursus terpopuler dan terbaru, di-cache per worker selama HOMEPAGE_CACHE_TTL detik."""
+    cache = current_app.extensions['homepage_cache']
+    sections = cache.get('sections')
+    if sections is None:
+        popular_courses = (Course.query.options(joinedload(Course.instructor))
+                           .order_by(Course.enrollment_count.desc(), Course.id.desc()).limit(4).all())
+        newest_courses = Course.query.options(joinedload(Course.instructor)).order_by(Course.id.desc()).limit(4).all()
+        sections = {
+            'popular_courses': [_course_card(course) for course in popular_courses],
+            'newest_courses': [_course_card(course) for course in newest_courses],
+        }
+        cache.set('sections', sections)
+    return sections
+
+def invalidate_homepage_cache():
+    current_app.extensions['homepage_cache'].clear()
+
+def notify_course_changed(course_id):
+    """Segarkan turunan data kursus (indeks pencarian, cache beranda) setelah commit."""
+    sync_course_search_index(course_id)
+    invalidate_homepage_cache()
 
-# ---------- Init DB on first requests ----------
-@app.before_request
-def create_tables():
-    db.create_all()
+# ---------- Pagination (keyset) ----------
+
+def get_page_size():
+    return max(int(current_app.config.get('COURSES_PAGE_SIZE', 12)), 1)
+
+def encode_cursor(*values):
+    """Cursor halaman berikutnya: nilai kunci baris terakhir, dikemas base64 agar aman di URL."""
+    payload = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_cursor(token, kind):
+    """Kembalikan list nilai kunci dari cursor bertipe kind, atau None bila kosong/tidak valid."""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or not values or values[0] != kind:
+        return None
+    return values[1:]
+
+def select_course_page(filters, *, search, cursor, page_size, material_type=None, is_premium=None, instructor_id=None):
+    """Tahap ringan katalog: ([(course_id, content_version)] halaman ini, cursor berikutnya).
+
+    Dengan search, urutan mengikuti relevansi indeks pencarian dan cursor menyimpan posisi
+    di daftar peringkat; tanpa search, keyset pagination dari kursus terbaru.
+    """
+    filters = list(filters)
+    next_cursor = None
+    if search:
+        offset = (decode_cursor(cursor, 'rank') or [0])[0]
+        offset = offset if isinstance(offset, int) and offset >= 0 else 0
+        ranked_ids = search_course_ids(search, limit=offset + page_size + 1, material_type=material_type or None,
+                                       is_premium=is_premium, instructor_id=instructor_id)
+        page_ids = ranked_ids[offset:offset + page_size]
+        if len(ranked_ids) > offset + page_size:
+            next_cursor = encode_cursor('rank', offset + page_size)
+        versions = dict(db.session.query(Course.id, Course.content_version)
+                        .filter(Course.id.in_(page_ids), *filters)) if page_ids else {}
+        return [(course_id, versions[course_id]) for course_id in page_ids if course_id in versions], next_cursor
+    after = decode_cursor(cursor, 'id')
+    if after and isinstance(after[0], int):
+        filters.append(Course.id < after[0])
+    page_versions = (db.session.query(Course.id, Course.content_version).filter(*filters)
+                     .order_by(Course.id.desc()).limit(page_size + 1).all())
+    if len(page_versions) > page_size:
+        page_versions = page_versions[:page_size]
+        next_cursor = encode_cursor('id', page_versions[-1][0])
+    return page_versions, next_cursor
+
+# ---------- Read model daftar (kartu & tabel) ----------
+# Halaman daftar hanya memilih kolom yang dirender dan memetakan barisnya ke namedtuple
+# (slotted, immutable) alih-alih menghidrasi objek ORM lengkap ke identity map sesi.
+
+# Deskripsi di kartu dipotong di SQL; teks lengkapnya ada di halaman detail
+CARD_DESCRIPTION_CHARS = 300
+
+InstructorCard = namedtuple('InstructorCard', ['name', 'expertise', 'institution', 'teaching_experience',
+                                               'certificate_type', 'certificate_data', 'certificate_variants'])
+CourseCard = namedtuple('CourseCard', ['id', 'title', 'description', 'is_premium', 'price', 'material_type',
+                                       'thumbnail_path', 'thumbnail_variants', 'lesson_count', 'question_count',
+                                       'has_exercise', 'passing_grade', 'instructor'])
+CartCourse = namedtuple('CartCourse', ['id', 'title', 'price', 'thumbnail_path', 'thumbnail_variants'])
+StudentRow = namedtuple('StudentRow', ['id', 'name', 'email'])
+InstructorName = namedtuple('InstructorName', ['name'])
+CourseTitle = namedtuple('CourseTitle', ['id', 'title', 'instructor'])
+PaymentRow = namedtuple('PaymentRow', ['order_id', 'gross_amount', 'payment_type', 'transaction_status', 'created_at',
+                                       'course', 'cart_courses', 'course_count'])
+
+_COURSE_CARD_COLUMNS = (Course.id, Course.title, func.substr(Course.description, 1, CARD_DESCRIPTION_CHARS + 1),
+                        Course.is_premium, Course.price, Course.material_type, Course.thumbnail_path,
+                        Course.thumbnail_variants, Course.lesson_count, Course.question_count, Course.has_exercise,
+                        Course.passing_grade)
+_INSTRUCTOR_CARD_COLUMNS = (User.name, User.expertise, User.institution, User.teaching_experience,
+                            User.certificate_type, User.certificate_data, User.certificate_variants)
+
+def card_excerpt(text, limit=CARD_DESCRIPTION_CHARS):
+    if not text or len(text) <= limit:
+        return text or ''
+    return text[:limit].rstrip() + '…'
+
+def course_card_query():
+    """SELECT berkolom untuk kartu kursus beserta instrukturnya; tambahkan filter/urutan, jalankan dengan load_course_cards()."""
+    return db.select(*_COURSE_CARD_COLUMNS, *_INSTRUCTOR_CARD_COLUMNS).select_from(Course).outerjoin(
+        User, User.id == Course.instructor_id)
+
+def load_course_cards(statement):
+    split = len(_COURSE_CARD_COLUMNS)
+    cards = []
+    for row in db.session.execute(statement):
+        (course_id, title, description, is_premium, price, material_type, thumbnail_path, thumbnail_variants,
+         lesson_count, question_count, has_exercise, passing_grade) = row[:split]
+        cards.append(CourseCard(
+            course_id, title, card_excerpt(description), bool(is_premium), price or 0, material_type,
+            thumbnail_path or '', thumbnail_variants, lesson_count, question_count, bool(has_exercise),
+            passing_grade, InstructorCard._make(row[split:]),
+        ))
+    return cards
+
+def load_course_titles(course_ids):
+    """{course_id: CourseTitle} (judul + nama instruktur) untuk riwayat pembayaran dan sejenisnya."""
+    if not course_ids:
+        return {}
+    rows = db.session.execute(db.select(Course.id, Course.title, User.name).select_from(Course)
+                              .outerjoin(User, User.id == Course.instructor_id).where(Course.id.in_(course_ids)))
+    return {course_id: CourseTitle(course_id, title, InstructorName(name) if name is not None else None)
+            for course_id, title, name in rows}
+
+# ---------- Conditional GET (ETag) ----------
+
+def bump_course_version(*course_ids):
+    """Naikkan content_version kursus agar ETag halamannya berubah.
+
+    Dipanggil sebelum commit setiap perubahan kursus, materi (termasuk capaian dan
+    skill), soal kuis, pengaturan kuis, latihan, atau profil pengajarnya.
+    """
+    if course_ids:
+        Course.query.filter(Course.id.in_(course_ids)).update(
+            {Course.content_version: Course.content_version + 1, Course.updated_at: datetime.utcnow()},
+            synchronize_session=False)
+
+def make_etag(*parts):
+    """ETag kuat dari komponen yang menentukan isi halaman."""
+    payload = json.dumps(parts, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def viewer_fingerprint():
+    """Bagian ETag untuk navigasi yang bergantung pada user (base.html)."""
+    if not current_user.is_authenticated:
+        return None
+    return [current_user.id, current_user.role, current_user.name, current_user.is_verified]
+
+def not_modified(etag, last_modified=None, *, shared=False):
+    """Catat validator respons ini; kembalikan respons 304 bila If-None-Match klien masih cocok.
+
+    Halaman yang membawa flash message tidak diberi ETag karena pesannya hanya tampil sekali.
+    shared=True menandai respons yang isinya sama untuk semua user (boleh disimpan proxy) dan
+    tidak merender flash message.
+    """
+    if not shared and session.get('_flashes'):
+        return None
+    g.conditional_validators = (etag, last_modified, shared)
+    if request.if_none_match.contains_weak(etag):
+        return current_app.response_class(status=304)
+    return None
+
+def apply_conditional_headers(response):
+    """after_request: pasang ETag, Last-Modified, dan Cache-Control untuk respons yang punya validator."""
+    validators = g.pop('conditional_validators', None)
+    if validators is None or request.method not in ('GET', 'HEAD') or response.status_code not in (200, 304):
+        return response
+    etag, last_modified, shared = validators
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    if not shared:
+        response.vary.add('Cookie')
+    if session.modified or (current_user.is_authenticated and not shared):
+        # Varian per user: browser wajib revalidasi, proxy tidak boleh menyimpan
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = 0
+        response.cache_control.must_revalidate = True
+        response.cache_control.s_maxage = current_app.config['PUBLIC_PAGE_SMAXAGE']
+    return response
+
+# ---------- Profil query per request ----------
+
+def _current_query_stats():
+    return g.get('query_stats') if has_app_context() else None
+
+def start_query_profile():
+    """before_request: mulai menghitung query request ini (setelah pemeriksaan skema)."""
+    if current_app.config['QUERY_PROFILING']:
+        g.query_stats = QueryStats()
+
+def finish_query_profile(response):
+    """after_request: peringatan N+1 dan pengecekan anggaran query endpoint (log server), plus header
+    Server-Timing hanya di debug/TESTING atau bila QUERY_SERVER_TIMING diaktifkan."""
+    stats = g.get('query_stats')
+    if stats is None:
+        return response
+    config = current_app.config
+    endpoint = request.endpoint or 'unknown'
+    if config['QUERY_SERVER_TIMING'] or current_app.debug or config['TESTING']:
+        response.headers.add('Server-Timing', f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"')
+    for statement, count in stats.repeated(config['QUERY_REPEAT_THRESHOLD']):
+        current_app.logger.warning('Kemungkinan N+1 di %s: statement dijalankan %dx: %s',
+                                   endpoint, count, statement[:300])
+    budget = config['QUERY_BUDGETS'].get(endpoint, config['QUERY_BUDGET_DEFAULT'])
+    if stats.count > budget:
+        message = (f'{endpoint} menjalankan {stats.count} query ({stats.total_ms:.1f} ms), '
+                   f'anggaran {budget} ({request.method} {request.path})')
+        strict = config['QUERY_BUDGET_RAISE']
+        if config['TESTING'] if strict is None else strict:
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning('Anggaran query terlampaui: %s', message)
+    return response
+
+# ---------- Detail kursus (view model) ----------
+
+class ReadModel:
+    """Salinan data baris (tanpa sesi ORM) yang aman di-cache dan dibagi antar request."""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    def __repr__(self):
+        return f'<ReadModel {self.__dict__.get("id")}>'
+
+def _load_course_public_view(course_id):
+    course = (Course.query.options(joinedload(Course.instructor), undefer(Course.description))
+              .filter(Course.id == course_id).first())
+    if course is None:
+        return None
+    lessons = [
+        ReadModel(id=lesson.id, title=lesson.title, content=lesson.content, video_url=lesson.video_url,
+                  meeting_url=lesson.meeting_url, start_date=lesson.start_date,
+                  duration_minutes=lesson.duration_minutes, embed=lesson.embed)
+        for lesson in Lesson.query.options(undefer(Lesson.content)).filter_by(course_id=course_id).order_by(Lesson.id)
+    ]
+    exercise = None
+    row = Exercise.query.options(undefer(Exercise.description)).filter_by(course_id=course_id).first()
+    if row is not None:
+        exercise = ReadModel(id=row.id, name=row.name, description=row.description, exercise_url=row.exercise_url,
+                                 start_date=row.start_date, end_date=row.end_date)
+    # Tanggal yang mengubah tampilan saat terlewati; fase jadwal ikut membentuk ETag
+    schedule = [lesson.start_date for lesson in lessons if lesson.start_date]
+    schedule += [value for value in (course.quiz_start_date, course.quiz_end_date) if value]
+    if exercise is not None:
+        schedule += [value for value in (exercise.start_date, exercise.end_date) if value]
+    return {
+        'version': course.content_version,
+        'course': ReadModel(
+            id=course.id, title=course.title, description=course.description, is_premium=bool(course.is_premium),
+            price=course.price or 0, instructor_id=course.instructor_id,
+            instructor_name=course.instructor.name if course.instructor else '',
+            material_type=course.material_type, thumbnail_path=course.thumbnail_path or '',
+            thumbnail_variants=course.thumbnail_variants,
+            quiz_start_date=course.quiz_start_date, quiz_end_date=course.quiz_end_date,
+            passing_grade=course.passing_grade, attempt_limit=course.attempt_limit or 0,
+            lesson_count=len(lessons), question_count=course.question_count, has_exercise=exercise is not None,
+        ),
+        'lessons': lessons,
+        'exercise': exercise,
+        'schedule': sorted(schedule),
+    }
+
+def get_course_public_view(course_id, version):
+    """Bagian publik halaman detail kursus, di-cache per (kursus, content_version) di setiap worker.
+
+    Berisi kursus, nama pengajar, materi beserta embed videonya, jumlah soal, dan latihan.
+    Versi yang berubah otomatis membuat entri baru; entri lama tersingkir oleh LRU.
+    """
+    cache = current_app.extensions['course_view_cache']
+    view = cache.get((course_id, version))
+    if view is None:
+        view = _load_course_public_view(course_id)
+        if view is not None:
+            cache.set((course_id, view['version']), view)
+    return view
+
+def load_course_viewer_overlay(course_id):
+    """Versi kursus plus state user yang login dalam satu query.
+
+    Mengembalikan dict berisi content_version, updated_at, enrollment, progress
+    (EnrollmentProgress), attempt terakhir dan attempt_count (dari attempt_summary),
+    exercise_submission, dan is_in_cart;
+    None bila kursus tidak ada. Pengunjung anonim hanya membaca versi kursus.
+    """
+    if not current_user.is_authenticated:
+        row = db.session.query(Course.content_version, Course.updated_at).filter(Course.id == course_id).first()
+        return None if row is None else {'content_version': row.content_version, 'updated_at': row.updated_at}
+
+    user_id = current_user.id
+
+    def own(model):
+        return and_(model.user_id == user_id, model.course_id == course_id)
+
+    in_cart = db.select(func.count(CartItem.id)).where(own(CartItem)).scalar_subquery()
+    row = db.session.execute(
+        db.select(
+            Course.content_version, Course.updated_at,
+            Enrollment.id.label('enrollment_id'), Enrollment.unlocked,
+            EnrollmentProgress.id.label('progress_id'), EnrollmentProgress.lessons_completed,
+            EnrollmentProgress.quiz_attempts, EnrollmentProgress.last_quiz_score, EnrollmentProgress.best_quiz_score,
+            EnrollmentProgress.exercise_submitted, EnrollmentProgress.exercise_score,
+            AttemptSummary.attempt_count, AttemptSummary.last_score, AttemptSummary.last_passed,
+            AttemptSummary.last_attempt_at,
+            ExerciseSubmission.id.label('submission_id'), ExerciseSubmission.submission_url,
+            ExerciseSubmission.score.label('submission_score'),
+            in_cart.label('in_cart'),
+        )
+        .select_from(Course)
+        .outerjoin(Enrollment, and_(Enrollment.course_id == Course.id, Enrollment.user_id == user_id))
+        .outerjoin(EnrollmentProgress, and_(EnrollmentProgress.course_id == Course.id, EnrollmentProgress.user_id == user_id))
+        .outerjoin(AttemptSummary, and_(AttemptSummary.course_id == Course.id, AttemptSummary.user_id == user_id))
+        .outerjoin(ExerciseSubmission, and_(ExerciseSubmission.course_id == Course.id, ExerciseSubmission.user_id == user_id))
+        .where(Course.id == course_id)
+        .limit(1)
+    ).first()
+    if row is None:
+        return None
+    return {
+        'content_version': row.content_version,
+        'updated_at': row.updated_at,
+        'enrollment': None if row.enrollment_id is None else ReadModel(id=row.enrollment_id, unlocked=bool(row.unlocked)),
+        'progress': None if row.progress_id is None else ReadModel(
+            id=row.progress_id, lessons_completed=row.lessons_completed, quiz_attempts=row.quiz_attempts,
+            last_quiz_score=row.last_quiz_score, best_quiz_score=row.best_quiz_score,
+            exercise_submitted=bool(row.exercise_submitted), exercise_score=row.exercise_score),
+        'attempt_count': row.attempt_count or 0,
+        'attempt': attempt_read_model(row),
+        'exercise_submission': None if row.submission_id is None else ReadModel(
+            id=row.submission_id, submission_url=row.submission_url, score=row.submission_score),
+        'is_in_cart': bool(row.in_cart),
+    }
+
+def overlay_fingerprint(overlay):
+    """Bagian ETag dari state user pada kursus."""
+    if 'enrollment' not in overlay:
+        return None
+    return [
+        overlay['is_in_cart'],
+        overlay['attempt_count'],
+        None if overlay['enrollment'] is None else overlay['enrollment'].__dict__,
+        None if overlay['progress'] is None else overlay['progress'].__dict__,
+        None if overlay['attempt'] is None else overlay['attempt'].__dict__,
+        None if overlay['exercise_submission'] is None else overlay['exercise_submission'].__dict__,
+    ]
+
+# ---------- Silabus ----------
+
+def build_syllabus_document(course_id):
+    """Susun silabus kursus sebagai dict siap-JSON; jumlah query tetap, tidak bergantung jumlah materi.
+
+    URL video/meeting tidak disertakan (hanya formatnya) karena dokumen ini publik.
+    """
+    course = (Course.query.options(joinedload(Course.instructor), undefer(Course.description))
+              .filter(Course.id == course_id).first())
+    if course is None:
+        return None
+    lessons = []
+    lesson_map = {}
+    for lesson_id, title, duration_minutes, video_url, meeting_url in (
+            db.session.query(Lesson.id, Lesson.title, Lesson.duration_minutes, Lesson.video_url, Lesson.meeting_url)
+            .filter(Lesson.course_id == course_id).order_by(Lesson.id)):
+        lesson = {
+            'id': lesson_id,
+            'title': title,
+            'duration_minutes': duration_minutes,
+            'format': 'video' if video_url else 'meeting' if meeting_url else 'text',
+            'outcomes': [],
+            'skills': [],
+        }
+        lessons.append(lesson)
+        lesson_map[lesson_id] = lesson
+    # Capaian dan skill seluruh materi: satu query masing-masing, dikelompokkan di memori
+    for lesson_id, outcome_text in (db.session.query(LearningOutcome.lesson_id, LearningOutcome.outcome_text)
+                                    .join(Lesson, Lesson.id == LearningOutcome.lesson_id)
+                                    .filter(Lesson.course_id == course_id)
+                                    .order_by(LearningOutcome.lesson_id, LearningOutcome.order_index, LearningOutcome.id)):
+        lesson_map[lesson_id]['outcomes'].append(outcome_text)
+    for lesson_id, skill_text in (db.session.query(Skill.lesson_id, Skill.skill_text)
+                                  .join(Lesson, Lesson.id == Skill.lesson_id)
+                                  .filter(Lesson.course_id == course_id)
+                                  .order_by(Skill.lesson_id, Skill.order_index, Skill.id)):
+        lesson_map[lesson_id]['skills'].append(skill_text)
+    exercise = db.session.query(Exercise.name, Exercise.start_date, Exercise.end_date).filter(
+        Exercise.course_id == course_id).first()
+    return {
+        'version': course.content_version,
+        'course': {
+            'id': course.id,
+            'title': course.title,
+            'description': course.description or '',
+            'material_type': course.material_type,
+            'is_premium': bool(course.is_premium),
+            'instructor': course.instructor.name if course.instructor else '',
+        },
+        'lessons': lessons,
+        'quiz': {'question_count': course.question_count},
+        'exercise': None if exercise is None else {
+            'name': exercise.name,
+            'start_date': exercise.start_date.isoformat() if exercise.start_date else None,
+            'end_date': exercise.end_date.isoformat() if exercise.end_date else None,
+        },
+    }
+
+def get_syllabus_document(course_id, version):
+    """(json_text, dict) silabus, di-cache per (kursus, content_version) di setiap worker; None bila kursus tidak ada."""
+    cache = current_app.extensions['syllabus_cache']
+    entry = cache.get((course_id, version))
+    if entry is None:
+        document = build_syllabus_document(course_id)
+        if document is None:
+            return None
+        entry = (json.dumps(document, ensure_ascii=False, separators=(',', ':')), document)
+        cache.set((course_id, document['version']), entry)
+    return entry
+
+# ---------- Kuis (soal & kunci jawaban) ----------
+
+def build_quiz_payload(course_id):
+    """Soal dan pilihan kuis (tanpa penanda jawaban benar) sebagai dict siap-JSON, satu query join."""
+    rows = db.session.execute(
+        db.select(Course.content_version, Question.id, Question.text, Choice.id, Choice.text)
+        .select_from(Course)
+        .outerjoin(Question, Question.course_id == Course.id)
+        .outerjoin(Choice, Choice.question_id == Question.id)
+        .where(Course.id == course_id)
+        .order_by(Question.id, Choice.id)
+    ).all()
+    if not rows:
+        return None
+    questions = []
+    question = None
+    for _version, question_id, question_text, choice_id, choice_text in rows:
+        if question_id is None:
+            continue
+        if question is None or question['id'] != question_id:
+            question = {'id': question_id, 'text': question_text, 'choices': []}
+            questions.append(question)
+        if choice_id is not None:
+            question['choices'].append({'id': choice_id, 'text': choice_text})
+    return {'course_id': course_id, 'version': rows[0][0], 'questions': questions}
+
+def get_quiz_payload(course_id, version):
+    """(json_text, dict) soal kuis, di-cache per (kursus, content_version) di setiap worker; None bila kursus tidak ada.
+
+    Tambah/ubah/hapus soal menaikkan content_version, sehingga payload lama tidak terpakai lagi.
+    """
+    cache = current_app.extensions['quiz_payload_cache']
+    entry = cache.get((course_id, version))
+    if entry is None:
+        payload = build_quiz_payload(course_id)
+        if payload is None:
+            return None
+        entry = (json.dumps(payload, ensure_ascii=False, separators=(',', ':')), payload)
+        cache.set((course_id, payload['version']), entry)
+    return entry
+
+def quiz_access(course):
+    """(pesan penolakan atau None, sisa percobaan) kuis kursus untuk user yang login; sisa 0 = tidak dibatasi."""
+    enrollment = db.session.execute(
+        db.select(Enrollment.unlocked, AttemptSummary.attempt_count)
+        .select_from(Enrollment)
+        .outerjoin(AttemptSummary, and_(AttemptSummary.user_id == Enrollment.user_id,
+                                        AttemptSummary.course_id == Enrollment.course_id))
+        .where(Enrollment.user_id == current_user.id, Enrollment.course_id == course.id)
+        .limit(1)
+    ).first()
+    if enrollment is None or (course.is_premium and not enrollment.unlocked):
+        return 'Enroll and unlock first', 0
+    remaining_attempts = 0
+    attempt_limit = course.attempt_limit or 0
+    if current_user.role == 'student' and attempt_limit > 0:
+        attempt_count = enrollment.attempt_count or 0
+        remaining_attempts = attempt_limit - attempt_count
+        if attempt_count >= attempt_limit:
+            return f'Anda sudah mencapai batas maksimal percobaan ({attempt_limit}x).', 0
+    return None, remaining_attempts
+
+# Kunci jawaban {question_id: frozenset(id pilihan benar)}, urut id soal. Soal tanpa pilihan benar tetap
+# dihitung dalam total (sama seperti sebelumnya) tetapi tidak pernah bisa dijawab benar.
+# choices {question_id: frozenset(semua id pilihan)} dipakai untuk menyimpan jawaban per soal.
+QuizAnswerKey = namedtuple('QuizAnswerKey', ['version', 'correct', 'choices'])
+
+def _load_quiz_answer_key(course_id):
+    rows = db.session.execute(
+        db.select(Course.content_version, Question.id, Choice.id, Choice.is_correct)
+        .select_from(Course)
+        .outerjoin(Question, Question.course_id == Course.id)
+        .outerjoin(Choice, Choice.question_id == Question.id)
+        .where(Course.id == course_id)
+        .order_by(Question.id, Choice.id)
+    ).all()
+    if not rows:
+        return None
+    correct = {}
+    choices = {}
+    for _version, question_id, choice_id, is_correct in rows:
+        if question_id is None:
+            continue
+        correct_ids = correct.setdefault(question_id, set())
+        choice_ids = choices.setdefault(question_id, set())
+        if choice_id is not None:
+            choice_ids.add(choice_id)
+            if is_correct:
+                correct_ids.add(choice_id)
+    return QuizAnswerKey(rows[0][0], {question_id: frozenset(ids) for question_id, ids in correct.items()},
+                         {question_id: frozenset(ids) for question_id, ids in choices.items()})
+
+def get_quiz_answer_key(course_id, version):
+    """Kunci jawaban kuis, dibangun dengan satu query dan di-cache per (kursus, content_version) di setiap worker.
+
+    Perubahan soal/pilihan selalu memanggil bump_course_version(), jadi kunci lama tidak terpakai lagi.
+    """
+    cache = current_app.extensions['quiz_answer_keys']
+    answer_key = cache.get((course_id, version))
+    if answer_key is None:
+        answer_key = _load_quiz_answer_key(course_id)
+        if answer_key is not None:
+            cache.set((course_id, answer_key.version), answer_key)
+    return answer_key
+
+def grade_quiz(answer_key, answers):
+    """Nilai jawaban (form q_<question_id> -> id pilihan) dalam satu lintasan di memori.
+
+    Jawaban kosong, bukan angka, atau id pilihan milik soal lain dianggap salah.
+    Mengembalikan (jumlah benar, jumlah soal, skor 0-100, respons), dengan respons berisi id pilihan
+    yang dipilih per soal (urut id soal), atau -id soal bila soal tidak dijawab dengan pilihan yang sah.
+    """
+    correct = 0
+    responses = []
+    for question_id, choice_ids in answer_key.correct.items():
+        chosen = answers.get(f'q_{question_id}')
+        chosen_id = None
+        if chosen and chosen.isascii() and chosen.isdigit():
+            try:
+                chosen_id = int(chosen)
+            except ValueError:  # lebih dari batas digit int() Python
+                pass
+        if chosen_id is not None and chosen_id in choice_ids:
+            correct += 1
+        responses.append(chosen_id if chosen_id in answer_key.choices[question_id] else -question_id)
+    total = len(answer_key.correct)
+    score = int((correct / total) * 100) if total else 0
+    return correct, total, score, responses
+
+# ---------- Analisis butir soal ----------
+
+def item_analysis_watermark(course_id):
+    """Penanda percobaan kursus dari attempt_summary (satu query): berubah setiap ada attempt baru atau dihapus."""
+    return tuple(db.session.execute(
+        db.select(func.count(AttemptSummary.id), func.coalesce(func.sum(AttemptSummary.attempt_count), 0),
+                  func.max(AttemptSummary.last_attempt_at))
+        .where(AttemptSummary.course_id == course_id)
+    ).one())
+
+def build_item_analysis(course_id, version):
+    """Laporan analisis butir soal untuk soal kuis saat ini atas semua attempt yang menyimpan jawaban."""
+    _payload_json, payload = get_quiz_payload(course_id, version)
+    answer_key = get_quiz_answer_key(course_id, version)
+    questions = [(question['id'], [(choice['id'], choice['id'] in answer_key.correct.get(question['id'], ()))
+                                   for choice in question['choices']])
+                 for question in payload['questions']]
+    answers = db.session.execute(db.select(Attempt.answers).where(Attempt.course_id == course_id)).scalars().all()
+    blobs = [blob for blob in answers if blob is not None]
+    report = analyze_items(blobs, questions)
+    report['legacy_attempts'] = len(answers) - len(blobs)
+    texts = {question['id']: (question['text'], {choice['id']: choice['text'] for choice in question['choices']})
+             for question in payload['questions']}
+    for item in report['questions']:
+        question_text, choice_texts = texts[item['question_id']]
+        item['text'] = question_text
+        for choice in item['choices']:
+            choice['text'] = choice_texts[choice['choice_id']]
+    return report
+
+def get_item_analysis(course_id, version):
+    """Laporan analisis butir soal, di-cache per (kursus, content_version, penanda attempt) di setiap worker.
+
+    Attempt baru memperbarui attempt_summary dan perubahan soal menaikkan content_version, jadi laporan
+    hanya dihitung ulang bila salah satunya berubah.
+    """
+    cache = current_app.extensions['item_analysis_cache']
+    key = (course_id, version, item_analysis_watermark(course_id))
+    report = cache.get(key)
+    if report is None:
+        report = build_item_analysis(course_id, version)
+        cache.set(key, report)
+    return report
+
+# ---------- API katalog (JSON) ----------
+
+# Field kursus yang bisa dipilih lewat fields=; hanya kolom field yang diminta yang di-SELECT.
+API_COURSE_COLUMNS = {
+    'id': Course.id,
+    'title': Course.title,
+    'description': Course.description,
+    'is_premium': Course.is_premium,
+    'price': Course.price,
+    'material_type': Course.material_type,
+    'thumbnail_url': Course.thumbnail_path,
+    'instructor': User.name,
+    'lesson_count': Course.lesson_count,
+    'question_count': Course.question_count,
+    'has_exercise': Course.has_exercise,
+    'enrollment_count': Course.enrollment_count,
+    'passing_grade': Course.passing_grade,
+    'attempt_limit': Course.attempt_limit,
+    'quiz_start_date': Course.quiz_start_date,
+    'quiz_end_date': Course.quiz_end_date,
+    'version': Course.content_version,
+    'updated_at': Course.updated_at,
+}
+API_LIST_DEFAULT_FIELDS = ('id', 'title', 'is_premium', 'price', 'material_type', 'thumbnail_url', 'instructor',
+                           'lesson_count')
+# Detail juga bisa memuat daftar materi (dari dokumen silabus yang sudah di-cache)
+API_DETAIL_FIELDS = tuple(API_COURSE_COLUMNS) + ('lessons',)
+# Counter berubah tanpa menaikkan content_version, jadi nilainya ikut membentuk ETag bila diminta
+API_COUNTER_FIELDS = COURSE_COUNTER_COLUMNS + ('has_exercise',)
+
+def api_counter_columns(fields):
+    return [API_COURSE_COLUMNS[name] for name in fields if name in API_COUNTER_FIELDS]
+
+def parse_api_fields(raw, allowed, default):
+    """fields=a,b,c -> tuple field (urutan dipertahankan); ValueError bila ada field tidak dikenal."""
+    if not raw:
+        return tuple(default)
+    fields = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ValueError(f"Field tidak dikenal: {', '.join(unknown)}")
+    return fields or tuple(default)
+
+def _api_value(name, value):
+    if name == 'thumbnail_url':
+        if not value:
+            return None
+        return value if value.startswith('http') else url_for('static', filename=value, _external=True)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if name in ('is_premium', 'has_exercise'):
+        return bool(value)
+    return value
+
+def load_api_courses(course_ids, fields):
+    """Baris kursus berisi field yang diminta saja, urut sesuai course_ids (satu query kolom)."""
+    columns = [API_COURSE_COLUMNS[name] for name in fields if name in API_COURSE_COLUMNS]
+    if not course_ids or not columns:
+        return {course_id: {} for course_id in course_ids}
+    query = db.session.query(Course.id, *columns).filter(Course.id.in_(course_ids))
+    if 'instructor' in fields:
+        query = query.outerjoin(User, User.id == Course.instructor_id)
+    names = [name for name in fields if name in API_COURSE_COLUMNS]
+    rows = {row[0]: {name: _api_value(name, value) for name, value in zip(names, row[1:])} for row in query}
+    return {course_id: rows[course_id] for course_id in course_ids if course_id in rows}
+
+def api_json(payload, status=200):
+    """Respons JSON ringkas (tanpa spasi, UTF-8 apa adanya)."""
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str)
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+def ensure_schema_checked():
+    # Hanya request pertama di setiap worker yang menyentuh katalog database.
+    if not _schema_state()['checked']:
+        bootstrap_schema()
 
-@app.before_request
 def check_instructor_verification():
+    # Izinkan akses ke halaman profil, logout, dan file statis. Dicek lebih dulu agar request
+    # aset statis tidak memuat user/sesi (respons tetap bisa di-cache tanpa Vary: Cookie).
+    if not request.endpoint or request.endpoint in ['profile', 'logout', 'static', 'delete_instructor_certificate']:
+        return None
     # Cek jika user terautentikasi, adalah seorang pengajar, dan belum terverifikasi
     if current_user.is_authenticated and current_user.role == 'instructor' and not current_user.is_verified:
-        # Izinkan akses ke halaman profil, logout, dan file statis
-        if request.endpoint and request.endpoint not in ['profile', 'logout', 'static', 'delete_instructor_certificate']:
-            return redirect(url_for('profile'))
+        return redirect(url_for('profile'))
 
 # ---------- Routes ----------
 
-@app.route('/ai-chat')
+@route('/ai-chat')
 @login_required
 def ai_chat_page():
     return render_template('ai_chat.html', title='Asisten AI')
 
-@app.route('/api/ai-chat', methods=['POST'])
+@route('/api/ai-chat', methods=['POST'])
 @login_required
 def api_ai_chat():
     payload = request.get_json(silent=True) or {}
@@ -943,7 +2732,7 @@ def api_ai_chat():
     if len(user_message) > 500:
         return jsonify({'error': 'Pesan terlalu panjang. Maksimal 500 karakter.'}), 400
 
-    app.logger.info('AI chat request user_id=%s role=%s len=%s', getattr(current_user, 'id', 'anon'), getattr(current_user, 'role', 'unknown'), len(user_message))
+    current_app.logger.info('AI chat request user_id=%s role=%s len=%s', getattr(current_user, 'id', 'anon'), getattr(current_user, 'role', 'unknown'), len(user_message))
 
     # Simpan pertanyaan user ke database
     try:
@@ -955,7 +2744,7 @@ def api_ai_chat():
         db.session.add(user_chat)
         db.session.commit()
     except Exception:
-        app.logger.exception('Gagal simpan user message ke chat history')
+        current_app.logger.exception('Gagal simpan user message ke chat history')
         db.session.rollback()
 
     # Build messages dengan conversation history
@@ -975,46 +2764,35 @@ def api_ai_chat():
         db.session.add(ai_chat)
         db.session.commit()
     except Exception:
-        app.logger.exception('Gagal simpan AI reply ke chat history')
+        current_app.logger.exception('Gagal simpan AI reply ke chat history')
         db.session.rollback()
 
     return jsonify({'reply': ai_reply})
 
-@app.route('/api/ai-chat/clear', methods=['DELETE'])
+@route('/api/ai-chat/clear', methods=['DELETE'])
 @login_required
 def clear_chat_history():
     """Hapus semua chat history user saat ini."""
     try:
         deleted = ChatHistory.query.filter_by(user_id=current_user.id).delete()
         db.session.commit()
-        app.logger.info('Cleared %d chat history for user %s', deleted, current_user.id)
+        current_app.logger.info('Cleared %d chat history for user %s', deleted, current_user.id)
         return jsonify({'success': True, 'deleted': deleted})
     except Exception:
-        app.logger.exception('Failed to clear chat history for user %s', current_user.id)
+        current_app.logger.exception('Failed to clear chat history for user %s', current_user.id)
         db.session.rollback()
         return jsonify({'error': 'Gagal menghapus riwayat chat'}), 500
 
 
-@app.route('/')
+@route('/')
 def index():
-    # Query untuk kursus terpopuler berdasarkan jumlah pendaftar
-    popular_courses = db.session.query(
-        Course, func.count(Enrollment.id).label('enrollment_count')
-    ).outerjoin(Enrollment, Course.id == Enrollment.course_id)\
-    .group_by(Course.id)\
-    .order_by(func.count(Enrollment.id).desc())\
-    .limit(4)\
-    .all()
-
-    # Query untuk kursus terbaru
-    newest_courses = Course.query.order_by(Course.id.desc()).limit(4).all()
-    
-    # Karena hasil popular_courses adalah tuple (Course, enrollment_count), kita ekstrak objek Course saja
-    popular_courses_objects = [course for course, count in popular_courses]
-
-    return render_template('index.html', popular_courses=popular_courses_objects, newest_courses=newest_courses)
+    # Kursus terpopuler (counter enrollment_count, index ix_course_popularity) dan terbaru,
+    # disajikan dari cache sehingga pengunjung anonim tidak memicu query database.
+    sections = get_homepage_sections()
+    return render_template('index.html', popular_courses=sections['popular_courses'],
+                           newest_courses=sections['newest_courses'])
 
-@app.route('/register', methods=['GET','POST'])
+@route('/register', methods=['GET','POST'])
 def register():
     if request.method == 'POST':
         name = request.form['name'].strip()
@@ -1032,7 +2810,7 @@ def register():
         return redirect(url_for('login'))
     return render_template('register.html')
 
-@app.route('/login', methods=['GET','POST'])
+@route('/login', methods=['GET','POST'])
 def login():
     if request.method == 'POST':
         email = request.form['email'].strip().lower()
@@ -1045,7 +2823,7 @@ def login():
         return redirect(url_for('index'))
     return render_template('login.html')
 
-@app.route('/forgot-password', methods=['GET','POST'])
+@route('/forgot-password', methods=['GET','POST'])
 def forgot_password():
     if request.method == 'POST':
         email = request.form['email'].strip().lower()
@@ -1065,17 +2843,18 @@ def forgot_password():
         return redirect(url_for('login'))
     return render_template('forgot_password.html')
 
-@app.route('/logout')
+@route('/logout')
 @login_required
 def logout():
     logout_user()
     flash('Logged out', 'success')
     return redirect(url_for('login'))
 
-@app.route('/profile', methods=['GET', 'POST'])
+@route('/profile', methods=['GET', 'POST'])
 @login_required
 def profile():
     if request.method == 'POST':
+        user = get_current_user_entity()
         name = request.form['name'].strip()
         email = request.form['email'].strip().lower()
         expertise = request.form.get('expertise') # Ambil data keahlian
@@ -1083,25 +2862,25 @@ def profile():
         teaching_experience_str = request.form.get('teaching_experience')
 
         # Check if email is already taken by another user
-        existing_user = User.query.filter(User.email == email, User.id != current_user.id).first()
+        existing_user = User.query.filter(User.email == email, User.id != user.id).first()
         if existing_user:
             flash('Email already registered by another user.', 'error')
             return redirect(url_for('profile'))
 
-        current_user.name = name
-        current_user.email = email
-        if current_user.role == 'instructor':
-            current_user.expertise = expertise
-            current_user.institution = institution
+        user.name = name
+        user.email = email
+        if user.role == 'instructor':
+            user.expertise = expertise
+            user.institution = institution
             # Konversi ke integer, tangani jika kosong atau tidak valid
             if teaching_experience_str and teaching_experience_str.isdigit():
-                current_user.teaching_experience = int(teaching_experience_str)
+                user.teaching_experience = int(teaching_experience_str)
             else:
-                current_user.teaching_experience = None
+                user.teaching_experience = None
 
             # Handle certificate upload/link
-            old_certificate_data = current_user.certificate_data
-            old_certificate_type = current_user.certificate_type
+            old_certificate_data = user.certificate_data
+            old_certificate_type = user.certificate_type
 
             certificate_type = request.form.get('certificate_type', 'default')
             certificate_file = request.files.get('certificate_file')
@@ -1147,124 +2926,165 @@ def profile():
                 if certificate_type != old_certificate_type or (certificate_type in ['pdf', 'image'] and new_certificate_data != old_certificate_data):
                     delete_certificate_file(old_certificate_data)
 
-            current_user.certificate_type = certificate_type
-            current_user.certificate_data = new_certificate_data
+            user.certificate_type = certificate_type
+            user.certificate_data = new_certificate_data
+            if certificate_type != old_certificate_type or new_certificate_data != old_certificate_data:
+                user.update_certificate_variants()
 
+        if user.role == 'instructor':
+            # Nama dan profil pengajar tampil di katalog serta detail kursus
+            bump_course_version(*(course_id for (course_id,) in db.session.query(Course.id).filter_by(instructor_id=user.id)))
         db.session.commit()
+        invalidate_user_cache(user.id)
         flash('Profile updated successfully.', 'success')
         return redirect(url_for('profile'))
 
     show_warning = (current_user.role == 'instructor' and not current_user.is_verified)
     return render_template('profile.html', show_verification_warning=show_warning)
 
-@app.route('/profile/delete_certificate', methods=['POST'])
+@route('/profile/delete_certificate', methods=['POST'])
 @login_required
 def delete_instructor_certificate():
     if current_user.role != 'instructor':
         flash('Instructor only', 'error')
         return redirect(url_for('profile'))
 
-    if current_user.certificate_data and not current_user.certificate_data.startswith('http'):
-        delete_certificate_file(current_user.certificate_data)
+    user = get_current_user_entity()
+    if user.certificate_data and not user.certificate_data.startswith('http'):
+        delete_certificate_file(user.certificate_data)
     
-    current_user.certificate_type = 'default'
-    current_user.certificate_data = None
+    user.certificate_type = 'default'
+    user.certificate_data = None
+    user.certificate_variants = None
+    bump_course_version(*(course_id for (course_id,) in db.session.query(Course.id).filter_by(instructor_id=user.id)))
     db.session.commit()
+    invalidate_user_cache(user.id)
     flash('Sertifikat berhasil dihapus.', 'success')
     return redirect(url_for('profile'))
 
-@app.route('/courses')
+@route('/courses')
 def courses():
     material_type = request.args.get('material_type', '')
     is_premium = request.args.get('is_premium', '')
     search = request.args.get('search', '')
+    page_size = get_page_size()
+    cursor = request.args.get('cursor', '')
 
-    query = Course.query.options(joinedload(Course.instructor))
+    filters = []
+    instructor_id = None
+    premium_bool = None
 
     if current_user.is_authenticated and current_user.role == 'instructor':
-        query = query.filter(Course.instructor_id == current_user.id)
+        instructor_id = current_user.id
+        filters.append(Course.instructor_id == instructor_id)
 
     if material_type:
-        query = query.filter(Course.material_type == material_type)
+        filters.append(Course.material_type == material_type)
     
     if is_premium:
         premium_bool = is_premium.lower() == 'yes'
-        query = query.filter(Course.is_premium == premium_bool)
+        filters.append(Course.is_premium == premium_bool)
 
-    if search:
-        query = query.filter(Course.title.ilike(f'%{search}%'))
-
-    cs = query.order_by(Course.id.desc()).all()
+    # Tahap 1 (ringan): tentukan id + content_version kursus di halaman ini untuk ETag.
+    # Pencarian full-text (judul, deskripsi, jenis materi, judul materi) lewat indeks in-process.
+    page_versions, next_cursor = select_course_page(filters, search=search, cursor=cursor, page_size=page_size,
+                                                    material_type=material_type, is_premium=premium_bool,
+                                                    instructor_id=instructor_id)
 
-    lesson_titles_map = {}
-    course_ids = [course.id for course in cs]
-    if course_ids:
-        lessons = Lesson.query.filter(Lesson.course_id.in_(course_ids)).order_by(Lesson.id).all()
-        for lesson in lessons:
-            lesson_titles_map.setdefault(lesson.course_id, []).append(lesson.title)
+    course_ids = [course_id for course_id, _version in page_versions]
     enrolled_ids = []
     cart_course_ids = []
     is_student = False
     if current_user.is_authenticated:
         is_student = current_user.role == 'student'
-        if is_student:
-            enrolled_ids = [en.course_id for en in Enrollment.query.filter_by(user_id=current_user.id).all()]
-            cart_course_ids = [item.course_id for item in CartItem.query.filter_by(user_id=current_user.id).all()]
+        if is_student and course_ids:
+            enrolled_ids = [course_id for (course_id,) in db.session.query(Enrollment.course_id).filter(
+                Enrollment.user_id == current_user.id, Enrollment.course_id.in_(course_ids))]
+            cart_course_ids = [course_id for (course_id,) in db.session.query(CartItem.course_id).filter(
+                CartItem.user_id == current_user.id, CartItem.course_id.in_(course_ids))]
+    filter_args = {key: value for key, value in (('material_type', material_type), ('is_premium', is_premium),
+                                                 ('search', search)) if value}
+    etag = make_etag('courses', filter_args, cursor, [list(row) for row in page_versions], next_cursor,
+                     viewer_fingerprint(), sorted(enrolled_ids), sorted(cart_course_ids))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    # Tahap 2: muat kartu kursus dan judul materi hanya bila halaman memang perlu dirender.
+    cs = []
+    lesson_titles_map = {}
+    if course_ids:
+        position = {course_id: idx for idx, course_id in enumerate(course_ids)}
+        cs = load_course_cards(course_card_query().where(Course.id.in_(course_ids)))
+        cs.sort(key=lambda course: position[course.id])
+        lesson_rows = db.session.query(Lesson.course_id, Lesson.title).filter(Lesson.course_id.in_(course_ids)).order_by(Lesson.id)
+        for lesson_course_id, lesson_title in lesson_rows:
+            lesson_titles_map.setdefault(lesson_course_id, []).append(lesson_title)
     return render_template('courses.html', courses=cs, enrolled_ids=enrolled_ids, is_student=is_student,
                            lesson_titles_map=lesson_titles_map, cart_course_ids=cart_course_ids,
-                           selected_material_type=material_type, selected_is_premium=is_premium, search_query=search)
+                           selected_material_type=material_type, selected_is_premium=is_premium, search_query=search,
+                           next_cursor=next_cursor, is_first_page=not cursor, filter_args=filter_args)
 
-@app.route('/my-courses')
+@route('/my-courses')
 @login_required
 def my_courses():
     material_type = request.args.get('material_type', '')
     is_premium = request.args.get('is_premium', '')
     search = request.args.get('search', '')
+    page_size = get_page_size()
+    cursor = request.args.get('cursor', '')
+    filter_args = {key: value for key, value in (('material_type', material_type), ('is_premium', is_premium),
+                                                 ('search', search)) if value}
 
-    enrollments = Enrollment.query.filter_by(user_id=current_user.id).order_by(Enrollment.id.asc()).all()
-    if not enrollments:
-        return render_template('my_courses.html', courses=[], progress_map={}, enrollment_status={},
-                               selected_material_type=material_type, selected_is_premium=is_premium, search_query=search)
-
-    course_ids = [enrollment.course_id for enrollment in enrollments]
-    query = Course.query.options(joinedload(Course.instructor)).filter(Course.id.in_(course_ids))
+    query = (course_card_query()
+             .join(Enrollment, Enrollment.course_id == Course.id)
+             .where(Enrollment.user_id == current_user.id))
 
     if material_type:
-        query = query.filter(Course.material_type == material_type)
+        query = query.where(Course.material_type == material_type)
     
+    premium_bool = None
     if is_premium:
         premium_bool = is_premium.lower() == 'yes'
-        query = query.filter(Course.is_premium == premium_bool)
+        query = query.where(Course.is_premium == premium_bool)
 
+    next_cursor = None
     if search:
-        query = query.filter(Course.title.ilike(f'%{search}%'))
+        enrolled_course_ids = {course_id for (course_id,) in db.session.query(Enrollment.course_id).filter_by(user_id=current_user.id)}
+        offset = (decode_cursor(cursor, 'rank') or [0])[0]
+        offset = offset if isinstance(offset, int) and offset >= 0 else 0
+        ranked_ids = search_course_ids(search, limit=offset + page_size + 1, material_type=material_type or None,
+                                       is_premium=premium_bool, restrict_to=enrolled_course_ids) if enrolled_course_ids else []
+        page_ids = ranked_ids[offset:offset + page_size]
+        if len(ranked_ids) > offset + page_size:
+            next_cursor = encode_cursor('rank', offset + page_size)
+        position = {course_id: idx for idx, course_id in enumerate(page_ids)}
+        courses = load_course_cards(query.where(Course.id.in_(page_ids))) if page_ids else []
+        courses.sort(key=lambda course: position[course.id])
+    else:
+        # Keyset pagination berurutan judul (judul sama diurutkan id).
+        after = decode_cursor(cursor, 'title')
+        if after and len(after) == 2 and isinstance(after[0], str) and isinstance(after[1], int):
+            last_title, last_id = after
+            query = query.where(or_(Course.title > last_title, and_(Course.title == last_title, Course.id > last_id)))
+        courses = load_course_cards(query.order_by(Course.title.asc(), Course.id.asc()).limit(page_size + 1))
+        if len(courses) > page_size:
+            courses = courses[:page_size]
+            next_cursor = encode_cursor('title', courses[-1].title, courses[-1].id)
+
+    page_ids = [c.id for c in courses]
+    if not page_ids:
+        return render_template('my_courses.html', courses=[], progress_map={}, enrollment_status={},
+                               selected_material_type=material_type, selected_is_premium=is_premium, search_query=search,
+                               next_cursor=None, is_first_page=not cursor, filter_args=filter_args)
 
-    courses = query.order_by(Course.title.asc()).all()
-    
-    final_course_ids = [c.id for c in courses]
-
-    lessons = Lesson.query.filter(Lesson.course_id.in_(final_course_ids)).all() if final_course_ids else []
-    lessons_by_course = {}
-    lesson_course_map = {}
-    for lesson in lessons:
-        lessons_by_course.setdefault(lesson.course_id, []).append(lesson)
-        lesson_course_map[lesson.id] = lesson.course_id
-    
-    completed_counts = {}
-    if lesson_course_map:
-        progresses = LessonProgress.query.filter(
-            LessonProgress.user_id == current_user.id,
-            LessonProgress.lesson_id.in_(lesson_course_map.keys())
-        ).all()
-        for progress in progresses:
-            course_id = lesson_course_map.get(progress.lesson_id)
-            if course_id is not None:
-                completed_counts[course_id] = completed_counts.get(course_id, 0) + 1
+    # Progres materi dibaca dari enrollment_progress, hanya untuk kursus di halaman ini.
+    enrollment_progress = get_enrollment_progress_map(current_user.id, courses)
     
     progress_map = {}
     for course in courses:
-        total_lessons = len(lessons_by_course.get(course.id, []))
-        completed = completed_counts.get(course.id, 0)
+        total_lessons = enrollment_progress[course.id].total_lessons
+        completed = min(enrollment_progress[course.id].lessons_completed, total_lessons)
         percent = int((completed / total_lessons) * 100) if total_lessons else 0
         progress_map[course.id] = {
             'completed': completed,
@@ -1272,181 +3092,221 @@ def my_courses():
             'percent': percent
         }
     
-    enrollment_status = {enrollment.course_id: enrollment.unlocked for enrollment in enrollments}
+    enrollment_status = dict(
+        db.session.query(Enrollment.course_id, Enrollment.unlocked)
+        .filter(Enrollment.user_id == current_user.id, Enrollment.course_id.in_(page_ids))
+    )
     
     return render_template('my_courses.html', courses=courses, progress_map=progress_map, enrollment_status=enrollment_status,
-                           selected_material_type=material_type, selected_is_premium=is_premium, search_query=search)
+                           selected_material_type=material_type, selected_is_premium=is_premium, search_query=search,
+                           next_cursor=next_cursor, is_first_page=not cursor, filter_args=filter_args)
 
-@app.route('/course/<int:course_id>')
+@route('/course/<int:course_id>')
 def course_detail(course_id):
-    c = Course.query.get_or_404(course_id)
-    lessons = Lesson.query.filter_by(course_id=course_id).all()
-    lesson_ids = [lesson.id for lesson in lessons]
+    # Query 1: versi kursus + state user (pendaftaran, progres, kuis terakhir, latihan, keranjang)
+    overlay = load_course_viewer_overlay(course_id)
+    if overlay is None:
+        abort(404)
+    view = get_course_public_view(course_id, overlay['content_version'])
+    if view is None:
+        abort(404)
+    c = view['course']
+    lessons = view['lessons']
+    exercise = view['exercise']
+    now = datetime.utcnow() + timedelta(hours=7)
+    # Validator: versi konten + fase jadwal (tanggal mulai/selesai yang sudah lewat) + state user
+    schedule_phase = bisect_right(view['schedule'], now)
+    etag = make_etag('course', course_id, view['version'], schedule_phase, viewer_fingerprint(), overlay_fingerprint(overlay))
+    cached = not_modified(etag, overlay['updated_at'])
+    if cached is not None:
+        return cached
+
+    is_student = current_user.is_authenticated and current_user.role == 'student'
+    enrollment = overlay.get('enrollment')
+    is_enrolled = enrollment is not None
+    is_unlocked = is_enrolled and ((not c.is_premium) or enrollment.unlocked)
+    is_in_cart = is_student and overlay['is_in_cart']
+    exercise_submission = overlay['exercise_submission'] if is_student else None
+    attempt = overlay.get('attempt')
+    progress_row = overlay.get('progress')
+    if is_enrolled and progress_row is None:
+        progress_row = get_enrollment_progress(current_user.id, db.session.get(Course, course_id))
     completed_ids = set()
-    exercise_submission = None # Initialize exercise_submission
-    exercise = None # Initialize exercise
-    for lesson in lessons:
-        lesson.embed = prepare_video_embed(lesson.video_url)
-        lesson.is_completed = False
-    questions = Question.query.filter_by(course_id=course_id).all()
-    exercise = Exercise.query.filter_by(course_id=course_id).first()
-    is_enrolled = False
-    is_unlocked = False
-    attempt = None
-    completed_count = 0
-    is_in_cart = False
-    exercise_submission = None
-    if current_user.is_authenticated:
-        if current_user.role == 'student':
-            is_in_cart = CartItem.query.filter_by(user_id=current_user.id, course_id=course_id).first() is not None
-            exercise_submission = ExerciseSubmission.query.filter_by(user_id=current_user.id, course_id=course_id).first()
-        e = Enrollment.query.filter_by(user_id=current_user.id, course_id=course_id).first()
-        if e:
-            is_enrolled = True
-            is_unlocked = (not c.is_premium) or e.unlocked
-            if lesson_ids:
-                completed_records = LessonProgress.query.filter(
-                    LessonProgress.user_id == current_user.id,
-                    LessonProgress.lesson_id.in_(lesson_ids)
-                ).all()
-                completed_ids = {record.lesson_id for record in completed_records}
-                completed_count = len(completed_ids)
-        attempt = Attempt.query.filter_by(user_id=current_user.id, course_id=course_id).order_by(Attempt.id.desc()).first()
+    if is_enrolled and lessons and progress_row.lessons_completed:
+        # Query 2: materi yang sudah diselesaikan
+        completed_ids = {lesson_id for (lesson_id,) in db.session.query(LessonProgress.lesson_id).filter(
+            LessonProgress.user_id == current_user.id,
+            LessonProgress.lesson_id.in_([lesson.id for lesson in lessons])
+        )}
     
-    # Count total attempts for this user on this course
-    attempt_count = 0
-    if current_user.is_authenticated and current_user.role == 'student':
-        attempt_count = Attempt.query.filter_by(user_id=current_user.id, course_id=course_id).count()
+    # Jumlah percobaan kuis dari attempt_summary, penghitung yang sama dengan batas percobaan
+    attempt_count = overlay['attempt_count'] if is_enrolled and is_student else 0
     
-    for lesson in lessons:
-        if lesson.id in completed_ids:
-            lesson.is_completed = True
-    # New progress calculation based on components
-    total_components = 0
-    completed_components = 0
-
-    # Component 1: Lessons
-    lessons_status = 'incomplete'
-    if lessons:
-        total_components += 1
-        if is_enrolled and completed_count == len(lessons):
-            completed_components += 1
-            lessons_status = 'complete'
-
-    # Component 2: Quiz
-    quiz_status = 'not_attempted'
-    quiz_score = 0
-    if questions: # If there are any questions, a quiz exists
-        total_components += 1
-        if is_enrolled and attempt:
-            quiz_score = attempt.score
-            passing_grade = c.passing_grade if c.passing_grade else 100
-            if attempt.score >= passing_grade:
-                completed_components += 1
-                quiz_status = 'complete'
-            else:
-                quiz_status = 'incomplete'
-
-    # Component 3: Exercise
-    exercise_status = 'not_required'
-    exercise_score = 0
-    if exercise:
-        total_components += 1
-        exercise_status = 'not_submitted'
-        if is_enrolled and exercise_submission:
-            exercise_score = exercise_submission.score if exercise_submission.score else 0
-            if exercise_submission.score is not None and exercise_submission.score > 0:
-                completed_components += 1
-                exercise_status = 'complete'
-            else:
-                exercise_status = 'pending'
+    # Status komponen (materi, kuis, latihan) dari enrollment_progress
+    summary = evaluate_progress(c, progress_row)
+    completed_count = progress_row.lessons_completed if progress_row else 0
+    quiz_score = (progress_row.last_quiz_score or 0) if progress_row else 0
+    exercise_score = (progress_row.exercise_score or 0) if progress_row else 0
 
-    percent = int((completed_components / total_components) * 100) if total_components else 0
-    
     # Build certificate progress data
     certificate_progress = {
         'lessons': {
             'completed': completed_count if is_enrolled else 0,
             'total': len(lessons),
-            'status': lessons_status if is_enrolled else 'incomplete'
+            'status': summary['lessons'] if is_enrolled else 'incomplete'
         },
         'quiz': {
-            'attempted': (attempt is not None) if is_enrolled else False,
+            'attempted': (progress_row.last_quiz_score is not None) if is_enrolled else False,
             'score': quiz_score if is_enrolled else 0,
             'target': c.passing_grade if c.passing_grade else 100,
-            'status': quiz_status if is_enrolled else 'not_attempted'
+            'status': summary['quiz'] if is_enrolled else 'not_attempted'
         },
         'exercise': {
             'required': exercise is not None,
-            'submitted': (exercise_submission is not None) if is_enrolled else False,
+            'submitted': progress_row.exercise_submitted if is_enrolled else False,
             'score': exercise_score if is_enrolled else 0,
-            'status': exercise_status if is_enrolled else 'not_required'
+            'status': summary['exercise'] if is_enrolled else 'not_required'
         },
-        'total_components': total_components,
-        'completed_components': completed_components if is_enrolled else 0,
-        'percentage': percent if is_enrolled else 0
+        'total_components': summary['total'],
+        'completed_components': summary['completed'] if is_enrolled else 0,
+        'percentage': summary['percent'] if is_enrolled else 0
     }
     
     progress = {
-        'completed': completed_components if is_enrolled else 0,
-        'total': total_components,
-        'percent': percent if is_enrolled else 0,
+        'completed': summary['completed'] if is_enrolled else 0,
+        'total': summary['total'],
+        'percent': summary['percent'] if is_enrolled else 0,
         'enrolled': is_enrolled,
         'unlocked': is_unlocked
     }
     
-    return render_template('course_detail.html', course=c, lessons=lessons, questions=questions,
+    return render_template('course_detail.html', course=c, lessons=lessons, question_count=c.question_count,
+                           completed_lesson_ids=completed_ids,
                            is_enrolled=is_enrolled, is_unlocked=is_unlocked, is_in_cart=is_in_cart, 
                            attempt=attempt, attempt_count=attempt_count, progress=progress, certificate_progress=certificate_progress,
                            exercise=exercise, exercise_submission=exercise_submission, 
-                           now=datetime.utcnow() + timedelta(hours=7))
+                           now=now)
 
-@app.route('/course/<int:course_id>/syllabus')
+@route('/course/<int:course_id>/syllabus')
 def view_syllabus(course_id):
-    course = Course.query.get_or_404(course_id)
-    lessons = Lesson.query.filter_by(course_id=course_id).order_by(Lesson.id).all()
-    questions = Question.query.filter_by(course_id=course_id).all()
-    exercise = Exercise.query.filter_by(course_id=course_id).first()
-    
-    # Get learning outcomes and skills for each lesson
-    lesson_outcomes = {}
-    lesson_skills = {}
-    for lesson in lessons:
-        outcomes = LearningOutcome.query.filter_by(lesson_id=lesson.id).order_by(LearningOutcome.order_index).all()
-        lesson_outcomes[lesson.id] = outcomes
-        
-        skills = Skill.query.filter_by(lesson_id=lesson.id).order_by(Skill.order_index).all()
-        lesson_skills[lesson.id] = skills
-    
+    version_row = db.session.query(Course.content_version, Course.updated_at).filter(Course.id == course_id).first()
+    if version_row is None:
+        abort(404)
+    cached = not_modified(make_etag('syllabus', course_id, version_row.content_version, viewer_fingerprint()),
+                          version_row.updated_at)
+    if cached is not None:
+        return cached
+
+    entry = get_syllabus_document(course_id, version_row.content_version)
+    if entry is None:
+        abort(404)
+    document = entry[1]
     return render_template('syllabus.html', 
-                           course=course, 
-                           lessons=lessons, 
-                           questions=questions, 
-                           exercise=exercise,
-                           lesson_outcomes=lesson_outcomes,
-                           lesson_skills=lesson_skills)
-
-@app.route('/cart')
+                           course=document['course'], 
+                           lessons=document['lessons'], 
+                           question_count=document['quiz']['question_count'], 
+                           exercise=document['exercise'])
+
+@route('/api/v1/courses/<int:course_id>/syllabus')
+def syllabus_json(course_id):
+    """Silabus kursus dalam JSON (dokumen yang sama dengan halaman silabus)."""
+    version_row = db.session.query(Course.content_version, Course.updated_at).filter(Course.id == course_id).first()
+    if version_row is None:
+        return jsonify({'error': 'Kursus tidak ditemukan'}), 404
+    # Isi dokumen sama untuk semua user, jadi proxy boleh menyimpannya
+    cached = not_modified(make_etag('syllabus.json', course_id, version_row.content_version),
+                          version_row.updated_at, shared=True)
+    if cached is not None:
+        return cached
+
+    entry = get_syllabus_document(course_id, version_row.content_version)
+    if entry is None:
+        return jsonify({'error': 'Kursus tidak ditemukan'}), 404
+    return current_app.response_class(entry[0], mimetype='application/json')
+
+@route('/api/v1/courses')
+def api_courses():
+    """Katalog kursus dalam JSON: cursor pagination, fields=, dan filter yang sama dengan /courses."""
+    material_type = request.args.get('material_type', '')
+    is_premium = request.args.get('is_premium', '')
+    search = request.args.get('search', '')
+    cursor = request.args.get('cursor', '')
+    try:
+        fields = parse_api_fields(request.args.get('fields'), API_COURSE_COLUMNS, API_LIST_DEFAULT_FIELDS)
+    except ValueError as exc:
+        return api_json({'error': str(exc)}, 400)
+    try:
+        limit = int(request.args.get('limit') or get_page_size())
+    except ValueError:
+        return api_json({'error': 'limit harus berupa angka'}, 400)
+    limit = min(max(limit, 1), current_app.config['API_MAX_PAGE_SIZE'])
+
+    filters = []
+    premium_bool = None
+    if material_type:
+        filters.append(Course.material_type == material_type)
+    if is_premium:
+        premium_bool = is_premium.lower() in ('yes', 'true', '1')
+        filters.append(Course.is_premium == premium_bool)
+    page_versions, next_cursor = select_course_page(filters, search=search, cursor=cursor, page_size=limit,
+                                                    material_type=material_type, is_premium=premium_bool)
+    counter_columns = api_counter_columns(fields)
+    counters = []
+    if counter_columns and page_versions:
+        counters = [list(row) for row in db.session.query(Course.id, *counter_columns)
+                    .filter(Course.id.in_([course_id for course_id, _version in page_versions])).order_by(Course.id)]
+    # Isi respons tidak bergantung pada user, jadi ETag dan cache proxy berlaku untuk semua klien
+    etag = make_etag('api.courses', fields, material_type, is_premium, search, cursor, limit,
+                     [list(row) for row in page_versions], counters, next_cursor)
+    cached = not_modified(etag, shared=True)
+    if cached is not None:
+        return cached
+
+    rows = load_api_courses([course_id for course_id, _version in page_versions], fields)
+    return api_json({'data': list(rows.values()), 'next_cursor': next_cursor})
+
+@route('/api/v1/courses/<int:course_id>')
+def api_course_detail(course_id):
+    """Detail satu kursus dalam JSON; fields=lessons menyertakan daftar materi (tanpa URL materi)."""
+    try:
+        fields = parse_api_fields(request.args.get('fields'), API_DETAIL_FIELDS, API_DETAIL_FIELDS)
+    except ValueError as exc:
+        return api_json({'error': str(exc)}, 400)
+    version_row = (db.session.query(Course.content_version, Course.updated_at, *api_counter_columns(fields))
+                   .filter(Course.id == course_id).first())
+    if version_row is None:
+        return api_json({'error': 'Kursus tidak ditemukan'}, 404)
+    cached = not_modified(make_etag('api.course', course_id, version_row.content_version, fields, list(version_row[2:])),
+                          version_row.updated_at, shared=True)
+    if cached is not None:
+        return cached
+
+    payload = load_api_courses([course_id], fields).get(course_id)
+    if payload is None:
+        return api_json({'error': 'Kursus tidak ditemukan'}, 404)
+    if 'lessons' in fields:
+        entry = get_syllabus_document(course_id, version_row.content_version)
+        payload['lessons'] = [{key: lesson[key] for key in ('id', 'title', 'duration_minutes', 'format')}
+                              for lesson in entry[1]['lessons']] if entry else []
+    return api_json({'data': payload})
+
+@route('/cart')
 @login_required
 def cart():
     if current_user.role != 'student':
         flash('Fitur keranjang hanya untuk student.', 'error')
         return redirect(url_for('index'))
-    items = CartItem.query.filter_by(user_id=current_user.id).all()
-    course_ids = [item.course_id for item in items]
-    courses = Course.query.filter(Course.id.in_(course_ids)).all() if course_ids else []
-    course_map = {course.id: course for course in courses}
-    entries = []
-    for item in items:
-        course = course_map.get(item.course_id)
-        if course:
-            entries.append({'item': item, 'course': course})
+    rows = db.session.execute(
+        db.select(Course.id, Course.title, Course.price, Course.thumbnail_path, Course.thumbnail_variants)
+        .join(CartItem, CartItem.course_id == Course.id)
+        .where(CartItem.user_id == current_user.id).order_by(CartItem.id))
+    entries = [{'course': CartCourse._make(row)} for row in rows]
     subtotal = sum((entry['course'].price or 0) for entry in entries)
     total = subtotal
     return render_template('cart.html', items=entries, subtotal=subtotal, total=total,
-                         midtrans_client_key=app.config.get('MIDTRANS_CLIENT_KEY', ''))
+                         midtrans_client_key=current_app.config.get('MIDTRANS_CLIENT_KEY', ''))
 
-@app.route('/cart/add/<int:course_id>', methods=['POST'])
+@route('/cart/add/<int:course_id>', methods=['POST'])
 @login_required
 def add_to_cart(course_id):
     course = Course.query.get_or_404(course_id)
@@ -1488,7 +3348,7 @@ def add_to_cart(course_id):
     flash('Course ditambahkan ke keranjang.', 'success')
     return _redirect_destination()
 
-@app.route('/cart/remove/<int:course_id>', methods=['POST'])
+@route('/cart/remove/<int:course_id>', methods=['POST'])
 @login_required
 def remove_from_cart(course_id):
     if current_user.role != 'student':
@@ -1515,7 +3375,7 @@ def remove_from_cart(course_id):
     flash('Course dihapus dari keranjang.', 'success')
     return _redirect_destination()
 
-@app.route('/cart/checkout', methods=['POST'])
+@route('/cart/checkout', methods=['POST'])
 @login_required
 def checkout_cart():
     if current_user.role != 'student':
@@ -1545,6 +3405,8 @@ def checkout_cart():
         if not enrollment:
             enrollment = Enrollment(user_id=current_user.id, course_id=course.id, unlocked=True)
             db.session.add(enrollment)
+            adjust_course_counters(course.id, enrollment_count=1)
+            ensure_enrollment_progress(current_user.id, course)
         else:
             enrollment.unlocked = True
 
@@ -1581,7 +3443,7 @@ def checkout_cart():
         response['payments'] = payments_created
     return jsonify(response)
 
-@app.route('/instructor')
+@route('/instructor')
 @login_required
 def instructor_dashboard():
     if current_user.role != 'instructor':
@@ -1592,7 +3454,7 @@ def instructor_dashboard():
         print(f"Course id: {course.id}")
     return render_template('instructor_dashboard.html', courses=my)
 
-@app.route('/manage_enrollments/<int:course_id>')
+@route('/manage_enrollments/<int:course_id>')
 @login_required
 def manage_enrollments(course_id):
     course = Course.query.get_or_404(course_id)
@@ -1600,16 +3462,14 @@ def manage_enrollments(course_id):
         flash('Instructor only', 'error')
         return redirect(url_for('course_detail', course_id=course_id))
 
-    enrollments = Enrollment.query.filter_by(course_id=course_id).all()
-    enrolled_students = []
-    for enrollment in enrollments:
-        student = User.query.get(enrollment.user_id)
-        if student:
-            enrolled_students.append(student)
+    # Satu query join, bukan User.query.get per pendaftaran
+    enrolled_students = [StudentRow._make(row) for row in db.session.execute(
+        db.select(User.id, User.name, User.email).join(Enrollment, Enrollment.user_id == User.id)
+        .where(Enrollment.course_id == course_id).order_by(Enrollment.id))]
 
     return render_template('manage_enrollments.html', course=course, enrolled_students=enrolled_students)
 
-@app.route('/manage_enrollments/<int:course_id>/unenroll/<int:user_id>', methods=['POST'])
+@route('/manage_enrollments/<int:course_id>/unenroll/<int:user_id>', methods=['POST'])
 @login_required
 def unenroll_student(course_id, user_id):
     course = Course.query.get_or_404(course_id)
@@ -1621,6 +3481,7 @@ def unenroll_student(course_id, user_id):
     if enrollment:
         # Delete all related data for the student in this course
         Attempt.query.filter_by(user_id=user_id, course_id=course_id).delete(synchronize_session=False)
+        AttemptSummary.query.filter_by(user_id=user_id, course_id=course_id).delete(synchronize_session=False)
         ExerciseSubmission.query.filter_by(user_id=user_id, course_id=course_id).delete(synchronize_session=False)
         
         # To delete LessonProgress, we need to find lessons associated with the course first
@@ -1630,8 +3491,10 @@ def unenroll_student(course_id, user_id):
             LessonProgress.query.filter(LessonProgress.user_id == user_id, LessonProgress.lesson_id.in_(lesson_ids_in_course)).delete(synchronize_session=False)
         
         CartItem.query.filter_by(user_id=user_id, course_id=course_id).delete(synchronize_session=False)
+        EnrollmentProgress.query.filter_by(user_id=user_id, course_id=course_id).delete(synchronize_session=False)
 
         db.session.delete(enrollment)
+        adjust_course_counters(course_id, enrollment_count=-1)
         db.session.commit()
         flash('Siswa berhasil dihapus dari kursus beserta semua data terkait.', 'success')
     else:
@@ -1639,7 +3502,7 @@ def unenroll_student(course_id, user_id):
 
     return redirect(url_for('manage_enrollments', course_id=course_id))
 
-@app.route('/manage_enrollments/<int:course_id>/student_detail/<int:user_id>')
+@route('/manage_enrollments/<int:course_id>/student_detail/<int:user_id>')
 @login_required
 def student_detail_for_instructor(course_id, user_id):
     course = Course.query.get_or_404(course_id)
@@ -1654,16 +3517,19 @@ def student_detail_for_instructor(course_id, user_id):
     lessons = Lesson.query.filter_by(course_id=course_id).order_by(Lesson.id).all()
     total_lessons = len(lessons)
 
-    # Ambil progress pelajaran siswa
-    completed_lessons_progress = LessonProgress.query.filter_by(user_id=user_id).join(Lesson).filter(Lesson.course_id == course_id).all()
-    completed_lesson_ids = {lp.lesson_id for lp in completed_lessons_progress}
-    completed_count = len(completed_lesson_ids)
+    # Ambil progress pelajaran siswa (daftar materi yang selesai hanya dimuat bila ada)
+    progress = get_enrollment_progress(user_id, course)
+    completed_lesson_ids = set()
+    if progress.lessons_completed:
+        completed_lesson_ids = {lesson_id for (lesson_id,) in db.session.query(LessonProgress.lesson_id).join(Lesson)
+                                .filter(LessonProgress.user_id == user_id, Lesson.course_id == course_id)}
 
     # Hitung persentase progress
+    completed_count = min(progress.lessons_completed, total_lessons)
     progress_percent = int((completed_count / total_lessons) * 100) if total_lessons > 0 else 0
 
     # Ambil nilai kuis terakhir siswa
-    latest_attempt = Attempt.query.filter_by(user_id=user_id, course_id=course_id).order_by(Attempt.created_at.desc()).first()
+    latest_attempt = attempt_read_model(AttemptSummary.query.filter_by(user_id=user_id, course_id=course_id).first())
 
     # Ambil submission latihan siswa
     exercise_submission = ExerciseSubmission.query.filter_by(user_id=user_id, course_id=course_id).first()
@@ -1680,7 +3546,7 @@ def student_detail_for_instructor(course_id, user_id):
                            latest_attempt=latest_attempt,
                            exercise_submission=exercise_submission)
 
-@app.route('/manage_enrollments/<int:course_id>/student_detail/<int:user_id>/update_exercise_score', methods=['POST'])
+@route('/manage_enrollments/<int:course_id>/student_detail/<int:user_id>/update_exercise_score', methods=['POST'])
 @login_required
 def update_exercise_score(course_id, user_id):
     course = Course.query.get_or_404(course_id)
@@ -1704,6 +3570,7 @@ def update_exercise_score(course_id, user_id):
             return redirect(url_for('student_detail_for_instructor', course_id=course_id, user_id=user_id))
         
         exercise_submission.score = new_score
+        record_enrollment_progress(user_id, course, exercise_score=new_score)
         db.session.commit()
         flash('Nilai latihan berhasil diperbarui.', 'success')
     except ValueError:
@@ -1711,7 +3578,7 @@ def update_exercise_score(course_id, user_id):
     
     return redirect(url_for('student_detail_for_instructor', course_id=course_id, user_id=user_id))
 
-@app.route('/course/create', methods=['GET','POST'])
+@route('/course/create', methods=['GET','POST'])
 @login_required
 def create_course():
     if current_user.role != 'instructor':
@@ -1741,13 +3608,15 @@ def create_course():
 
         c = Course(title=title, description=description, is_premium=is_premium, price=price, instructor_id=current_user.id,
                    thumbnail_path=thumbnail_path or '', material_type=material_type, quiz_start_date=quiz_start_date, quiz_end_date=quiz_end_date)
+        c.update_thumbnail_variants()
         db.session.add(c)
         db.session.commit()
+        notify_course_changed(c.id)
         flash('Course created', 'success')
         return redirect(url_for('course_detail', course_id=c.id))
     return render_template('create_course.html', course=None)
 
-@app.route('/course/<int:course_id>/edit', methods=['GET','POST'])
+@route('/course/<int:course_id>/edit', methods=['GET','POST'])
 @login_required
 def edit_course(course_id):
     course = Course.query.get_or_404(course_id)
@@ -1771,18 +3640,22 @@ def edit_course(course_id):
             flash(error_message, 'error')
             return redirect(url_for('edit_course', course_id=course_id))
         course.thumbnail_path = updated_thumbnail or ''
+        if course.thumbnail_path != current_thumbnail:
+            course.update_thumbnail_variants()
 
         quiz_start_date_str = request.form.get('quiz_start_date')
         quiz_end_date_str = request.form.get('quiz_end_date')
 
         course.quiz_start_date = datetime.strptime(quiz_start_date_str, '%Y-%m-%dT%H:%M') if quiz_start_date_str else None
         course.quiz_end_date = datetime.strptime(quiz_end_date_str, '%Y-%m-%dT%H:%M') if quiz_end_date_str else None
+        bump_course_version(course_id)
         db.session.commit()
+        notify_course_changed(course_id)
         flash('Course updated', 'success')
         return redirect(url_for('edit_course', course_id=course_id))
     return render_template('create_course.html', course=course)
 
-@app.route('/course/<int:course_id>/delete', methods=['POST'])
+@route('/course/<int:course_id>/delete', methods=['POST'])
 @login_required
 def delete_course(course_id):
     print(f"Deleting course with id: {course_id}")
@@ -1806,18 +3679,21 @@ def delete_course(course_id):
     
     Question.query.filter_by(course_id=course_id).delete(synchronize_session=False)
     Enrollment.query.filter_by(course_id=course_id).delete(synchronize_session=False)
+    EnrollmentProgress.query.filter_by(course_id=course_id).delete(synchronize_session=False)
     Attempt.query.filter_by(course_id=course_id).delete(synchronize_session=False)
+    AttemptSummary.query.filter_by(course_id=course_id).delete(synchronize_session=False)
     CartItem.query.filter_by(course_id=course_id).delete(synchronize_session=False)
     ExerciseSubmission.query.filter_by(course_id=course_id).delete(synchronize_session=False)
     Exercise.query.filter_by(course_id=course_id).delete(synchronize_session=False)
     Payment.query.filter_by(course_id=course_id).delete(synchronize_session=False)
     db.session.delete(course)
     db.session.commit()
+    notify_course_changed(course_id)
     
     flash('Course deleted', 'success')
     return redirect(url_for('instructor_dashboard'))
 
-@app.route('/course/<int:course_id>/lesson/create', methods=['GET','POST'])
+@route('/course/<int:course_id>/lesson/create', methods=['GET','POST'])
 @login_required
 def create_lesson(course_id):
     c = Course.query.get_or_404(course_id)
@@ -1844,7 +3720,10 @@ def create_lesson(course_id):
             meeting_url = ''
 
         l = Lesson(course_id=course_id, title=title, content=content, video_url=video_url, meeting_url=meeting_url, start_date=start_date, duration_minutes=duration)
+        l.update_embed()
         db.session.add(l)
+        adjust_course_counters(course_id, lesson_count=1)
+        refresh_course_progress(course_id)
         db.session.commit()
         
         # Save learning outcomes
@@ -1869,13 +3748,15 @@ def create_lesson(course_id):
                 )
                 db.session.add(skill)
         
+        bump_course_version(course_id)
         db.session.commit()
+        notify_course_changed(course_id)
         
         flash('Lesson added', 'success')
         return redirect(url_for('course_detail', course_id=course_id))
     return render_template('create_lesson.html', course=c, lesson=None)
 
-@app.route('/course/<int:course_id>/lesson/<int:lesson_id>/edit', methods=['GET','POST'])
+@route('/course/<int:course_id>/lesson/<int:lesson_id>/edit', methods=['GET','POST'])
 @login_required
 def edit_lesson(course_id, lesson_id):
     course = Course.query.get_or_404(course_id)
@@ -1903,6 +3784,7 @@ def edit_lesson(course_id, lesson_id):
         else:
             lesson.video_url = ''
             lesson.meeting_url = ''
+        lesson.update_embed()
 
         # Update learning outcomes - delete old ones and create new ones
         LearningOutcome.query.filter_by(lesson_id=lesson_id).delete()
@@ -1928,7 +3810,9 @@ def edit_lesson(course_id, lesson_id):
                 )
                 db.session.add(skill)
 
+        bump_course_version(course_id)
         db.session.commit()
+        notify_course_changed(course_id)
         flash('Lesson updated', 'success')
         return redirect(url_for('course_detail', course_id=course_id))
     
@@ -1938,7 +3822,7 @@ def edit_lesson(course_id, lesson_id):
     return render_template('create_lesson.html', course=course, lesson=lesson, existing_outcomes=existing_outcomes, existing_skills=existing_skills)
 
 
-@app.route('/course/<int:course_id>/lesson/<int:lesson_id>/delete', methods=['POST'])
+@route('/course/<int:course_id>/lesson/<int:lesson_id>/delete', methods=['POST'])
 @login_required
 def delete_lesson(course_id, lesson_id):
     course = Course.query.get_or_404(course_id)
@@ -1946,13 +3830,18 @@ def delete_lesson(course_id, lesson_id):
     if current_user.role != 'instructor' or course.instructor_id != current_user.id:
         flash('Instructor only', 'error')
         return redirect(url_for('course_detail', course_id=course_id))
+    discount_lesson_progress(course_id, lesson_id)
     LessonProgress.query.filter_by(lesson_id=lesson_id).delete(synchronize_session=False)
     db.session.delete(lesson)
+    adjust_course_counters(course_id, lesson_count=-1)
+    refresh_course_progress(course_id)
+    bump_course_version(course_id)
     db.session.commit()
+    notify_course_changed(course_id)
     flash('Lesson deleted', 'success')
     return redirect(url_for('course_detail', course_id=course_id))
 
-@app.route('/course/<int:course_id>/exercise/manage', methods=['GET', 'POST'])
+@route('/course/<int:course_id>/exercise/manage', methods=['GET', 'POST'])
 @login_required
 def manage_exercise(course_id):
     course = Course.query.get_or_404(course_id)
@@ -1989,14 +3878,17 @@ def manage_exercise(course_id):
                 end_date=end_date
             )
             db.session.add(exercise)
+            course.has_exercise = True
             flash('Latihan created', 'success')
         
+        refresh_course_progress(course_id)
+        bump_course_version(course_id)
         db.session.commit()
         return redirect(url_for('course_detail', course_id=course_id))
 
     return render_template('manage_exercise.html', course=course, exercise=exercise)
 
-@app.route('/course/<int:course_id>/exercise/submit', methods=['GET', 'POST'])
+@route('/course/<int:course_id>/exercise/submit', methods=['GET', 'POST'])
 @login_required
 def submit_exercise(course_id):
     course = Course.query.get_or_404(course_id)
@@ -2023,12 +3915,15 @@ def submit_exercise(course_id):
                     submission_url=submission_url
                 )
                 db.session.add(submission)
+                # Progres hanya dicatat untuk siswa yang terdaftar di kursus ini
+                if Enrollment.query.filter_by(user_id=current_user.id, course_id=course_id).first():
+                    record_enrollment_progress(current_user.id, course, exercise_score=0)
                 db.session.commit()
                 flash('Latihan Anda telah dikirim.', 'success')
 
     return render_template('submit_exercise.html', course=course, submission=submission)
 
-@app.route('/course/<int:course_id>/lesson/<int:lesson_id>/complete', methods=['POST'])
+@route('/course/<int:course_id>/lesson/<int:lesson_id>/complete', methods=['POST'])
 @login_required
 def complete_lesson(course_id, lesson_id):
     lesson = Lesson.query.filter_by(id=lesson_id, course_id=course_id).first_or_404()
@@ -2047,13 +3942,14 @@ def complete_lesson(course_id, lesson_id):
     if not progress:
         progress = LessonProgress(user_id=current_user.id, lesson_id=lesson_id)
         db.session.add(progress)
+        record_enrollment_progress(current_user.id, course, lessons_delta=1)
         db.session.commit()
         flash('Lesson marked as complete', 'success')
     else:
         flash('Lesson already completed', 'success')
     return redirect(url_for('course_detail', course_id=course_id))
 
-@app.route('/course/<int:course_id>/enroll', methods=['POST'])
+@route('/course/<int:course_id>/enroll', methods=['POST'])
 def enroll(course_id):
     course = Course.query.get_or_404(course_id)
     next_page = request.args.get('next')
@@ -2090,11 +3986,13 @@ def enroll(course_id):
 
     enrollment = Enrollment(user_id=current_user.id, course_id=course_id, unlocked=True)
     db.session.add(enrollment)
+    adjust_course_counters(course_id, enrollment_count=1)
+    ensure_enrollment_progress(current_user.id, course)
     db.session.commit()
     flash('Berhasil mendaftar course.', 'success')
     return _redirect_destination()
 
-@app.route('/course/<int:course_id>/unlock', methods=['POST'])
+@route('/course/<int:course_id>/unlock', methods=['POST'])
 @login_required
 def unlock_course(course_id):
     c = Course.query.get_or_404(course_id)
@@ -2107,7 +4005,7 @@ def unlock_course(course_id):
     flash('Unlocked (simulated)', 'success')
     return redirect(url_for('course_detail', course_id=course_id))
 
-@app.route('/course/<int:course_id>/question/add', methods=['GET','POST'])
+@route('/course/<int:course_id>/question/add', methods=['GET','POST'])
 @login_required
 def add_question(course_id):
     course = Course.query.get_or_404(course_id)
@@ -2135,6 +4033,9 @@ def add_question(course_id):
                 continue
             choice = Choice(question_id=question.id, text=text_value, is_correct=(str(idx) == correct_idx))
             db.session.add(choice)
+        adjust_course_counters(course_id, question_count=1)
+        refresh_course_progress(course_id)
+        bump_course_version(course_id)
         db.session.commit()
         flash('Question added', 'success')
         return redirect(url_for('manage_quiz', course_id=course_id))
@@ -2142,7 +4043,7 @@ def add_question(course_id):
     return render_template('add_question.html', course=course, question=None, choices=choices)
 
 
-@app.route('/course/<int:course_id>/quiz/manage', methods=['GET', 'POST'])
+@route('/course/<int:course_id>/quiz/manage', methods=['GET', 'POST'])
 
 
 @login_required
@@ -2213,7 +4114,7 @@ def manage_quiz(course_id):
 
 
 
-@app.route('/course/<int:course_id>/quiz/dates/manage', methods=['GET', 'POST'])
+@route('/course/<int:course_id>/quiz/dates/manage', methods=['GET', 'POST'])
 
 
 @login_required
@@ -2279,6 +4180,8 @@ def manage_quiz_dates(course_id):
 
 
 
+        refresh_course_progress(course_id)
+        bump_course_version(course_id)
         db.session.commit()
 
 
@@ -2294,7 +4197,7 @@ def manage_quiz_dates(course_id):
 
     return render_template('manage_quiz_dates.html', course=course)
 
-@app.route('/course/<int:course_id>/question/<int:question_id>/edit', methods=['GET','POST'])
+@route('/course/<int:course_id>/question/<int:question_id>/edit', methods=['GET','POST'])
 @login_required
 def edit_question(course_id, question_id):
     course = Course.query.get_or_404(course_id)
@@ -2332,6 +4235,7 @@ def edit_question(course_id, question_id):
             else:
                 if choice:
                     db.session.delete(choice)
+        bump_course_version(course_id)
         db.session.commit()
         flash('Question updated', 'success')
         return redirect(url_for('manage_quiz', course_id=course_id))
@@ -2348,7 +4252,7 @@ def edit_question(course_id, question_id):
     current_correct = next((slot['index'] for slot in choice_slots if slot['is_correct']), '1')
     return render_template('add_question.html', course=course, question=question, choices=choice_slots, current_correct=str(current_correct))
 
-@app.route('/course/<int:course_id>/question/<int:question_id>/delete', methods=['POST'])
+@route('/course/<int:course_id>/question/<int:question_id>/delete', methods=['POST'])
 @login_required
 def delete_question(course_id, question_id):
     course = Course.query.get_or_404(course_id)
@@ -2358,66 +4262,77 @@ def delete_question(course_id, question_id):
         return redirect(url_for('course_detail', course_id=course_id))
     Choice.query.filter_by(question_id=question_id).delete(synchronize_session=False)
     db.session.delete(question)
+    adjust_course_counters(course_id, question_count=-1)
+    refresh_course_progress(course_id)
+    bump_course_version(course_id)
     db.session.commit()
     flash('Question deleted', 'success')
     return redirect(url_for('manage_quiz', course_id=course_id))
 
-@app.route('/course/<int:course_id>/quiz', methods=['GET','POST'])
+@route('/course/<int:course_id>/quiz', methods=['GET','POST'])
 @login_required
 def take_quiz(course_id):
     c = Course.query.get_or_404(course_id)
-    e = Enrollment.query.filter_by(user_id=current_user.id, course_id=course_id).first()
-    if not e or (c.is_premium and not e.unlocked):
-        flash('Enroll and unlock first', 'error')
+    # Check enrollment, attempt limit, and remaining attempts (sekali per request, juga untuk POST)
+    denied, remaining_attempts = quiz_access(c)
+    if denied:
+        flash(denied, 'error')
         return redirect(url_for('course_detail', course_id=course_id))
-    qs = Question.query.filter_by(course_id=course_id).all()
-    
-    # Check attempt limit and calculate remaining attempts
-    attempt_count = 0
-    remaining_attempts = 0
-    if current_user.role == 'student':
-        attempt_count = Attempt.query.filter_by(user_id=current_user.id, course_id=course_id).count()
-        # If attempt_limit > 0 (not unlimited) and user has reached the limit
-        if c.attempt_limit > 0:
-            remaining_attempts = c.attempt_limit - attempt_count
-            if attempt_count >= c.attempt_limit:
-                flash(f'Anda sudah mencapai batas maksimal percobaan ({c.attempt_limit}x).', 'error')
-                return redirect(url_for('course_detail', course_id=course_id))
 
     if request.method == 'POST':
-        # Double check on POST
-        if current_user.role == 'student':
-            attempt_count = Attempt.query.filter_by(user_id=current_user.id, course_id=course_id).count()
-            if c.attempt_limit > 0 and attempt_count >= c.attempt_limit:
-                flash(f'Anda sudah mencapai batas maksimal percobaan ({c.attempt_limit}x).', 'error')
-                return redirect(url_for('course_detail', course_id=course_id))
-        
-        correct = 0
-        total = len(qs)
-        for q in qs:
-            chosen = request.form.get(f"q_{q.id}")
-            if not chosen:
-                continue
-            ch = Choice.query.get(int(chosen))
-            if ch and ch.is_correct:
-                correct += 1
-        score = int((correct/total)*100) if total else 0
+        # Kunci jawaban dari cache per versi kursus; penilaian tidak menyentuh database
+        answer_key = get_quiz_answer_key(course_id, c.content_version)
+        _correct, _total, score, responses = grade_quiz(answer_key, request.form)
         # Use dynamic passing_grade instead of hardcoded 60
         passing_grade = c.passing_grade if c.passing_grade else 100
         passed = score >= passing_grade
-        att = Attempt(user_id=current_user.id, course_id=course_id, score=score, passed=passed)
+        att = Attempt(user_id=current_user.id, course_id=course_id, score=score, passed=passed,
+                      answers=pack_answers(responses))
         db.session.add(att)
+        record_enrollment_progress(current_user.id, c, quiz_score=score)
+        # Batas percobaan ditegakkan atomik di attempt_summary (aman untuk kiriman bersamaan)
+        attempt_limit = (c.attempt_limit or 0) if current_user.role == 'student' else 0
+        if not record_quiz_attempt(att, attempt_limit=attempt_limit):
+            db.session.rollback()
+            flash(f'Anda sudah mencapai batas maksimal percobaan ({attempt_limit}x).', 'error')
+            return redirect(url_for('course_detail', course_id=course_id))
         db.session.commit()
         flash(f'Quiz submitted. Score: {score}', 'success')
         return redirect(url_for('course_detail', course_id=course_id))
-    # GET
-    data = []
-    for q in qs:
-        choices = Choice.query.filter_by(question_id=q.id).all()
-        data.append({'id': q.id, 'text': q.text, 'choices': choices})
-    return render_template('quiz.html', course=c, questions=data, remaining_attempts=remaining_attempts)
+    # GET: soal dan pilihan dari payload ter-cache (satu query saat cache dingin)
+    _payload_json, payload = get_quiz_payload(course_id, c.content_version)
+    return render_template('quiz.html', course=c, questions=payload['questions'], remaining_attempts=remaining_attempts)
 
-@app.route('/course/<int:course_id>/certificate/download')
+@route('/course/<int:course_id>/quiz.json')
+@login_required
+def quiz_json(course_id):
+    """Soal kuis dalam JSON ringkas (tanpa kunci jawaban) agar klien bisa merender kuis sendiri."""
+    course = db.session.get(Course, course_id)
+    if course is None:
+        return jsonify({'error': 'Kursus tidak ditemukan'}), 404
+    denied, _remaining_attempts = quiz_access(course)
+    if denied:
+        return jsonify({'error': denied}), 403
+    cached = not_modified(make_etag('quiz.json', course_id, course.content_version), course.updated_at)
+    if cached is not None:
+        return cached
+    payload_json, _payload = get_quiz_payload(course_id, course.content_version)
+    return current_app.response_class(payload_json, mimetype='application/json')
+
+@route('/course/<int:course_id>/quiz/analysis')
+@login_required
+def quiz_analysis(course_id):
+    course = Course.query.get_or_404(course_id)
+    if current_user.role != 'instructor' or course.instructor_id != current_user.id:
+        flash('Instructor only', 'error')
+        return redirect(url_for('course_detail', course_id=course_id))
+    if load_numpy() is None:
+        flash('Analisis butir soal membutuhkan paket numpy.', 'error')
+        return redirect(url_for('manage_quiz', course_id=course_id))
+    report = get_item_analysis(course_id, course.content_version)
+    return render_template('quiz_analysis.html', course=course, report=report)
+
+@route('/course/<int:course_id>/certificate/download')
 @login_required
 def download_certificate(course_id):
     course = Course.query.get_or_404(course_id)
@@ -2429,118 +4344,156 @@ def download_certificate(course_id):
         flash('Daftar course terlebih dahulu.', 'error')
         return redirect(url_for('course_detail', course_id=course_id))
 
-    # Check for exercise submission and score
-    exercise = Exercise.query.filter_by(course_id=course_id).first()
-    if exercise:
-        exercise_submission = ExerciseSubmission.query.filter_by(user_id=current_user.id, course_id=course_id).first()
-        if not exercise_submission or exercise_submission.score is None or exercise_submission.score <= 0:
-            flash('Anda harus menyelesaikan latihan dan mendapatkan skor sebelum mengunduh sertifikat.', 'error')
-            return redirect(url_for('course_detail', course_id=course_id))
-    else:
+    # Syarat sertifikat dibaca dari enrollment_progress (satu baris per pendaftaran)
+    progress = get_enrollment_progress(current_user.id, course)
+
+    if not course.has_exercise:
         # If no exercise is defined for the course, this condition is considered met.
         # Flash a message to clarify this behavior to the user.
         flash('Tidak ada latihan yang ditentukan untuk kursus ini, sehingga penyelesaian latihan tidak diperlukan untuk sertifikat.', 'info')
-
-    attempt = Attempt.query.filter_by(user_id=current_user.id, course_id=course_id).order_by(Attempt.id.desc()).first()
-    passing_grade = course.passing_grade if course.passing_grade else 100
-    if not attempt or attempt.score < passing_grade:
-        flash(f'Dapatkan skor minimal {passing_grade} pada kuis terlebih dahulu sebelum mengunduh sertifikat.', 'error')
-        return redirect(url_for('course_detail', course_id=course_id))
-
-    # Check for all lessons completed
-    lessons = Lesson.query.filter_by(course_id=course_id).all()
-    total_lessons = len(lessons)
-    completed_lessons_count = LessonProgress.query.filter_by(user_id=current_user.id).join(Lesson).filter(Lesson.course_id == course_id).count()
-
-    if total_lessons > 0 and completed_lessons_count < total_lessons:
-        flash('Anda harus menyelesaikan semua materi pelajaran sebelum mengunduh sertifikat.', 'error')
+    reason = certificate_block_reason(course, progress)
+    if reason is not None:
+        flash(reason, 'error')
         return redirect(url_for('course_detail', course_id=course_id))
 
-    background_path = Path(app.root_path) / 'file_pendukung' / 'sertifikat' / 'docx' / 'template Sertifikat LMS.png'
-    if not background_path.exists():
+    if not certificate_template_path().exists():
         flash('Template sertifikat tidak ditemukan.', 'error')
         return redirect(url_for('course_detail', course_id=course_id))
 
-    if Image is None or ImageDraw is None or ImageFont is None:
-        app.logger.error('Pillow belum tersedia untuk membuat sertifikat.')
-        flash('Pustaka gambar belum tersedia. Hubungi administrator.', 'error')
-        return redirect(url_for('course_detail', course_id=course_id))
-
-    student_name = current_user.name
-    instructor_name = course.instructor.name if course.instructor else 'Instruktur'
-    material_type = course.material_type or course.title or 'Program'
-    issued_date = datetime.utcnow().strftime('%d %B %Y')
+    if progress.certificate_issued_at is None:
+        # Siswa yang memenuhi syarat sebelum tanggal terbit dicatat: tetapkan sekarang agar PDF-nya stabil
+        progress.certificate_issued_at = datetime.utcnow()
+        if progress.id is None:
+            db.session.add(progress)
+        db.session.commit()
 
+    inputs = certificate_render_inputs(
+        student_id=current_user.id, student_name=current_user.name, course_id=course.id, course_title=course.title,
+        material_type=course.material_type, instructor_name=course.instructor.name if course.instructor else None,
+        issued_at=progress.certificate_issued_at)
     try:
-        pdf_buffer = build_certificate_pdf(
-            background_path=background_path,
-            student_name=student_name,
-            instructor_name=instructor_name,
-            material_type=material_type,
-            course_title=course.title,
-            issued_date=issued_date,
-        )
+        pdf_file = render_certificate(inputs)
     except Exception as exc:  # pragma: no cover - requires runtime environment
-        app.logger.exception('Gagal membuat sertifikat: %s', exc)
+        if load_pillow() is None:
+            current_app.logger.error('Pillow belum tersedia untuk membuat sertifikat.')
+            flash('Pustaka gambar belum tersedia. Hubungi administrator.', 'error')
+            return redirect(url_for('course_detail', course_id=course_id))
+        current_app.logger.exception('Gagal membuat sertifikat: %s', exc)
         flash('Gagal membuat sertifikat.', 'error')
         return redirect(url_for('course_detail', course_id=course_id))
 
     safe_title = ''.join(ch if ch.isalnum() else '_' for ch in course.title).strip('_') or 'course'
     filename = f'Sertifikat_{safe_title}.pdf'
-    pdf_buffer.seek(0)
     return send_file(
-        pdf_buffer,
+        pdf_file,
         as_attachment=True,
         download_name=filename,
         mimetype='application/pdf'
     )
 
-@app.route('/course/<int:course_id>/certificate')
+@route('/course/<int:course_id>/certificate')
 @login_required
 def certificate(course_id):
     c = Course.query.get_or_404(course_id)
-    att = Attempt.query.filter_by(user_id=current_user.id, course_id=course_id, passed=True).order_by(Attempt.id.desc()).first()
-    if not att:
+    passed = (db.session.query(AttemptSummary.passed)
+              .filter(AttemptSummary.user_id == current_user.id, AttemptSummary.course_id == course_id).scalar())
+    if not passed:
         flash('Pass the quiz first', 'error')
         return redirect(url_for('course_detail', course_id=course_id))
     return render_template('certificate.html', user=current_user, course=c, date=datetime.utcnow().date())
 
-# Register Payment Blueprint
-try:
-    from routes.payment_routes import payment_bp
-    app.register_blueprint(payment_bp)
-    app.logger.info('Payment routes registered successfully')
-    print("✓ Payment blueprint registered successfully")
-except Exception as e:
-    import traceback
-    app.logger.error(f'Failed to register payment routes: {str(e)}')
-    app.logger.error(traceback.format_exc())
-    print(f"✗ ERROR REGISTERING PAYMENT ROUTES: {e}")
-    traceback.print_exc()
-
-# Register Cart Payment Blueprint
-try:
-    from routes.cart_payment_routes import cart_payment_bp
-    app.register_blueprint(cart_payment_bp)
-    app.logger.info('Cart payment routes registered successfully')
-    print("✓ Cart payment blueprint registered successfully")
-except Exception as e:
-    import traceback
-    app.logger.error(f'Failed to register cart payment routes: {str(e)}')
-    app.logger.error(traceback.format_exc())
-    print(f"✗ ERROR REGISTERING CART PAYMENT ROUTES: {e}")
-    traceback.print_exc()
-
-# Debug: Print registered routes
-print("\n=== REGISTERED ROUTES ===")
-for rule in app.url_map.iter_rules():
-    if 'payment' in rule.endpoint.lower():
-        print(f"  {rule.endpoint} -> {rule.rule}")
-print("========================\n")
-    
+def register_blueprints(app):
+    """Daftarkan blueprint pembayaran; modul rute baru diimpor saat aplikasi dibuat."""
+    # Register Payment Blueprint
+    try:
+        from routes.payment_routes import payment_bp
+        app.register_blueprint(payment_bp)
+    except Exception:
+        app.logger.exception('Failed to register payment routes')
+
+    # Register Cart Payment Blueprint
+    try:
+        from routes.cart_payment_routes import cart_payment_bp
+        app.register_blueprint(cart_payment_bp)
+    except Exception:
+        app.logger.exception('Failed to register cart payment routes')
+
+    if app.debug:
+        for rule in app.url_map.iter_rules():
+            if 'payment' in rule.endpoint.lower():
+                app.logger.debug('Payment route %s -> %s', rule.endpoint, rule.rule)
+
+def create_app(config=None):
+    """Application factory.
+
+    config boleh berupa dict atau objek konfigurasi; nilainya menimpa default_config().
+    Pillow, midtransclient, dan requests tidak diimpor di sini, melainkan saat pertama dipakai.
+    """
+    app = Flask(__name__)
+    app.config.from_mapping(default_config())
+    if isinstance(config, Mapping):
+        app.config.from_mapping(config)
+    elif config is not None:
+        app.config.from_object(config)
+    # Opsi pool mengikuti URI akhir (misal override ke SQLite pada aplikasi uji)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', build_engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+
+    configure_logging(app)
+
+    db.init_app(app)
+    if app.config['MIGRATIONS_ENABLED']:
+        try:
+            from flask_migrate import Migrate
+        except ImportError:
+            Migrate = None
+        if Migrate:
+            Migrate(app, db)
+    login_manager.init_app(app)
+    app.extensions['user_cache'] = TTLCache(maxsize=app.config['USER_CACHE_SIZE'], ttl=app.config['USER_CACHE_TTL'])
+    app.extensions['course_search'] = {'index': CourseSearchIndex(), 'build_lock': threading.Lock()}
+    app.extensions['homepage_cache'] = TTLCache(maxsize=4, ttl=app.config['HOMEPAGE_CACHE_TTL'])
+    app.extensions['course_view_cache'] = TTLCache(maxsize=app.config['COURSE_VIEW_CACHE_SIZE'], ttl=3600)
+    app.extensions['syllabus_cache'] = TTLCache(maxsize=app.config['COURSE_VIEW_CACHE_SIZE'], ttl=3600)
+    app.extensions['quiz_answer_keys'] = TTLCache(maxsize=app.config['COURSE_VIEW_CACHE_SIZE'], ttl=3600)
+    app.extensions['item_analysis_cache'] = TTLCache(maxsize=app.config['COURSE_VIEW_CACHE_SIZE'], ttl=3600)
+    app.extensions['quiz_payload_cache'] = TTLCache(maxsize=app.config['COURSE_VIEW_CACHE_SIZE'], ttl=3600)
+    app.extensions['certificate_cache'] = CertificateCache(app.config['CERTIFICATE_CACHE_DIR'],
+                                                           app.config['CERTIFICATE_CACHE_MAX_MB'] * 1024 * 1024)
+    app.extensions['certificate_render'] = {'executor': None, 'lock': threading.Lock()}
+    # Font di-resolve sekali per proses; template didekode saat sertifikat pertama dirender
+    app.extensions['certificate_fonts'] = FontRegistry(default_font_directories(app.root_path))
+    app.extensions['certificate_renderers'] = {}
+
+    app.add_template_filter(nl2br_filter, 'nl2br')
+    app.add_template_global(image_sources)
+    load_asset_manifest(app)
+    app.url_defaults(fingerprint_static_url)
+    app.view_functions['static'] = serve_static
+    for rule, view_func, options in _url_rules:
+        app.add_url_rule(rule, view_func=view_func, **options)
+    app.before_request(ensure_schema_checked)
+    app.before_request(start_query_profile)
+    app.before_request(check_instructor_verification)
+    app.after_request(apply_conditional_headers)
+    app.after_request(finish_query_profile)
+    install_query_listeners(_current_query_stats)
+    app.cli.add_command(db_verify_command)
+    app.cli.add_command(reconcile_course_counters_command)
+    app.cli.add_command(rebuild_enrollment_progress_command)
+    app.cli.add_command(rebuild_attempt_summaries_command)
+    app.cli.add_command(backfill_lesson_embeds_command)
+    app.cli.add_command(build_assets_command)
+    app.cli.add_command(backfill_image_variants_command)
+
+    register_blueprints(app)
+    return app
+
 if __name__ == '__main__':
+    # Modul routes memakai "from app import ...": arahkan ke modul ini agar tidak memuat salinan kedua
+    # (dengan db yang tidak pernah di-init_app) saat dijalankan lewat "python app.py"
+    sys.modules.setdefault('app', sys.modules[__name__])
+    app = create_app()
+    with app.app_context():
+        bootstrap_schema()
     is_debug = os.getenv('FLASK_DEBUG', 'False').lower() in ['true', '1', 't']
     app.run(debug=is_debug, use_reloader=False)
-
-
-
@@ -0,0 +1,157 @@
+"""Benchmark halaman katalog: objek ORM lengkap vs read model berkolom (namedtuple).
+
+Mengisi katalog N kursus (default 10.000) dengan deskripsi panjang dan ratusan instruktur,
+lalu untuk satu halaman katalog (dan halaman besar sebagai pembanding) mengukur latensi
+serta memori (puncak alokasi dan yang masih dipegang hasilnya, lewat tracemalloc) untuk:
+  - orm lengkap : Course + joinedload(instructor) + description (perilaku lama)
+  - orm deferred: sama, tetapi kolom Text besar di-defer (default model sekarang)
+  - read model  : course_card_query() -> CourseCard (yang dipakai route sekarang)
+Ditambah latensi end-to-end GET /courses melalui test client.
+
+Contoh:
+    python benchmarks/bench_catalog_read_models.py
+    python benchmarks/bench_catalog_read_models.py --courses 10000 --page-size 24 --large-page 1000
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+MATERIAL_TYPES = ['Microsoft Word', 'Microsoft Excel', 'Microsoft PowerPoint', 'Microsoft Access', 'Microsoft Outlook']
+WORDS = ['excel', 'pivot', 'tabel', 'rumus', 'laporan', 'dokumen', 'presentasi', 'makro', 'grafik', 'data',
+         'analisis', 'kantor', 'dasar', 'lanjutan', 'otomatisasi', 'formulir', 'dashboard', 'desain']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--courses', type=int, default=10000)
+    parser.add_argument('--instructors', type=int, default=200)
+    parser.add_argument('--description-words', type=int, default=400, help='Panjang deskripsi per kursus (kata).')
+    parser.add_argument('--page-size', type=int, default=12, help='Ukuran halaman katalog (COURSES_PAGE_SIZE).')
+    parser.add_argument('--large-page', type=int, default=1000, help='Ukuran halaman besar sebagai pembanding.')
+    parser.add_argument('--repeat', type=int, default=50, help='Jumlah pengulangan per skenario.')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--database-uri', default=None, help='Default: SQLite sementara.')
+    return parser.parse_args()
+
+
+def seed(module, args):
+    db = module.db
+    rng = random.Random(args.seed)
+    instructors = [{'name': f'Instruktur {idx}', 'email': f'bench-instructor{idx}@example.com',
+                    'password_hash': 'x', 'role': 'instructor', 'expertise': 'Microsoft Office',
+                    'institution': 'Lembaga Contoh', 'teaching_experience': idx % 20,
+                    'certificate_type': 'link', 'certificate_data': f'https://example.com/cert/{idx}'}
+                   for idx in range(args.instructors)]
+    db.session.execute(db.insert(module.User), instructors)
+    instructor_ids = [user_id for (user_id,) in db.session.query(module.User.id)]
+    courses = []
+    for idx in range(args.courses):
+        courses.append({
+            'title': f'{" ".join(rng.choices(WORDS, k=3)).title()} {idx}',
+            'description': ' '.join(rng.choices(WORDS, k=args.description_words)),
+            'instructor_id': rng.choice(instructor_ids),
+            'material_type': rng.choice(MATERIAL_TYPES),
+            'is_premium': rng.random() < 0.4,
+            'price': rng.choice([0, 50000, 99000, 149000]),
+            'thumbnail_path': f'uploads/thumbnails/course-{idx}.jpg',
+            'lesson_count': 8,
+        })
+    db.session.execute(db.insert(module.Course), courses)
+    db.session.commit()
+
+
+def measure(func, repeat, reset):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        reset()
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    reset()
+    tracemalloc.start()
+    result = func()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(result)
+    del result
+    return {
+        'mean': statistics.fmean(samples),
+        'p50': samples[len(samples) // 2],
+        'p95': samples[max(int(len(samples) * 0.95) - 1, 0)],
+        'peak_kb': peak / 1024,
+        'retained_kb': retained / 1024,
+        'rows': count,
+    }
+
+
+def main():
+    args = parse_args()
+    database_uri = args.database_uri
+    if not database_uri:
+        tmpdir = tempfile.mkdtemp(prefix='lms-bench-')
+        database_uri = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    import app as module
+    from sqlalchemy.orm import joinedload, undefer
+
+    Course = module.Course
+    application = module.create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'SECRET_KEY': 'bench',
+                                     'SEARCH_INDEX_REFRESH': 0, 'QUERY_PROFILING': False,
+                                     'COURSES_PAGE_SIZE': args.page_size})
+    with application.app_context():
+        module.bootstrap_schema('create', force=True)
+        started = time.perf_counter()
+        seed(module, args)
+        print(f'Katalog: {args.courses} kursus, {args.instructors} instruktur, deskripsi ~{args.description_words} kata '
+              f'| seed {time.perf_counter() - started:.1f} s')
+
+        all_ids = [course_id for (course_id,) in module.db.session.query(Course.id).order_by(Course.id.desc())]
+
+        def reset():
+            # Sesi baru setiap iterasi: identity map kosong seperti di awal request
+            module.db.session.remove()
+
+        def scenarios(ids):
+            return {
+                'orm lengkap': lambda: Course.query.options(joinedload(Course.instructor), undefer(Course.description))
+                                             .filter(Course.id.in_(ids)).all(),
+                'orm deferred': lambda: Course.query.options(joinedload(Course.instructor))
+                                              .filter(Course.id.in_(ids)).all(),
+                'read model': lambda: module.load_course_cards(module.course_card_query().where(Course.id.in_(ids))),
+            }
+
+        print(f'\n{"halaman":<10} {"skenario":<14} {"mean ms":>9} {"p50 ms":>9} {"p95 ms":>9} '
+              f'{"puncak KiB":>11} {"dipegang KiB":>13} {"baris":>6}')
+        for label, size in (('katalog', args.page_size), ('besar', args.large_page)):
+            ids = all_ids[:size]
+            for name, func in scenarios(ids).items():
+                func()  # warm-up: cache statement SQLAlchemy
+                stats = measure(func, args.repeat, reset)
+                print(f'{label:<10} {name:<14} {stats["mean"]:>9.2f} {stats["p50"]:>9.2f} {stats["p95"]:>9.2f} '
+                      f'{stats["peak_kb"]:>11.1f} {stats["retained_kb"]:>13.1f} {stats["rows"]:>6}')
+
+    client = application.test_client()
+    client.get('/courses')
+    samples = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        response = client.get('/courses')
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200
+    samples.sort()
+    print(f'\nGET /courses (anonim, {args.page_size} kartu): mean {statistics.fmean(samples):.2f} ms '
+          f'| p95 {samples[max(int(len(samples) * 0.95) - 1, 0)]:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
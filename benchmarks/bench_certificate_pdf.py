@@ -0,0 +1,109 @@
+"""Perbandingan PDF sertifikat raster vs vektor: ukuran file, waktu render, dan teks yang bisa dipilih.
+
+  - raster : CertificateRenderer, seluruh sertifikat digambar Pillow lalu disimpan sebagai satu gambar
+  - vektor : VectorCertificateRenderer, template JPEG (dikodekan sekali) + teks PDF font standar
+Keduanya dalam keadaan hangat (template dan font sudah di memori). Kolom "teks" memeriksa
+apakah nama siswa bisa ditemukan sebagai teks di content stream PDF (bisa dipilih/dicari).
+
+Contoh:
+    python benchmarks/bench_certificate_pdf.py
+    python benchmarks/bench_certificate_pdf.py --renders 100 --output-dir /tmp/sertifikat --min-size-ratio 1.5
+"""
+import argparse
+import re
+import sys
+import time
+import zlib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from services.certificate_pdf import VectorCertificateRenderer  # noqa: E402
+from services.certificate_render import CertificateRenderer, FontRegistry, default_font_directories  # noqa: E402
+
+TEMPLATE = ROOT / 'file_pendukung' / 'sertifikat' / 'docx' / 'template Sertifikat LMS.png'
+FLATE_STREAM_RE = re.compile(rb'/Filter /FlateDecode /Length (\d+) >>\nstream\n')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--renders', type=int, default=40, help='Jumlah render per renderer.')
+    parser.add_argument('--template', default=str(TEMPLATE))
+    parser.add_argument('--output-dir', default=None, help='Simpan contoh PDF kedua renderer di folder ini.')
+    parser.add_argument('--min-size-ratio', type=float, default=None,
+                        help='Exit code 1 bila PDF raster kurang dari N kali ukuran PDF vektor.')
+    return parser.parse_args()
+
+
+def render_kwargs(idx):
+    return {
+        'student_name': f'Siswa Contoh {idx}',
+        'instructor_name': 'Instruktur Contoh',
+        'material_type': 'Microsoft Excel',
+        'course_title': 'Excel untuk Administrasi Perkantoran dan Laporan Keuangan',
+        'issued_date': '18 October 2026',
+    }
+
+
+def has_selectable_text(pdf, text):
+    needle = b'(' + text.encode('cp1252') + b')'
+    for match in FLATE_STREAM_RE.finditer(pdf):
+        length = int(match.group(1))
+        try:
+            content = zlib.decompress(pdf[match.end():match.end() + length])
+        except zlib.error:
+            continue
+        if needle in content:
+            return True
+    return False
+
+
+def measure(renderer, count):
+    sizes = []
+    started = time.perf_counter()
+    for idx in range(count):
+        sizes.append(len(renderer.render(**render_kwargs(idx)).getvalue()))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    sample = renderer.render(**render_kwargs(0)).getvalue()
+    return {
+        'bytes': sum(sizes) / count,
+        'ms': elapsed_ms / count,
+        'text': has_selectable_text(sample, render_kwargs(0)['student_name']),
+        'sample': sample,
+    }
+
+
+def main():
+    args = parse_args()
+    template = Path(args.template)
+    renderers = {
+        'raster': CertificateRenderer(template, FontRegistry(default_font_directories(ROOT))),
+        'vektor': VectorCertificateRenderer(template),
+    }
+    results = {}
+    print(f'{"renderer":<10} {"render":>7} {"rata bytes":>11} {"ms/render":>10} {"render/s":>9} {"teks":>6}')
+    for name, renderer in renderers.items():
+        renderer.render(**render_kwargs(0))  # warm-up: dekode template, muat font
+        stats = results[name] = measure(renderer, args.renders)
+        print(f'{name:<10} {args.renders:>7} {stats["bytes"]:>11.0f} {stats["ms"]:>10.2f} {1000 / stats["ms"]:>9.1f} '
+              f'{"ya" if stats["text"] else "tidak":>6}')
+
+    size_ratio = results['raster']['bytes'] / results['vektor']['bytes']
+    speedup = results['raster']['ms'] / results['vektor']['ms']
+    print(f'\nvektor {size_ratio:.1f}x lebih kecil dan {speedup:.1f}x lebih cepat dari raster')
+
+    if args.output_dir:
+        output_dir = Path(args.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for name, stats in results.items():
+            (output_dir / f'sertifikat-{name}.pdf').write_bytes(stats['sample'])
+        print(f'Contoh PDF disimpan di {output_dir}')
+
+    if args.min_size_ratio is not None and size_ratio < args.min_size_ratio:
+        sys.stderr.write(f'Rasio ukuran {size_ratio:.2f} di bawah batas {args.min_size_ratio:.2f}\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
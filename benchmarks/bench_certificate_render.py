@@ -0,0 +1,89 @@
+"""Microbenchmark render sertifikat PDF: render per detik, satu thread dan thread pool.
+
+Skenario:
+  - dingin : registry font dan template baru untuk setiap render (perilaku lama: probe
+             folder font dan dekode template PNG di setiap unduhan)
+  - hangat : satu CertificateRenderer dipakai bersama (font dan template sudah di memori)
+  - hangat xN: renderer yang sama dipanggil dari N thread sekaligus
+Setiap skenario juga memeriksa bahwa ukuran setiap PDF sama dengan hasil render satu thread
+untuk data yang sama (render paralel tidak saling merusak kanvas atau font).
+
+Contoh:
+    python benchmarks/bench_certificate_render.py
+    python benchmarks/bench_certificate_render.py --renders 100 --threads 2 4 8 --min-rps 5
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from services.certificate_render import CertificateRenderer, FontRegistry, default_font_directories  # noqa: E402
+
+TEMPLATE = ROOT / 'file_pendukung' / 'sertifikat' / 'docx' / 'template Sertifikat LMS.png'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--renders', type=int, default=40, help='Jumlah render per skenario.')
+    parser.add_argument('--threads', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--template', default=str(TEMPLATE))
+    parser.add_argument('--min-rps', type=float, default=None,
+                        help='Exit code 1 bila skenario hangat (1 thread) di bawah render/detik ini.')
+    return parser.parse_args()
+
+
+def render_kwargs(idx):
+    return {
+        'student_name': f'Siswa Contoh {idx}',
+        'instructor_name': 'Instruktur Contoh',
+        'material_type': 'Microsoft Excel',
+        'course_title': 'Excel untuk Administrasi Perkantoran dan Laporan Keuangan',
+        'issued_date': '18 October 2026',
+    }
+
+
+def run(label, render, count, threads=1, reference=None):
+    started = time.perf_counter()
+    if threads == 1:
+        sizes = [len(render(idx).getvalue()) for idx in range(count)]
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            sizes = [len(buffer.getvalue()) for buffer in executor.map(render, range(count))]
+    elapsed = time.perf_counter() - started
+    rps = count / elapsed
+    consistent = '-' if reference is None else ('ya' if sizes == reference else 'TIDAK')
+    print(f'{label:<14} {count:>7} {elapsed * 1000 / count:>10.1f} {rps:>9.1f} {sum(sizes) // count:>10} {consistent:>9}')
+    return rps, sizes
+
+
+def main():
+    args = parse_args()
+    directories = default_font_directories(ROOT)
+    template = Path(args.template)
+
+    def cold(idx):
+        return CertificateRenderer(template, FontRegistry(directories)).render(**render_kwargs(idx))
+
+    shared = CertificateRenderer(template, FontRegistry(directories))
+
+    def warm(idx):
+        return shared.render(**render_kwargs(idx))
+
+    warm(0)  # dekode template + muat font di thread utama
+    print(f'{"skenario":<14} {"render":>7} {"ms/render":>10} {"render/s":>9} {"rata bytes":>10} {"konsisten":>9}')
+    warm_rps, reference = run('hangat', warm, args.renders)
+    run('dingin', cold, args.renders, reference=reference)
+    for threads in args.threads:
+        run(f'hangat x{threads}', warm, args.renders, threads=threads, reference=reference)
+
+    if args.min_rps is not None and warm_rps < args.min_rps:
+        sys.stderr.write(f'{warm_rps:.1f} render/s di bawah batas {args.min_rps:.1f}\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Benchmark halaman detail kursus: bagian publik ter-cache + overlay per user.
+
+Mengisi satu kursus "populer" (banyak materi dengan video YouTube, soal kuis, latihan,
+dan siswa terdaftar), lalu mengukur waktu server dan jumlah query /course/<id> untuk
+pengunjung anonim dan siswa, dengan cache bagian publik dingin (dibuang setiap request)
+dan hangat, serta revalidasi ETag (304).
+
+Contoh:
+    python benchmarks/bench_course_detail.py
+    python benchmarks/bench_course_detail.py --lessons 60 --requests 500 --max-p95-ms 10
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lessons', type=int, default=30, help='Jumlah materi pada kursus.')
+    parser.add_argument('--questions', type=int, default=20, help='Jumlah soal kuis.')
+    parser.add_argument('--requests', type=int, default=300, help='Jumlah request per skenario.')
+    parser.add_argument('--database-uri', default=None, help='Default: SQLite sementara.')
+    parser.add_argument('--max-p95-ms', type=float, default=None,
+                        help='Exit code 1 bila p95 skenario siswa (cache hangat) melebihi batas ini.')
+    return parser.parse_args()
+
+
+def seed(module, lesson_count, question_count):
+    db = module.db
+    instructor = module.User(name='Bench Instructor', email='bench-instructor@example.com', role='instructor',
+                             certificate_type='link', certificate_data='https://example.com/cert')
+    student = module.User(name='Bench Student', email='bench-student@example.com', role='student')
+    for user in (instructor, student):
+        user.set_password('secret')
+        db.session.add(user)
+    db.session.flush()
+
+    course = module.Course(title='Excel Populer', description='Kursus contoh dengan banyak materi',
+                           instructor_id=instructor.id, material_type='Microsoft Excel',
+                           lesson_count=lesson_count, question_count=question_count, has_exercise=True)
+    db.session.add(course)
+    db.session.flush()
+    lessons = []
+    for idx in range(lesson_count):
+        lesson = module.Lesson(course_id=course.id, title=f'Materi {idx}', content='Isi materi ' * 50,
+                               video_url=f'https://www.youtube.com/watch?v=vid{idx:05d}&t={idx}s')
+        db.session.add(lesson)
+        lessons.append(lesson)
+    for idx in range(question_count):
+        question = module.Question(course_id=course.id, text=f'Soal {idx}')
+        db.session.add(question)
+        db.session.flush()
+        for choice_idx in range(4):
+            db.session.add(module.Choice(question_id=question.id, text=f'Pilihan {choice_idx}', is_correct=choice_idx == 0))
+    db.session.add(module.Exercise(course_id=course.id, name='Latihan', exercise_url='https://example.com/latihan'))
+    db.session.add(module.Enrollment(user_id=student.id, course_id=course.id, unlocked=True))
+    db.session.flush()
+    for lesson in lessons[: lesson_count // 2]:
+        db.session.add(module.LessonProgress(user_id=student.id, lesson_id=lesson.id))
+    db.session.add(module.Attempt(user_id=student.id, course_id=course.id, score=70, passed=False))
+    db.session.flush()
+    module.ensure_enrollment_progress(student.id, course)
+    db.session.commit()
+    return course.id
+
+
+def measure(client, path, count, *, before=None, headers=None, expect=200):
+    samples = []
+    for _ in range(count):
+        if before:
+            before()
+        started = time.perf_counter()
+        response = client.get(path, headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == expect, (path, response.status_code)
+    samples.sort()
+    return {
+        'mean': statistics.fmean(samples),
+        'p50': samples[len(samples) // 2],
+        'p95': samples[max(int(len(samples) * 0.95) - 1, 0)],
+    }
+
+
+def main():
+    args = parse_args()
+    database_uri = args.database_uri
+    if not database_uri:
+        tmpdir = tempfile.mkdtemp(prefix='lms-bench-')
+        database_uri = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    import app as module
+    from sqlalchemy import event
+
+    application = module.create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'SECRET_KEY': 'bench',
+                                     'SEARCH_INDEX_REFRESH': 0})
+    with application.app_context():
+        module.bootstrap_schema('create', force=True)
+        course_id = seed(module, args.lessons, args.questions)
+        engine = module.db.engine
+
+    query_count = {'n': 0}
+    event.listen(engine, 'before_cursor_execute', lambda *_args: query_count.__setitem__('n', query_count['n'] + 1))
+    view_cache = application.extensions['course_view_cache']
+
+    anonymous = application.test_client()
+    student = application.test_client()
+    student.post('/login', data={'email': 'bench-student@example.com', 'password': 'secret'})
+    path = f'/course/{course_id}'
+    student.get(path)
+    etag = student.get(path).headers['ETag']
+
+    scenarios = [
+        ('anonim, cache dingin', anonymous, {'before': view_cache.clear}),
+        ('anonim, cache hangat', anonymous, {}),
+        ('siswa, cache dingin', student, {'before': view_cache.clear}),
+        ('siswa, cache hangat', student, {}),
+        ('siswa, 304 (ETag)', student, {'headers': {'If-None-Match': etag}, 'expect': 304}),
+    ]
+    print(f'Kursus: {args.lessons} materi, {args.questions} soal | {args.requests} request per skenario')
+    print(f'{"skenario":<24} {"mean ms":>9} {"p50 ms":>9} {"p95 ms":>9} {"query/req":>10}')
+    results = {}
+    for label, client, options in scenarios:
+        client.get(path, headers=options.get('headers'))  # warm-up
+        query_count['n'] = 0
+        stats = measure(client, path, args.requests, **options)
+        results[label] = stats
+        print(f'{label:<24} {stats["mean"]:>9.2f} {stats["p50"]:>9.2f} {stats["p95"]:>9.2f} '
+              f'{query_count["n"] / args.requests:>10.1f}')
+
+    warm_p95 = results['siswa, cache hangat']['p95']
+    if args.max_p95_ms is not None and warm_p95 > args.max_p95_ms:
+        sys.stderr.write(f'p95 siswa (cache hangat) {warm_p95:.2f} ms melebihi batas {args.max_p95_ms:.2f} ms\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
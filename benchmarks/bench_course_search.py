@@ -0,0 +1,147 @@
+"""Benchmark pencarian kursus: indeks in-process (services/search_index.py) pada katalog sintetis.
+
+Membangun katalog N kursus (default 50.000) dengan judul, deskripsi, jenis materi, dan
+judul materi acak berdistribusi Zipf-Mandelbrot, lalu mengukur waktu build, latensi query
+(persis, multi-kata, prefix, salah ketik, dengan filter) dan pembaruan inkremental.
+Sebagai pembanding, "scan" mengulang perilaku lama: substring pada judul saja.
+
+Contoh:
+    python benchmarks/bench_course_search.py
+    python benchmarks/bench_course_search.py --courses 50000 --repeat 200 --max-p95-ms 50
+"""
+import argparse
+import itertools
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from services.search_index import CourseSearchIndex  # noqa: E402
+
+MATERIAL_TYPES = ['Microsoft Word', 'Microsoft Excel', 'Microsoft PowerPoint', 'Microsoft Access', 'Microsoft Outlook']
+CORE_WORDS = [
+    'excel', 'word', 'powerpoint', 'pivot', 'table', 'rumus', 'fungsi', 'vlookup', 'grafik', 'chart', 'makro',
+    'presentasi', 'dokumen', 'laporan', 'keuangan', 'administrasi', 'kantor', 'dasar', 'lanjutan', 'mahir',
+    'pemula', 'template', 'animasi', 'transisi', 'mail', 'merge', 'formulir', 'database', 'query', 'otomatisasi',
+    'analisis', 'data', 'dashboard', 'format', 'tabel', 'slide', 'desain', 'tipografi', 'kolaborasi', 'email',
+]
+ZIPF_SHIFT = 10
+
+QUERIES = {
+    'satu kata': 'excel',
+    'multi kata': 'pivot table excel',
+    'prefix': 'otomat',
+    'salah ketik': 'pivto tabel',
+    'salah ketik 2': 'presentsi animsi',
+    'kata jarang': 'vlookup dashboard makro',
+    'tidak ada': 'kriptografi kuantum',
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--courses', type=int, default=50000)
+    parser.add_argument('--lessons', type=int, default=8, help='Jumlah materi per kursus.')
+    parser.add_argument('--repeat', type=int, default=100, help='Jumlah pengulangan per query.')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--max-p95-ms', type=float, default=None,
+                        help='Exit code 1 bila p95 salah satu query melebihi batas ini.')
+    return parser.parse_args()
+
+
+def build_vocabulary(rng, size=20000):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = list(CORE_WORDS)
+    while len(words) < size:
+        words.append(''.join(rng.choice(letters) for _ in range(rng.randint(4, 10))))
+    # Zipf-Mandelbrot (q=10): frekuensi kata mirip teks nyata setelah stopword dibuang.
+    cum_weights = list(itertools.accumulate(1 / (rank + 1 + ZIPF_SHIFT) for rank in range(len(words))))
+    return words, cum_weights
+
+
+def generate_documents(count, lessons_per_course, rng):
+    words, cum_weights = build_vocabulary(rng)
+
+    def phrase(length):
+        return ' '.join(rng.choices(words, cum_weights=cum_weights, k=length))
+
+    for course_id in range(1, count + 1):
+        yield {
+            'id': course_id,
+            'title': phrase(rng.randint(3, 6)).title(),
+            'description': phrase(rng.randint(20, 40)),
+            'material_type': rng.choice(MATERIAL_TYPES),
+            'lessons': [phrase(rng.randint(2, 5)) for _ in range(lessons_per_course)],
+            'instructor_id': rng.randint(1, 200),
+            'is_premium': rng.random() < 0.4,
+        }
+
+
+def timed(func, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'mean': statistics.fmean(samples),
+        'p50': samples[len(samples) // 2],
+        'p95': samples[max(int(len(samples) * 0.95) - 1, 0)],
+        'max': samples[-1],
+        'hits': len(result),
+    }
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    documents = list(generate_documents(args.courses, args.lessons, rng))
+
+    index = CourseSearchIndex()
+    started = time.perf_counter()
+    index.build(documents)
+    build_ms = (time.perf_counter() - started) * 1000
+    print(f'Katalog: {args.courses} kursus x {args.lessons} materi | build indeks: {build_ms:.0f} ms '
+          f'| {index.vocabulary_size} token unik')
+
+    titles = [(document['id'], document['title'].lower()) for document in documents]
+    enrolled = {document['id'] for document in rng.sample(documents, 50)}
+    scenarios = {}
+    for label, query in QUERIES.items():
+        scenarios[label] = lambda query=query: index.search(query, limit=500)
+    scenarios['filter jenis+premium'] = lambda: index.search('excel rumus', material_type='Microsoft Excel',
+                                                             is_premium=True, limit=500)
+    scenarios['my-courses (50 kursus)'] = lambda: index.search('excel', restrict_to=enrolled)
+    scenarios['scan judul (lama)'] = lambda: [course_id for course_id, title in titles if 'pivot table' in title]
+
+    print(f'\n{"skenario":<26} {"mean ms":>9} {"p50 ms":>9} {"p95 ms":>9} {"max ms":>9} {"hasil":>7}')
+    worst_p95 = 0.0
+    for label, func in scenarios.items():
+        func()  # warm-up
+        stats = timed(func, args.repeat)
+        if label != 'scan judul (lama)':
+            worst_p95 = max(worst_p95, stats['p95'])
+        print(f'{label:<26} {stats["mean"]:>9.2f} {stats["p50"]:>9.2f} {stats["p95"]:>9.2f} '
+              f'{stats["max"]:>9.2f} {stats["hits"]:>7}')
+
+    updates = documents[:200]
+    started = time.perf_counter()
+    for document in updates:
+        index.add_document(dict(document, title=document['title'] + ' Revisi'))
+    update_ms = (time.perf_counter() - started) * 1000 / len(updates)
+    after_update = timed(lambda: index.search('pivot table excel', limit=500), args.repeat)
+    print(f'\npembaruan inkremental: {update_ms:.3f} ms/kursus | query setelah pembaruan p95: {after_update["p95"]:.2f} ms')
+
+    if args.max_p95_ms is not None and worst_p95 > args.max_p95_ms:
+        sys.stderr.write(f'p95 terburuk {worst_p95:.2f} ms melebihi batas {args.max_p95_ms:.2f} ms\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""Benchmark analisis butir soal: laporan kuis atas ratusan ribu attempt dengan jawaban ter-pack.
+
+Mengisi satu kursus dengan N soal (4 pilihan) dan A attempt sintetis (kemampuan siswa acak,
+sebagian soal dilewati, satu soal dengan pengecoh yang menyesatkan, satu soal baru yang tidak
+ada di attempt awal), lalu mengukur:
+  1. loop Python   : tingkat kesulitan, daya beda, dan frekuensi pilihan per attempt/soal
+  2. NumPy         : analyze_items() atas blob yang sama (hasil dibandingkan dengan loop Python)
+  3. laporan       : get_item_analysis() dingin (query + dekode + analisis), hangat (cache),
+                     dan setelah satu attempt baru (cache harus dihitung ulang)
+
+Contoh:
+    python benchmarks/bench_item_analysis.py
+    python benchmarks/bench_item_analysis.py --attempts 100000 --questions 20 --max-ms 1500
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+TOLERANCE = 0.002
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=20, help='Jumlah soal kuis.')
+    parser.add_argument('--attempts', type=int, default=100000, help='Jumlah attempt dengan jawaban ter-pack.')
+    parser.add_argument('--students', type=int, default=5000, help='Jumlah siswa (attempt dibagi rata).')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--database-uri', default=None, help='Default: SQLite sementara.')
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help='Exit code 1 bila laporan dingin (get_item_analysis) melebihi batas ini (ms).')
+    return parser.parse_args()
+
+
+def seed(module, question_count, attempt_count, student_count, rng):
+    db = module.db
+    instructor = module.User(name='Bench Instructor', email='bench-instructor@example.com', role='instructor',
+                             password_hash='-')
+    db.session.add(instructor)
+    db.session.flush()
+    course = module.Course(title='Ujian Akhir Excel', description='Kursus dengan ujian besar',
+                           instructor_id=instructor.id, material_type='Microsoft Excel',
+                           question_count=question_count, passing_grade=60)
+    db.session.add(course)
+    db.session.flush()
+    questions = [module.Question(course_id=course.id, text=f'Soal {idx}') for idx in range(question_count)]
+    db.session.add_all(questions)
+    db.session.flush()
+    choices = {}
+    for question in questions:
+        rows = [module.Choice(question_id=question.id, text=f'Pilihan {idx}', is_correct=idx == 0) for idx in range(4)]
+        db.session.add_all(rows)
+        choices[question.id] = rows
+    db.session.flush()
+    db.session.execute(db.insert(module.User), [
+        {'name': f'Siswa {idx}', 'email': f'siswa{idx}@example.com', 'role': 'student', 'password_hash': '-'}
+        for idx in range(student_count)])
+    student_ids = db.session.execute(db.select(module.User.id).where(module.User.role == 'student')).scalars().all()
+    choice_ids = {question_id: [row.id for row in rows] for question_id, rows in choices.items()}
+
+    question_ids = sorted(choice_ids)
+    misleading_question, new_question = question_ids[0], question_ids[-1]
+    rows = []
+    for idx in range(attempt_count):
+        ability = rng.random()
+        responses = []
+        correct = 0
+        for question_id in question_ids:
+            if question_id == new_question and idx < attempt_count // 2:
+                continue
+            difficulty = (question_id % 5) * 0.1
+            roll = rng.random()
+            if roll < 0.08:
+                responses.append(-question_id)
+            elif question_id == misleading_question and ability > 0.6 and roll < 0.5:
+                responses.append(choice_ids[question_id][1])
+            elif rng.random() < ability - difficulty + 0.3:
+                responses.append(choice_ids[question_id][0])
+                correct += 1
+            else:
+                responses.append(rng.choice(choice_ids[question_id][1:]))
+        score = int(correct / len(responses) * 100)
+        rows.append({'user_id': student_ids[idx % len(student_ids)], 'course_id': course.id, 'score': score,
+                     'passed': score >= 60, 'answers': module.pack_answers(responses)})
+    db.session.execute(db.insert(module.Attempt), rows)
+    db.session.commit()
+    module.rebuild_attempt_summaries()
+    return course.id, [(question_id, [(choice_id, pos == 0) for pos, choice_id in enumerate(choice_ids[question_id])])
+                       for question_id in question_ids]
+
+
+def python_analysis(blobs, questions, group_fraction):
+    """Versi loop Python murni (referensi kebenaran dan pembanding waktu)."""
+    from services.item_analysis import unpack_answers
+
+    column = {question_id: idx for idx, (question_id, _choices) in enumerate(questions)}
+    choice_column = {choice_id: column[question_id] for question_id, choices in questions for choice_id, _ in choices}
+    correct_ids = {choice_id for _question_id, choices in questions for choice_id, correct in choices if correct}
+    attempts = []
+    for blob in blobs:
+        shown, right, picked = set(), set(), []
+        for value in unpack_answers(blob):
+            if value > 0 and value in choice_column:
+                shown.add(choice_column[value])
+                picked.append(value)
+                if value in correct_ids:
+                    right.add(choice_column[value])
+            elif value < 0 and -value in column:
+                shown.add(column[-value])
+        attempts.append((shown, right, picked))
+    ranking = sorted(range(len(attempts)),
+                     key=lambda idx: len(attempts[idx][1]) / len(attempts[idx][0]) if attempts[idx][0] else 0)
+    group_size = max(int(round(len(attempts) * group_fraction)), 1) if attempts else 0
+    groups = {'lower': ranking[:group_size], 'upper': ranking[len(attempts) - group_size:]}
+
+    def rate(part, whole):
+        return round(part / whole, 3) if whole else None
+
+    report = []
+    for idx, (question_id, choices) in enumerate(questions):
+        shown = [attempt for attempt in attempts if idx in attempt[0]]
+        group_p = {}
+        group_shown = {}
+        for name, members in groups.items():
+            members = [attempts[member] for member in members if idx in attempts[member][0]]
+            group_shown[name] = members
+            group_p[name] = sum(idx in attempt[1] for attempt in members) / len(members) if members else None
+        discrimination = (round(group_p['upper'] - group_p['lower'], 3)
+                          if None not in group_p.values() else None)
+        report.append({
+            'question_id': question_id,
+            'difficulty': rate(sum(idx in attempt[1] for attempt in shown), len(shown)),
+            'discrimination': discrimination,
+            'choices': [{'choice_id': choice_id,
+                         'count': sum(attempt[2].count(choice_id) for attempt in shown),
+                         'upper_rate': rate(sum(attempt[2].count(choice_id) for attempt in group_shown['upper']),
+                                            len(group_shown['upper'])),
+                         'lower_rate': rate(sum(attempt[2].count(choice_id) for attempt in group_shown['lower']),
+                                            len(group_shown['lower']))}
+                        for choice_id, _correct in choices],
+        })
+    return report
+
+
+def mismatches(expected, actual):
+    def differs(left, right):
+        if left is None or right is None:
+            return left is not right
+        return abs(left - right) > TOLERANCE
+
+    count = 0
+    for reference, item in zip(expected, actual['questions']):
+        count += differs(reference['difficulty'], item['difficulty'])
+        count += differs(reference['discrimination'], item['discrimination'])
+        for reference_choice, choice in zip(reference['choices'], item['choices']):
+            count += reference_choice['count'] != choice['count']
+            count += differs(reference_choice['upper_rate'], choice['upper_rate'])
+            count += differs(reference_choice['lower_rate'], choice['lower_rate'])
+    return count
+
+
+def main():
+    args = parse_args()
+    database_uri = args.database_uri
+    if not database_uri:
+        tmpdir = tempfile.mkdtemp(prefix='lms-bench-')
+        database_uri = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    import app as module
+    from sqlalchemy import event
+    from services.item_analysis import GROUP_FRACTION, analyze_items
+
+    application = module.create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'SECRET_KEY': 'bench',
+                                     'SEARCH_INDEX_REFRESH': 0, 'SEARCH_INDEX_WARM': False,
+                                     'CERTIFICATE_PREGENERATE': False, 'QUERY_PROFILING': False})
+    rng = random.Random(args.seed)
+    with application.app_context():
+        module.bootstrap_schema('create', force=True)
+        started = time.perf_counter()
+        course_id, questions = seed(module, args.questions, args.attempts, args.students, rng)
+        print(f'Kuis: {args.questions} soal | {args.attempts} attempt | {args.students} siswa '
+              f'(seed {time.perf_counter() - started:.1f} s)')
+
+        db = module.db
+        Attempt = module.Attempt
+        blobs = db.session.execute(db.select(Attempt.answers).where(Attempt.course_id == course_id)).scalars().all()
+        print(f'Ukuran jawaban ter-pack: {sum(len(blob) for blob in blobs) / len(blobs):.0f} byte/attempt')
+
+        print(f'\n{"analisis":<22} {"ms":>10} {"selisih":>8}')
+        started = time.perf_counter()
+        expected = python_analysis(blobs, questions, GROUP_FRACTION)
+        python_ms = (time.perf_counter() - started) * 1000
+        print(f'{"loop Python":<22} {python_ms:>10.1f} {"-":>8}')
+        started = time.perf_counter()
+        vectorized = analyze_items(blobs, questions)
+        numpy_ms = (time.perf_counter() - started) * 1000
+        wrong = mismatches(expected, vectorized)
+        print(f'{"NumPy":<22} {numpy_ms:>10.1f} {wrong:>8}')
+
+        query_count = {'n': 0}
+
+        def count_query(*_args):
+            query_count['n'] += 1
+
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+        version = db.session.get(module.Course, course_id).content_version
+        application.extensions['quiz_payload_cache'].clear()
+        application.extensions['quiz_answer_keys'].clear()
+        application.extensions['item_analysis_cache'].clear()
+
+        def timed_report(label):
+            db.session.expunge_all()
+            query_count['n'] = 0
+            started = time.perf_counter()
+            report = module.get_item_analysis(course_id, version)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f'{label:<22} {elapsed_ms:>10.1f} {query_count["n"]:>8} {report["attempts"]:>9}')
+            return report, elapsed_ms
+
+        print(f'\n{"get_item_analysis":<22} {"ms":>10} {"query":>8} {"attempt":>9}')
+        _cold, cold_ms = timed_report('dingin')
+        timed_report('hangat (cache)')
+        student_id = db.session.execute(db.select(Attempt.user_id).limit(1)).scalar()
+        attempt = Attempt(user_id=student_id, course_id=course_id, score=100, passed=True,
+                          answers=module.pack_answers([choices[0][0] for _question_id, choices in questions]))
+        db.session.add(attempt)
+        module.record_quiz_attempt(attempt)
+        db.session.commit()
+        refreshed, _refreshed_ms = timed_report('setelah attempt baru')
+        event.remove(db.engine, 'before_cursor_execute', count_query)
+
+    flagged = [item['question_id'] for item in refreshed['questions'] if item['flags']]
+    misleading = sum(choice['misleading'] for item in refreshed['questions'] for choice in item['choices'])
+    print(f'Soal ditandai: {len(flagged)} | pengecoh menyesatkan: {misleading} | '
+          f'NumPy {python_ms / numpy_ms:.1f}x lebih cepat dari loop Python')
+
+    if wrong or refreshed['attempts'] != args.attempts + 1:
+        sys.stderr.write(f'{wrong} nilai berbeda dari loop Python; attempt di laporan: {refreshed["attempts"]}\n')
+        sys.exit(1)
+    if args.max_ms is not None and cold_ms > args.max_ms:
+        sys.stderr.write(f'Laporan dingin {cold_ms:.1f} ms melebihi batas {args.max_ms:.1f} ms\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
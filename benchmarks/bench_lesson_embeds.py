@@ -0,0 +1,106 @@
+"""Microbenchmark embed video materi: parsing URL per render vs metadata tersimpan di Lesson.
+
+Mengukur dua tingkat untuk kursus dengan banyak materi (default 250):
+1. fungsi saja: prepare_video_embed() untuk semua materi vs membaca Lesson.embed yang sudah terisi;
+2. pemuatan bagian publik detail kursus (_load_course_public_view) dari database sebelum
+   dan sesudah "flask backfill-lesson-embeds".
+
+Contoh:
+    python benchmarks/bench_lesson_embeds.py
+    python benchmarks/bench_lesson_embeds.py --lessons 500 --repeat 200
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+URL_PATTERNS = [
+    'https://www.youtube.com/watch?v=vid{idx:05d}&list=PL{idx}&t={idx}s',
+    'https://youtu.be/short{idx:05d}',
+    'https://www.youtube.com/embed/emb{idx:05d}',
+    'https://vimeo.com/channels/staff/{idx}',
+    'https://cdn.example.com/video/materi-{idx}.mp4',
+    'https://drive.example.com/file/d/{idx}/preview',
+    '',
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lessons', type=int, default=250, help='Jumlah materi pada kursus.')
+    parser.add_argument('--repeat', type=int, default=100, help='Jumlah pengulangan per skenario.')
+    return parser.parse_args()
+
+
+def video_urls(count):
+    return [URL_PATTERNS[idx % len(URL_PATTERNS)].format(idx=idx) for idx in range(count)]
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'mean': statistics.fmean(samples),
+        'p50': samples[len(samples) // 2],
+        'p95': samples[max(int(len(samples) * 0.95) - 1, 0)],
+    }
+
+
+def report(label, stats):
+    print(f'{label:<40} {stats["mean"]:>9.3f} {stats["p50"]:>9.3f} {stats["p95"]:>9.3f}')
+
+
+def main():
+    args = parse_args()
+    import app as module
+
+    urls = video_urls(args.lessons)
+    lessons = [module.Lesson(title=f'Materi {idx}', video_url=url) for idx, url in enumerate(urls)]
+    for lesson in lessons:
+        lesson.update_embed()
+    parsed = [module.prepare_video_embed(url) for url in urls]
+    assert [lesson.embed for lesson in lessons] == parsed
+
+    print(f'{args.lessons} materi per halaman, {args.repeat} pengulangan (ms per render)')
+    print(f'{"skenario":<40} {"mean":>9} {"p50":>9} {"p95":>9}')
+    report('parse prepare_video_embed()', timed(lambda: [module.prepare_video_embed(url) for url in urls], args.repeat))
+    report('baca Lesson.embed tersimpan', timed(lambda: [lesson.embed for lesson in lessons], args.repeat))
+
+    tmpdir = tempfile.mkdtemp(prefix='lms-bench-')
+    application = module.create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{Path(tmpdir) / 'bench.db'}",
+                                     'SECRET_KEY': 'bench', 'SEARCH_INDEX_REFRESH': 0})
+    with application.app_context():
+        module.bootstrap_schema('create', force=True)
+        instructor = module.User(name='Bench Instructor', email='bench@example.com', role='instructor', password_hash='-')
+        module.db.session.add(instructor)
+        module.db.session.flush()
+        course = module.Course(title='Kursus Panjang', instructor_id=instructor.id, lesson_count=args.lessons)
+        module.db.session.add(course)
+        module.db.session.flush()
+        # Baris "lama": tanpa metadata embed, seperti sebelum migrasi
+        module.db.session.add_all(module.Lesson(course_id=course.id, title=f'Materi {idx}', video_url=url)
+                                  for idx, url in enumerate(urls))
+        module.db.session.commit()
+        course_id = course.id
+
+        def load_view():
+            module.db.session.expunge_all()
+            return module._load_course_public_view(course_id)
+
+        report('muat detail kursus (belum backfill)', timed(load_view, args.repeat))
+        updated = module.backfill_lesson_embeds()
+        report(f'muat detail kursus (backfill {updated} materi)', timed(load_view, args.repeat))
+        assert [lesson.embed for lesson in load_view()['lessons']] == parsed
+
+
+if __name__ == '__main__':
+    main()
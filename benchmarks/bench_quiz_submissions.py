@@ -0,0 +1,216 @@
+"""Load test pengumpulan kuis: banyak siswa mengirim jawaban bersamaan menjelang tenggat.
+
+Mengisi satu kursus dengan N soal (4 pilihan) dan M siswa terdaftar, lalu:
+  1. penilaian saja : penilaian lama (Choice.query.get per soal) dibandingkan dengan
+                      kunci jawaban ter-cache + grade_quiz(), untuk jawaban yang sama
+  2. load test      : M POST /course/<id>/quiz dari T thread sekaligus (cache kunci dingin
+                      di awal), dengan latensi, throughput, query per kiriman, dan pemeriksaan
+                      bahwa skor setiap Attempt sama dengan skor yang diharapkan
+  3. batas percobaan: dengan --attempt-limit L --repeat R setiap siswa mengirim R kali
+                      bersamaan; diperiksa bahwa tersimpan tepat min(R, L) Attempt per siswa
+                      dan attempt_summary sama dengan tabel attempt
+Sebagian jawaban sengaja memakai id pilihan benar milik soal lain; penilaian lama
+menghitungnya benar, kunci jawaban tidak.
+
+Contoh:
+    python benchmarks/bench_quiz_submissions.py
+    python benchmarks/bench_quiz_submissions.py --questions 100 --students 500 --threads 50 --max-queries 14
+    python benchmarks/bench_quiz_submissions.py --students 100 --attempt-limit 2 --repeat 5
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=100, help='Jumlah soal kuis.')
+    parser.add_argument('--students', type=int, default=500, help='Jumlah siswa terdaftar.')
+    parser.add_argument('--threads', type=int, default=50, help='Jumlah kiriman yang berjalan bersamaan.')
+    parser.add_argument('--attempt-limit', type=int, default=0, help='Batas percobaan kursus (0 = tanpa batas).')
+    parser.add_argument('--repeat', type=int, default=1, help='Jumlah kiriman per siswa (dikirim bersamaan).')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--database-uri', default=None, help='Default: SQLite sementara.')
+    parser.add_argument('--max-queries', type=float, default=None,
+                        help='Exit code 1 bila rata-rata query per kiriman (load test) melebihi batas ini.')
+    return parser.parse_args()
+
+
+def seed(module, question_count, student_count, attempt_limit):
+    db = module.db
+    instructor = module.User(name='Bench Instructor', email='bench-instructor@example.com', role='instructor',
+                             password_hash='-')
+    db.session.add(instructor)
+    db.session.flush()
+    course = module.Course(title='Ujian Akhir Excel', description='Kursus dengan ujian besar',
+                           instructor_id=instructor.id, material_type='Microsoft Excel',
+                           question_count=question_count, passing_grade=60, attempt_limit=attempt_limit)
+    db.session.add(course)
+    db.session.flush()
+    questions = [module.Question(course_id=course.id, text=f'Soal {idx}') for idx in range(question_count)]
+    db.session.add_all(questions)
+    db.session.flush()
+    choices = {}
+    for question in questions:
+        rows = [module.Choice(question_id=question.id, text=f'Pilihan {idx}', is_correct=idx == 0) for idx in range(4)]
+        db.session.add_all(rows)
+        choices[question.id] = rows
+    students = [module.User(name=f'Siswa {idx}', email=f'siswa{idx}@example.com', role='student', password_hash='-')
+                for idx in range(student_count)]
+    db.session.add_all(students)
+    db.session.flush()
+    db.session.add_all([module.Enrollment(user_id=student.id, course_id=course.id, unlocked=True) for student in students])
+    db.session.commit()
+    choice_ids = {question_id: [row.id for row in rows] for question_id, rows in choices.items()}
+    return course.id, [student.id for student in students], choice_ids
+
+
+def make_submission(rng, choice_ids):
+    """(form, skor yang diharapkan): campuran jawaban benar, salah, kosong, dan id pilihan soal lain."""
+    question_ids = list(choice_ids)
+    form = {}
+    correct = 0
+    for question_id in question_ids:
+        roll = rng.random()
+        if roll < 0.55:
+            form[f'q_{question_id}'] = str(choice_ids[question_id][0])
+            correct += 1
+        elif roll < 0.85:
+            form[f'q_{question_id}'] = str(rng.choice(choice_ids[question_id][1:]))
+        elif roll < 0.95:
+            other = rng.choice(question_ids)
+            form[f'q_{question_id}'] = str(choice_ids[other][0])
+            correct += other == question_id
+    total = len(question_ids)
+    return form, int((correct / total) * 100) if total else 0
+
+
+def legacy_grade(module, question_ids, form):
+    correct = 0
+    for question_id in question_ids:
+        chosen = form.get(f'q_{question_id}')
+        if not chosen:
+            continue
+        choice = module.db.session.get(module.Choice, int(chosen))
+        if choice and choice.is_correct:
+            correct += 1
+    return int((correct / len(question_ids)) * 100) if question_ids else 0
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[max(int(len(ordered) * fraction) - 1, 0)]
+
+
+def main():
+    args = parse_args()
+    database_uri = args.database_uri
+    if not database_uri:
+        tmpdir = tempfile.mkdtemp(prefix='lms-bench-')
+        database_uri = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    import app as module
+    from sqlalchemy import event
+
+    application = module.create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'SECRET_KEY': 'bench',
+                                     'SEARCH_INDEX_REFRESH': 0, 'SEARCH_INDEX_WARM': False,
+                                     'CERTIFICATE_PREGENERATE': False, 'QUERY_PROFILING': False})
+    with application.app_context():
+        module.bootstrap_schema('create', force=True)
+        course_id, student_ids, choice_ids = seed(module, args.questions, args.students, args.attempt_limit)
+        engine = module.db.engine
+
+    rng = random.Random(args.seed)
+    submissions = [make_submission(rng, choice_ids) for _ in student_ids]
+    question_ids = sorted(choice_ids)
+
+    query_lock = threading.Lock()
+    query_count = {'n': 0}
+
+    def count_query(*_args):
+        with query_lock:
+            query_count['n'] += 1
+
+    event.listen(engine, 'before_cursor_execute', count_query)
+
+    print(f'Kuis: {args.questions} soal | {args.students} siswa | {args.threads} thread')
+    print(f'\n{"penilaian saja":<22} {"ms/kiriman":>11} {"query/kiriman":>14} {"skor keliru":>12}')
+    with application.app_context():
+        key_cache = application.extensions['quiz_answer_keys']
+        version = module.db.session.get(module.Course, course_id).content_version
+        for label, grade in (
+                ('lama (per soal)', lambda form: legacy_grade(module, question_ids, form)),
+                ('kunci jawaban', lambda form: module.grade_quiz(module.get_quiz_answer_key(course_id, version), form)[2])):
+            key_cache.clear()
+            module.db.session.expunge_all()
+            query_count['n'] = 0
+            started = time.perf_counter()
+            wrong = sum(grade(form) != expected for form, expected in submissions)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f'{label:<22} {elapsed_ms / len(submissions):>11.3f} {query_count["n"] / len(submissions):>14.2f} '
+                  f'{wrong:>12}')
+
+    clients = {}
+    for student_id in student_ids:
+        client = clients[student_id] = application.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(student_id)
+            session['_fresh'] = True
+    path = f'/course/{course_id}/quiz'
+
+    def submit(job):
+        student_id, (form, _expected) = job
+        started = time.perf_counter()
+        response = clients[student_id].post(path, data=form)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        assert response.status_code == 302, (student_id, response.status_code)
+        return elapsed_ms
+
+    # Kiriman berulang siswa yang sama berurutan di antrean agar diambil thread berbeda pada saat yang sama
+    jobs = [(student_id, submission) for student_id, submission in zip(student_ids, submissions)
+            for _ in range(args.repeat)]
+    application.extensions['quiz_answer_keys'].clear()
+    query_count['n'] = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        latencies = list(executor.map(submit, jobs))
+    elapsed = time.perf_counter() - started
+    queries_per_submission = query_count['n'] / len(jobs)
+
+    with application.app_context():
+        Attempt, AttemptSummary = module.Attempt, module.AttemptSummary
+        expected = {student_id: score for student_id, (_form, score) in zip(student_ids, submissions)}
+        stored = {}
+        for user_id, score in (module.db.session.query(Attempt.user_id, Attempt.score)
+                               .filter(Attempt.course_id == course_id)):
+            stored.setdefault(user_id, []).append(score)
+        summaries = dict(module.db.session.query(AttemptSummary.user_id, AttemptSummary.attempt_count)
+                         .filter(AttemptSummary.course_id == course_id))
+    allowed = min(args.repeat, args.attempt_limit) if args.attempt_limit > 0 else args.repeat
+    mismatched = sum(stored.get(student_id, []) != [score] * allowed for student_id, score in expected.items())
+    summary_drift = sum(summaries.get(student_id, 0) != len(stored.get(student_id, [])) for student_id in student_ids)
+
+    print(f'\n{"load test":<22} {"kiriman/s":>10} {"p50 ms":>8} {"p95 ms":>8} {"query/kiriman":>14} {"siswa keliru":>13}')
+    print(f'{"POST /quiz":<22} {len(jobs) / elapsed:>10.1f} {statistics.median(latencies):>8.1f} '
+          f'{percentile(latencies, 0.95):>8.1f} {queries_per_submission:>14.2f} {mismatched:>13}')
+    print(f'Attempt per siswa yang diharapkan: {allowed} | ringkasan tidak sesuai tabel attempt: {summary_drift}')
+
+    if mismatched or summary_drift:
+        sys.stderr.write(f'{mismatched} siswa dengan attempt/skor tidak sesuai, {summary_drift} ringkasan menyimpang\n')
+        sys.exit(1)
+    if args.max_queries is not None and queries_per_submission > args.max_queries:
+        sys.stderr.write(f'{queries_per_submission:.2f} query/kiriman melebihi batas {args.max_queries:.2f}\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
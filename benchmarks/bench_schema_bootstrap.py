@@ -0,0 +1,115 @@
+"""Benchmark latensi per request untuk / dan /courses: sebelum vs sesudah schema bootstrap.
+
+"Sebelum" mensimulasikan hook lama yang menjalankan db.create_all() dan
+ensure_course_thumbnail_column() di setiap request; "sesudah" memakai
+bootstrap sekali per proses.
+
+Contoh:
+    python benchmarks/bench_schema_bootstrap.py --requests 300
+    python benchmarks/bench_schema_bootstrap.py --database-uri "mysql+pymysql://root:@127.0.0.1/lms_bench"
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='Jumlah request per route per skenario.')
+    parser.add_argument('--courses', type=int, default=50, help='Jumlah kursus contoh yang dibuat.')
+    parser.add_argument('--database-uri', default=None,
+                        help='URI database (default: SQLite sementara). Database akan diisi data contoh.')
+    return parser.parse_args()
+
+
+def seed(module, course_count):
+    db = module.db
+    if module.Course.query.count():
+        return
+    instructor = module.User(name='Bench Instructor', email='bench-instructor@example.com', role='instructor',
+                             certificate_type='link', certificate_data='https://example.com/cert')
+    instructor.set_password('secret')
+    db.session.add(instructor)
+    db.session.flush()
+    for idx in range(course_count):
+        course = module.Course(title=f'Kursus {idx}', description='Deskripsi kursus contoh', instructor_id=instructor.id,
+                               material_type='Microsoft Word', is_premium=bool(idx % 2), price=100000 if idx % 2 else 0,
+                               lesson_count=5)
+        db.session.add(course)
+        db.session.flush()
+        for lesson_idx in range(5):
+            db.session.add(module.Lesson(course_id=course.id, title=f'Materi {lesson_idx}'))
+    db.session.commit()
+
+
+def measure(client, path, count):
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, (path, response.status_code)
+    samples.sort()
+    return {
+        'mean': statistics.fmean(samples),
+        'p50': samples[len(samples) // 2],
+        'p95': samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+def main():
+    args = parse_args()
+    database_uri = args.database_uri
+    if not database_uri:
+        tmpdir = tempfile.mkdtemp(prefix='lms-bench-')
+        database_uri = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    import app as module
+    from sqlalchemy import event
+
+    application = module.create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'SECRET_KEY': 'bench'})
+    with application.app_context():
+        module.bootstrap_schema('create', force=True)
+        seed(module, args.courses)
+        engine = module.db.engine
+
+    statements = {'count': 0}
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _count(*_args, **_kwargs):
+        statements['count'] += 1
+
+    def legacy_create_tables():
+        module.db.create_all()
+        module.ensure_course_thumbnail_column()
+
+    client = application.test_client()
+    hooks = application.before_request_funcs.setdefault(None, [])
+    results = {}
+    for label, legacy in (('sebelum (create_all per request)', True), ('sesudah (bootstrap sekali)', False)):
+        if legacy:
+            hooks.insert(0, legacy_create_tables)
+        for path in ('/', '/courses'):
+            client.get(path)  # warm-up
+            statements['count'] = 0
+            stats = measure(client, path, args.requests)
+            stats['queries'] = statements['count'] / args.requests
+            results[(label, path)] = stats
+        if legacy:
+            hooks.remove(legacy_create_tables)
+
+    print(f'Database: {engine.url.render_as_string(hide_password=True)}')
+    print(f'{"skenario":<36} {"route":<10} {"mean ms":>9} {"p50 ms":>9} {"p95 ms":>9} {"query/req":>10}')
+    for (label, path), stats in results.items():
+        print(f'{label:<36} {path:<10} {stats["mean"]:>9.2f} {stats["p50"]:>9.2f} {stats["p95"]:>9.2f} '
+              f'{stats["queries"]:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Benchmark throughput Gunicorn terhadap jumlah worker.
+
+Untuk setiap jumlah worker, skrip menjalankan ``gunicorn -c gunicorn.conf.py wsgi:app``,
+mengirim beban HTTP paralel ke beberapa route selama durasi tertentu, lalu mencatat
+request/detik, latensi, dan jumlah error (misal pool habis atau "MySQL server has gone away").
+
+Contoh:
+    python benchmarks/bench_wsgi_workers.py --workers 1 2 4 8 --concurrency 32 --duration 15
+    python benchmarks/bench_wsgi_workers.py --database-uri "mysql+pymysql://root:@127.0.0.1/lms_bench" \\
+        --env DB_POOL_SIZE=4 --env DB_MAX_OVERFLOW=2
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_schema_bootstrap import seed  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4, help='GUNICORN_THREADS per worker.')
+    parser.add_argument('--concurrency', type=int, default=16, help='Jumlah klien paralel.')
+    parser.add_argument('--duration', type=float, default=10.0, help='Durasi beban per skenario (detik).')
+    parser.add_argument('--paths', nargs='+', default=['/', '/courses'])
+    parser.add_argument('--courses', type=int, default=200)
+    parser.add_argument('--database-uri', default=None, help='Default: SQLite sementara.')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='Variabel environment tambahan untuk Gunicorn (boleh berulang).')
+    return parser.parse_args()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return True
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.2)
+    return False
+
+
+def run_load(base_url, paths, concurrency, duration):
+    latencies = []
+    errors = {'count': 0}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(index):
+        local_latencies = []
+        local_errors = 0
+        position = index
+        while time.monotonic() < stop_at:
+            path = paths[position % len(paths)]
+            position += 1
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base_url + path, timeout=30) as response:
+                    response.read()
+                    if response.status != 200:
+                        local_errors += 1
+                        continue
+            except (urllib.error.URLError, ConnectionError, OSError):
+                local_errors += 1
+                continue
+            local_latencies.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local_latencies)
+            errors['count'] += local_errors
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed if elapsed else 0,
+        'p50': latencies[len(latencies) // 2] if latencies else 0,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] if latencies else 0,
+        'mean': statistics.fmean(latencies) if latencies else 0,
+        'errors': errors['count'],
+    }
+
+
+def main():
+    args = parse_args()
+    database_uri = args.database_uri
+    if not database_uri:
+        tmpdir = tempfile.mkdtemp(prefix='lms-bench-')
+        database_uri = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    import app as module
+
+    application = module.create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'SECRET_KEY': 'bench'})
+    with application.app_context():
+        module.bootstrap_schema('create', force=True)
+        seed(module, args.courses)
+        module.db.engine.dispose()
+
+    base_env = dict(os.environ)
+    base_env.update({
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'SCHEMA_BOOTSTRAP': 'off',
+        'GUNICORN_THREADS': str(args.threads),
+        'GUNICORN_ACCESS_LOG': '',
+        'GUNICORN_LOG_LEVEL': 'warning',
+    })
+    for item in args.env:
+        key, _, value = item.partition('=')
+        base_env[key] = value
+
+    print(f'Database: {database_uri.split("@")[-1]} | threads/worker={args.threads} '
+          f'| klien={args.concurrency} | durasi={args.duration}s | paths={" ".join(args.paths)}')
+    print(f'{"workers":>7} {"req/s":>9} {"mean ms":>9} {"p50 ms":>9} {"p95 ms":>9} {"errors":>7}')
+    for worker_count in args.workers:
+        port = free_port()
+        env = dict(base_env, WEB_CONCURRENCY=str(worker_count), GUNICORN_BIND=f'127.0.0.1:{port}')
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        base_url = f'http://127.0.0.1:{port}'
+        try:
+            if not wait_until_ready(base_url + args.paths[0]):
+                process.terminate()
+                sys.stderr.write(process.communicate(timeout=10)[1])
+                sys.exit(f'Gunicorn dengan {worker_count} worker gagal dijalankan.')
+            run_load(base_url, args.paths, args.concurrency, min(2.0, args.duration))  # warm-up
+            stats = run_load(base_url, args.paths, args.concurrency, args.duration)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+        print(f'{worker_count:>7} {stats["rps"]:>9.1f} {stats["mean"]:>9.2f} {stats["p50"]:>9.2f} '
+              f'{stats["p95"]:>9.2f} {stats["errors"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""Laporan jumlah query per endpoint terhadap anggaran QUERY_BUDGETS, plus statement berulang (N+1).
+
+Mengisi data contoh (kursus dengan banyak materi, soal, siswa terdaftar), lalu memanggil
+halaman-halaman utama sebagai pengunjung anonim, siswa, dan instruktur. Setiap request diukur
+dalam kondisi dingin (semua cache per worker dan indeks pencarian dikosongkan lebih dulu, jadi
+query user_loader dan pengisian cache ikut terhitung), karena anggaran berlaku untuk request
+pertama setiap worker juga. Dicatat jumlah statement, waktu DB, anggaran endpoint, dan statement
+yang berulang.
+
+Contoh:
+    python benchmarks/query_budget_report.py
+    python benchmarks/query_budget_report.py --lessons 40 --students 50 --questions 30
+Exit code 1 bila ada endpoint yang melebihi anggarannya.
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lessons', type=int, default=20, help='Jumlah materi pada kursus.')
+    parser.add_argument('--questions', type=int, default=10, help='Jumlah soal kuis.')
+    parser.add_argument('--students', type=int, default=20, help='Jumlah siswa terdaftar.')
+    parser.add_argument('--database-uri', default=None, help='Default: SQLite sementara.')
+    return parser.parse_args()
+
+
+def seed(module, lesson_count, question_count, student_count):
+    db = module.db
+    instructor = module.User(name='Budget Instructor', email='budget-instructor@example.com', role='instructor',
+                             certificate_type='link', certificate_data='https://example.com/cert')
+    instructor.set_password('secret')
+    db.session.add(instructor)
+    db.session.flush()
+    courses = []
+    for idx in range(3):
+        course = module.Course(title=f'Kursus {idx}', description='Kursus contoh', instructor_id=instructor.id,
+                               material_type='Microsoft Excel', lesson_count=lesson_count,
+                               question_count=question_count, has_exercise=True)
+        db.session.add(course)
+        courses.append(course)
+    db.session.flush()
+    course = courses[0]
+    lessons = []
+    for idx in range(lesson_count):
+        lesson = module.Lesson(course_id=course.id, title=f'Materi {idx}', content='Isi materi',
+                               video_url=f'https://www.youtube.com/watch?v=vid{idx:05d}')
+        lesson.update_embed()
+        db.session.add(lesson)
+        lessons.append(lesson)
+    db.session.flush()
+    for lesson in lessons:
+        db.session.add(module.LearningOutcome(lesson_id=lesson.id, outcome_text='Capaian', order_index=0))
+        db.session.add(module.Skill(lesson_id=lesson.id, skill_text='Skill', order_index=0))
+    for idx in range(question_count):
+        question = module.Question(course_id=course.id, text=f'Soal {idx}')
+        db.session.add(question)
+        db.session.flush()
+        for choice_idx in range(4):
+            db.session.add(module.Choice(question_id=question.id, text=f'Pilihan {choice_idx}',
+                                         is_correct=choice_idx == 0))
+    db.session.add(module.Exercise(course_id=course.id, name='Latihan', exercise_url='https://example.com/latihan'))
+    students = []
+    for idx in range(student_count):
+        student = module.User(name=f'Siswa {idx}', email=f'budget-student{idx}@example.com', role='student')
+        student.set_password('secret')
+        db.session.add(student)
+        students.append(student)
+    db.session.flush()
+    for student in students:
+        for enrolled in courses[:2]:
+            db.session.add(module.Enrollment(user_id=student.id, course_id=enrolled.id, unlocked=True))
+    for lesson in lessons[: lesson_count // 2]:
+        db.session.add(module.LessonProgress(user_id=students[0].id, lesson_id=lesson.id))
+    db.session.add(module.Attempt(user_id=students[0].id, course_id=course.id, score=70, passed=False))
+    db.session.add(module.CartItem(user_id=students[0].id, course_id=courses[2].id))
+    db.session.flush()
+    for student in students:
+        for enrolled in courses[:2]:
+            module.ensure_enrollment_progress(student.id, enrolled)
+    db.session.commit()
+    return course.id, students[0].id
+
+
+def reset_worker_caches(application, module):
+    """Kosongkan semua cache per worker agar request berikutnya berjalan seperti request pertama."""
+    for extension in application.extensions.values():
+        if isinstance(extension, module.TTLCache):
+            extension.clear()
+    application.extensions['course_search']['index'] = module.CourseSearchIndex()
+
+
+def main():
+    args = parse_args()
+    database_uri = args.database_uri
+    if not database_uri:
+        tmpdir = tempfile.mkdtemp(prefix='lms-bench-')
+        database_uri = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+
+    import app as module
+    from flask import g, request, request_finished
+
+    application = module.create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'SECRET_KEY': 'bench',
+                                     'SEARCH_INDEX_REFRESH': 0, 'QUERY_BUDGET_RAISE': False})
+    with application.app_context():
+        module.bootstrap_schema('create', force=True)
+        course_id, student_id = seed(module, args.lessons, args.questions, args.students)
+
+    captured = []
+
+    def on_request_finished(sender, response, **extra):
+        stats = g.get('query_stats')
+        if stats is not None:
+            captured.append((request.endpoint, response.status_code, stats))
+
+    request_finished.connect(on_request_finished, application)
+
+    anonymous = application.test_client()
+    student = application.test_client()
+    instructor = application.test_client()
+    student.post('/login', data={'email': 'budget-student0@example.com', 'password': 'secret'})
+    instructor.post('/login', data={'email': 'budget-instructor@example.com', 'password': 'secret'})
+
+    pages = [
+        ('anonim', anonymous, '/'),
+        ('anonim', anonymous, '/courses'),
+        ('anonim', anonymous, '/courses?search=excel'),
+        ('anonim', anonymous, f'/course/{course_id}'),
+        ('anonim', anonymous, f'/course/{course_id}/syllabus'),
+        ('anonim', anonymous, f'/api/v1/courses/{course_id}/syllabus'),
+        ('anonim', anonymous, '/api/v1/courses'),
+        ('anonim', anonymous, f'/api/v1/courses/{course_id}'),
+        ('siswa', student, '/'),
+        ('siswa', student, '/courses'),
+        ('siswa', student, '/courses?search=excel'),
+        ('siswa', student, f'/course/{course_id}'),
+        ('siswa', student, f'/course/{course_id}/syllabus'),
+        ('siswa', student, '/my-courses'),
+        ('siswa', student, '/cart'),
+        ('siswa', student, f'/course/{course_id}/quiz'),
+        ('siswa', student, f'/course/{course_id}/quiz.json'),
+        ('instruktur', instructor, '/instructor'),
+        ('instruktur', instructor, f'/manage_enrollments/{course_id}'),
+        ('instruktur', instructor, f'/manage_enrollments/{course_id}/student_detail/{student_id}'),
+        ('instruktur', instructor, f'/course/{course_id}/quiz/manage'),
+        ('instruktur', instructor, f'/course/{course_id}/quiz/analysis'),
+    ]
+    config = application.config
+    threshold = config['QUERY_REPEAT_THRESHOLD']
+    print(f'Data: {args.lessons} materi, {args.questions} soal, {args.students} siswa | N+1 bila >= {threshold}x')
+    print(f'{"peran":<11} {"path":<44} {"status":>6} {"query":>6} {"db ms":>8} {"anggaran":>9}')
+    over_budget = []
+    for role, client, path in pages:
+        reset_worker_caches(application, module)
+        captured.clear()
+        client.get(path)
+        if not captured:
+            continue
+        endpoint, status, stats = captured[-1]
+        budget = config['QUERY_BUDGETS'].get(endpoint, config['QUERY_BUDGET_DEFAULT'])
+        flag = '  !' if stats.count > budget else ''
+        print(f'{role:<11} {path:<44} {status:>6} {stats.count:>6} {stats.total_ms:>8.2f} {budget:>9}{flag}')
+        for statement, count in stats.repeated(threshold):
+            print(f'{"":<11} N+1 {count}x: {statement[:110]}')
+        if stats.count > budget:
+            over_budget.append(endpoint)
+
+    if over_budget:
+        sys.stderr.write(f'Melebihi anggaran query: {", ".join(over_budget)}\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
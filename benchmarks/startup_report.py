@@ -0,0 +1,99 @@
+"""Laporan waktu startup (cold start): rincian waktu import per paket dan durasi create_app().
+
+Menjalankan interpreter baru dengan ``python -X importtime`` sehingga hasilnya
+mencerminkan worker yang baru di-fork/di-spawn.
+
+Contoh:
+    python benchmarks/startup_report.py
+    python benchmarks/startup_report.py --top 15 --json > startup.json
+    python benchmarks/startup_report.py --max-total-ms 1500   # gagal (exit 1) jika melebihi batas
+"""
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = r'''
+import json, sys, time
+started = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+application = module.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'SECRET_KEY': 'startup-report'})
+created = time.perf_counter()
+lazy = {name: name in sys.modules for name in ('PIL', 'midtransclient', 'requests')}
+print(json.dumps({
+    'import_app_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'lazy_modules_loaded': lazy,
+}))
+'''
+
+
+def parse_importtime(stderr):
+    """Jumlahkan waktu import "self" per paket top-level (ms) dari output -X importtime."""
+    packages = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        columns = line[len('import time:'):].split('|')
+        if len(columns) != 3:
+            continue
+        try:
+            self_us = int(columns[0])
+        except ValueError:
+            continue
+        top_level = columns[2].strip().split('.')[0]
+        packages[top_level] += self_us / 1000
+    return dict(packages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=20, help='Jumlah paket terlama yang ditampilkan.')
+    parser.add_argument('--json', action='store_true', help='Cetak hasil dalam format JSON.')
+    parser.add_argument('--max-total-ms', type=float, default=None,
+                        help='Batas waktu import+create_app; exit code 1 bila terlampaui.')
+    args = parser.parse_args()
+
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=ROOT, capture_output=True, text=True, check=False,
+    )
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr)
+        sys.exit(completed.returncode)
+
+    probe = json.loads(completed.stdout.strip().splitlines()[-1])
+    packages = sorted(parse_importtime(completed.stderr).items(), key=lambda item: item[1], reverse=True)
+    total_ms = probe['import_app_ms'] + probe['create_app_ms']
+    report = {
+        'total_ms': round(total_ms, 1),
+        'import_app_ms': round(probe['import_app_ms'], 1),
+        'create_app_ms': round(probe['create_app_ms'], 1),
+        'lazy_modules_loaded': probe['lazy_modules_loaded'],
+        'packages_ms': {name: round(ms, 1) for name, ms in packages[:args.top]},
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import app   : {report['import_app_ms']:8.1f} ms")
+        print(f"create_app() : {report['create_app_ms']:8.1f} ms")
+        print(f"total        : {report['total_ms']:8.1f} ms")
+        loaded = [name for name, is_loaded in report['lazy_modules_loaded'].items() if is_loaded]
+        print(f"modul lazy yang ikut termuat: {', '.join(loaded) if loaded else '-'}")
+        print(f"\n{'paket':<28} {'self ms':>12}")
+        for name, ms in report['packages_ms'].items():
+            print(f'{name:<28} {ms:>12.1f}')
+
+    if args.max_total_ms is not None and total_ms > args.max_total_ms:
+        sys.stderr.write(f'Startup {total_ms:.1f} ms melebihi batas {args.max_total_ms:.1f} ms\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
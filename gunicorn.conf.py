@@ -0,0 +1,37 @@
+# Konfigurasi Gunicorn untuk production: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Total koneksi MySQL maksimum = workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+# Pastikan angka ini di bawah max_connections MySQL.
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# gthread: setiap worker melayani beberapa request sekaligus; butuh DB_POOL_SIZE >= threads
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+# Daur ulang worker secara berkala untuk membatasi kebocoran memori
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+# preload_app memuat aplikasi sekali di master lalu fork (hemat memori, startup worker lebih cepat)
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() in ['true', '1', 't']
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None  # kosongkan untuk mematikan access log
+errorlog = os.getenv('GUNICORN_ERROR_LOG', '-')
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# Worker web tidak memerlukan Flask-Migrate/alembic; jalankan "flask db upgrade" terpisah saat deploy.
+os.environ.setdefault('MIGRATIONS_ENABLED', 'False')
+
+
+def post_fork(server, worker):
+    """Jangan pakai ulang koneksi pool milik master setelah fork (penyebab "gone away")."""
+    if not server.cfg.preload_app:
+        return
+    from app import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,27 @@
+"""Add certificate_issued_at to enrollment_progress
+
+Revision ID: 4e7c2b9d1a63
+Revises: c93f1a7e5b28
+Create Date: 2026-10-18 21:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e7c2b9d1a63'
+down_revision = 'c93f1a7e5b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Siswa yang sudah memenuhi syarat sebelumnya mendapat tanggal terbit saat unduhan pertama.
+    with op.batch_alter_table('enrollment_progress', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('certificate_issued_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('enrollment_progress', schema=None) as batch_op:
+        batch_op.drop_column('certificate_issued_at')
@@ -0,0 +1,43 @@
+"""Add denormalized counters and popularity index to course
+
+Revision ID: 5c1e7a9d2b40
+Revises: 95e95ee6090a
+Create Date: 2026-10-18 14:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e7a9d2b40'
+down_revision = '95e95ee6090a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('course', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('enrollment_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('lesson_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('question_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('has_exercise', sa.Boolean(), server_default='0', nullable=False))
+        batch_op.create_index('ix_course_popularity', ['enrollment_count', 'id'], unique=False)
+
+    # Isi counter dari data yang sudah ada
+    op.execute(
+        "UPDATE course SET "
+        "enrollment_count = (SELECT COUNT(*) FROM enrollment WHERE enrollment.course_id = course.id), "
+        "lesson_count = (SELECT COUNT(*) FROM lesson WHERE lesson.course_id = course.id), "
+        "question_count = (SELECT COUNT(*) FROM question WHERE question.course_id = course.id), "
+        "has_exercise = CASE WHEN EXISTS (SELECT 1 FROM exercise WHERE exercise.course_id = course.id) THEN 1 ELSE 0 END"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('course', schema=None) as batch_op:
+        batch_op.drop_index('ix_course_popularity')
+        batch_op.drop_column('has_exercise')
+        batch_op.drop_column('question_count')
+        batch_op.drop_column('lesson_count')
+        batch_op.drop_column('enrollment_count')
@@ -0,0 +1,31 @@
+"""Add content_version and updated_at to course
+
+Revision ID: 8d3f6b1e4a27
+Revises: 5c1e7a9d2b40
+Create Date: 2026-10-18 16:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3f6b1e4a27'
+down_revision = '5c1e7a9d2b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('course', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_version', sa.Integer(), server_default='1', nullable=False))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # updated_at kursus lama dibiarkan NULL (tanpa Last-Modified) sampai perubahan berikutnya;
+    # ETag tetap berlaku karena dibentuk dari content_version.
+
+
+def downgrade():
+    with op.batch_alter_table('course', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('content_version')
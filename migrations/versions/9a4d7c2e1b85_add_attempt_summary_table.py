@@ -0,0 +1,77 @@
+"""Add attempt_summary table and attempt (user_id, course_id) index
+
+Revision ID: 9a4d7c2e1b85
+Revises: 4e7c2b9d1a63
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4d7c2e1b85'
+down_revision = '4e7c2b9d1a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('attempt_summary',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('attempt_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('best_score', sa.Integer(), nullable=True),
+    sa.Column('last_score', sa.Integer(), nullable=True),
+    sa.Column('last_passed', sa.Boolean(), server_default='0', nullable=False),
+    sa.Column('passed', sa.Boolean(), server_default='0', nullable=False),
+    sa.Column('last_attempt_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['course.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'course_id', name='uq_attempt_summary_user_course')
+    )
+    with op.batch_alter_table('attempt_summary', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_attempt_summary_course_id'), ['course_id'], unique=False)
+
+    with op.batch_alter_table('attempt', schema=None) as batch_op:
+        batch_op.create_index('ix_attempt_user_course', ['user_id', 'course_id'], unique=False)
+
+    _backfill()
+
+
+def _backfill():
+    """Isi satu baris per (user, kursus) yang punya attempt."""
+    bind = op.get_bind()
+    aggregates = bind.execute(sa.text(
+        "SELECT user_id, course_id, COUNT(id), MAX(score), MAX(CASE WHEN passed THEN 1 ELSE 0 END) "
+        "FROM attempt GROUP BY user_id, course_id")).fetchall()
+    latest = {(row[0], row[1]): row[2:] for row in bind.execute(sa.text(
+        "SELECT user_id, course_id, score, passed, created_at FROM attempt WHERE id IN "
+        "(SELECT MAX(id) FROM attempt GROUP BY user_id, course_id)"))}
+
+    summary_table = sa.table(
+        'attempt_summary', *(sa.column(name) for name in (
+            'user_id', 'course_id', 'attempt_count', 'best_score', 'last_score', 'last_passed', 'passed',
+            'last_attempt_at')))
+    rows = []
+    for user_id, course_id, count, best_score, passed in aggregates:
+        last_score, last_passed, last_attempt_at = latest[(user_id, course_id)]
+        rows.append({
+            'user_id': user_id, 'course_id': course_id, 'attempt_count': count, 'best_score': best_score,
+            'last_score': last_score, 'last_passed': bool(last_passed), 'passed': bool(passed),
+            'last_attempt_at': last_attempt_at,
+        })
+    if rows:
+        op.bulk_insert(summary_table, rows)
+
+
+def downgrade():
+    with op.batch_alter_table('attempt', schema=None) as batch_op:
+        batch_op.drop_index('ix_attempt_user_course')
+
+    with op.batch_alter_table('attempt_summary', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_attempt_summary_course_id'))
+
+    op.drop_table('attempt_summary')
@@ -0,0 +1,106 @@
+"""Add enrollment_progress table
+
+Revision ID: b47e2c9a6f13
+Revises: 8d3f6b1e4a27
+Create Date: 2026-10-18 17:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b47e2c9a6f13'
+down_revision = '8d3f6b1e4a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('enrollment_progress',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('lessons_completed', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total_lessons', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('quiz_attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_quiz_score', sa.Integer(), nullable=True),
+    sa.Column('best_quiz_score', sa.Integer(), nullable=True),
+    sa.Column('exercise_submitted', sa.Boolean(), server_default='0', nullable=False),
+    sa.Column('exercise_score', sa.Integer(), nullable=True),
+    sa.Column('components_completed', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('components_total', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('percent', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['course.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'course_id', name='uq_enrollment_progress_user_course')
+    )
+    with op.batch_alter_table('enrollment_progress', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_enrollment_progress_course_id'), ['course_id'], unique=False)
+
+    _backfill()
+
+
+def _backfill():
+    """Isi satu baris per enrollment dari lesson_progress, attempt, dan exercise_submission."""
+    bind = op.get_bind()
+    lessons = {(row[0], row[1]): row[2] for row in bind.execute(sa.text(
+        "SELECT lesson_progress.user_id, lesson.course_id, COUNT(lesson_progress.id) FROM lesson_progress "
+        "JOIN lesson ON lesson.id = lesson_progress.lesson_id GROUP BY lesson_progress.user_id, lesson.course_id"))}
+    attempts = {(row[0], row[1]): (row[2], row[3]) for row in bind.execute(sa.text(
+        "SELECT user_id, course_id, COUNT(id), MAX(score) FROM attempt GROUP BY user_id, course_id"))}
+    last_scores = {(row[0], row[1]): row[2] for row in bind.execute(sa.text(
+        "SELECT user_id, course_id, score FROM attempt WHERE id IN "
+        "(SELECT MAX(id) FROM attempt GROUP BY user_id, course_id)"))}
+    submissions = {(row[0], row[1]): row[2] for row in bind.execute(sa.text(
+        "SELECT user_id, course_id, score FROM exercise_submission"))}
+    courses = {row[0]: row[1:] for row in bind.execute(sa.text(
+        "SELECT id, lesson_count, question_count, has_exercise, passing_grade FROM course"))}
+
+    progress_table = sa.table(
+        'enrollment_progress', *(sa.column(name) for name in (
+            'user_id', 'course_id', 'lessons_completed', 'total_lessons', 'quiz_attempts', 'last_quiz_score',
+            'best_quiz_score', 'exercise_submitted', 'exercise_score', 'components_completed', 'components_total',
+            'percent')))
+    rows = []
+    seen = set()
+    for user_id, course_id in bind.execute(sa.text("SELECT user_id, course_id FROM enrollment")):
+        key = (user_id, course_id)
+        if key in seen or course_id not in courses:
+            continue
+        seen.add(key)
+        lesson_count, question_count, has_exercise, passing_grade = courses[course_id]
+        lessons_completed = lessons.get(key, 0)
+        attempt_count, best_score = attempts.get(key, (0, None))
+        last_score = last_scores.get(key)
+        submitted = key in submissions
+        exercise_score = submissions.get(key)
+        # Sama dengan evaluate_progress() di app.py
+        total = completed = 0
+        if lesson_count:
+            total += 1
+            completed += lessons_completed >= lesson_count
+        if question_count:
+            total += 1
+            completed += last_score is not None and last_score >= (passing_grade or 100)
+        if has_exercise:
+            total += 1
+            completed += submitted and (exercise_score or 0) > 0
+        rows.append({
+            'user_id': user_id, 'course_id': course_id, 'lessons_completed': lessons_completed,
+            'total_lessons': lesson_count or 0, 'quiz_attempts': attempt_count, 'last_quiz_score': last_score,
+            'best_quiz_score': best_score, 'exercise_submitted': submitted, 'exercise_score': exercise_score,
+            'components_completed': int(completed), 'components_total': total,
+            'percent': int((completed / total) * 100) if total else 0,
+        })
+    if rows:
+        op.bulk_insert(progress_table, rows)
+
+
+def downgrade():
+    with op.batch_alter_table('enrollment_progress', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_enrollment_progress_course_id'))
+
+    op.drop_table('enrollment_progress')
@@ -0,0 +1,28 @@
+"""Add attempt.answers packed answers column and attempt course_id index
+
+Revision ID: c3f81a6d2e47
+Revises: 9a4d7c2e1b85
+Create Date: 2026-10-18 23:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f81a6d2e47'
+down_revision = '9a4d7c2e1b85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('attempt', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('answers', sa.LargeBinary(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_attempt_course_id'), ['course_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('attempt', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_attempt_course_id'))
+        batch_op.drop_column('answers')
@@ -0,0 +1,33 @@
+"""Add image variant columns to course and user
+
+Revision ID: c93f1a7e5b28
+Revises: e2a5d8c1f094
+Create Date: 2026-10-18 20:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c93f1a7e5b28'
+down_revision = 'e2a5d8c1f094'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Upload lama diproses dengan "flask backfill-image-variants"; sampai saat itu gambar asli yang dipakai.
+    with op.batch_alter_table('course', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('thumbnail_variants', sa.String(length=64), nullable=True))
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('certificate_variants', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('certificate_variants')
+
+    with op.batch_alter_table('course', schema=None) as batch_op:
+        batch_op.drop_column('thumbnail_variants')
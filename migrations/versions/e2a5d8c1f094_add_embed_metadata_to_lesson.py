@@ -0,0 +1,31 @@
+"""Add embed metadata to lesson
+
+Revision ID: e2a5d8c1f094
+Revises: b47e2c9a6f13
+Create Date: 2026-10-18 18:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a5d8c1f094'
+down_revision = 'b47e2c9a6f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Materi lama diisi dengan "flask backfill-lesson-embeds"; sampai saat itu embed di-parse saat dibaca.
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('embed_type', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('embed_provider', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('embed_url', sa.String(length=500), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.drop_column('embed_url')
+        batch_op.drop_column('embed_provider')
+        batch_op.drop_column('embed_type')
@@ -158,7 +158,7 @@ def notification_handler():
 
 def _enroll_user_to_course(payment, custom_field1=None):
     """Helper: Enroll user to course(s) after successful payment"""
-    from app import Enrollment, CartItem
+    from app import Enrollment, CartItem, Course, adjust_course_counters, ensure_enrollment_progress
 
     db = current_app.extensions['sqlalchemy']
 
@@ -182,6 +182,10 @@ def _enroll_user_to_course(payment, custom_field1=None):
                 unlocked=True
             )
             db.session.add(enrollment)
+            adjust_course_counters(cid, enrollment_count=1)
+            course = db.session.get(Course, cid)
+            if course is not None:
+                ensure_enrollment_progress(payment.user_id, course)
             current_app.logger.info(f'User {payment.user_id} enrolled to course {cid}')
         elif not existing.unlocked:
             existing.unlocked = True
@@ -230,36 +234,48 @@ def payment_success():
 @login_required
 def payment_history():
     """Payment history page"""
-    from app import Payment, Course
+    from app import Payment, PaymentRow, load_course_titles
     import json
 
     db = current_app.extensions['sqlalchemy']
 
-    payments = db.session.query(Payment).filter_by(user_id=current_user.id).order_by(
-        Payment.created_at.desc()
+    rows = db.session.execute(
+        db.select(Payment.id, Payment.order_id, Payment.course_id, Payment.gross_amount, Payment.payment_type,
+                  Payment.transaction_status, Payment.created_at)
+        .where(Payment.user_id == current_user.id).order_by(Payment.created_at.desc())
     ).all()
 
-    # Parse payment_data for cart payments to get course names
-    for payment in payments:
-        if payment.order_id.startswith('CART-') and payment.payment_data:
+    # payment_data (Text) hanya dibaca untuk pesanan keranjang: custom_field1 berisi daftar course_id
+    cart_course_ids = {}
+    cart_payment_ids = [row.id for row in rows if row.order_id.startswith('CART-')]
+    if cart_payment_ids:
+        for payment_id, payment_data in db.session.execute(
+                db.select(Payment.id, Payment.payment_data).where(Payment.id.in_(cart_payment_ids))):
+            if not payment_data:
+                continue
             try:
-                data = json.loads(payment.payment_data) if isinstance(payment.payment_data, str) else payment.payment_data
+                data = json.loads(payment_data) if isinstance(payment_data, str) else payment_data
                 custom_field1 = data.get('custom_field1', '')
-                if custom_field1:
-                    course_ids = [int(cid) for cid in custom_field1.split(',') if cid.strip()]
-                    courses = db.session.query(Course).filter(Course.id.in_(course_ids)).all()
-                    payment.cart_courses = courses
-                    payment.course_count = len(courses)
-                else:
-                    payment.cart_courses = []
-                    payment.course_count = 0
+                course_ids = [int(cid) for cid in custom_field1.split(',') if cid.strip()] if custom_field1 else []
+                cart_course_ids[payment_id] = list(dict.fromkeys(course_ids))
             except Exception as e:
                 current_app.logger.error(f'Error parsing cart payment data: {str(e)}')
-                payment.cart_courses = []
-                payment.course_count = 0
+                cart_course_ids[payment_id] = []
+
+    # Judul kursus semua pembayaran di halaman ini dalam satu query
+    courses = load_course_titles({row.course_id for row in rows}
+                                 | {cid for course_ids in cart_course_ids.values() for cid in course_ids})
+
+    payments = []
+    for row in rows:
+        if row.id in cart_course_ids:
+            cart_courses = [courses[cid] for cid in cart_course_ids[row.id] if cid in courses]
+            course_count = len(cart_courses)
         else:
-            payment.cart_courses = []
-            payment.course_count = 1
+            cart_courses = []
+            course_count = 1
+        payments.append(PaymentRow(row.order_id, row.gross_amount, row.payment_type, row.transaction_status,
+                                   row.created_at, courses.get(row.course_id), cart_courses, course_count))
 
     return render_template('payment/payment_history.html', payments=payments)
 
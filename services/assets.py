@@ -0,0 +1,113 @@
+# Build aset statis: salinan ber-hash konten, varian gzip/brotli, dan manifest
+import fnmatch
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# Pola relatif terhadap folder static; folder uploads/ (thumbnail, sertifikat) tidak ikut
+ASSET_PATTERNS = ('*.css', 'js/*.js', 'images/*')
+COMPRESSIBLE_SUFFIXES = frozenset({'.css', '.js', '.svg', '.json', '.txt', '.map'})
+# Varian terkompresi yang didukung, urut dari yang paling diutamakan saat menyajikan
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 10
+
+
+def _load_brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def collect_assets(static_dir, patterns=ASSET_PATTERNS):
+    """Daftar path relatif (pakai '/') di static_dir yang cocok dengan salah satu pola."""
+    static_dir = Path(static_dir)
+    found = []
+    for path in sorted(static_dir.rglob('*')):
+        if not path.is_file():
+            continue
+        relative = path.relative_to(static_dir).as_posix()
+        if any(fnmatch.fnmatchcase(relative, pattern) and relative.count('/') == pattern.count('/')
+               for pattern in patterns):
+            found.append(relative)
+    return found
+
+
+def fingerprinted_name(relative, content):
+    """styles.css + isi -> styles.<hash>.css"""
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    stem, dot, suffix = relative.rpartition('.')
+    if not dot or '/' in suffix:
+        return f'{relative}.{digest}'
+    return f'{stem}.{digest}.{suffix}'
+
+
+def build_assets(static_dir, output='dist', *, patterns=ASSET_PATTERNS, brotli_quality=11):
+    """Tulis salinan ber-hash (plus .gz/.br bila lebih kecil) ke static/<output> dan manifest-nya.
+
+    Manifest memetakan nama asli ke path ber-hash, keduanya relatif terhadap static_dir, dan
+    mencatat encoding yang tersedia per file. File lama di folder output yang tidak lagi
+    dirujuk manifest dihapus. Mengembalikan dict manifest.
+    """
+    static_dir = Path(static_dir)
+    output_dir = static_dir / output
+    brotli = _load_brotli()
+    assets = {}
+    encodings = {}
+    written = {output_dir / MANIFEST_NAME}
+    for relative in collect_assets(static_dir, patterns):
+        if relative.startswith(f'{output}/'):
+            continue
+        content = (static_dir / relative).read_bytes()
+        target_relative = f'{output}/{fingerprinted_name(relative, content)}'
+        target = static_dir / target_relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if not target.exists():
+            target.write_bytes(content)
+        written.add(target)
+        assets[relative] = target_relative
+
+        if Path(relative).suffix.lower() not in COMPRESSIBLE_SUFFIXES:
+            continue
+        variants = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['br'] = brotli.compress(content, quality=brotli_quality)
+        available = []
+        for encoding, suffix in ENCODINGS:
+            data = variants.get(encoding)
+            if data is None or len(data) >= len(content):
+                continue
+            variant_path = target.with_name(target.name + suffix)
+            variant_path.write_bytes(data)
+            written.add(variant_path)
+            available.append(encoding)
+        if available:
+            encodings[target_relative] = available
+
+    manifest = {'assets': assets, 'encodings': encodings, 'brotli': brotli is not None}
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    tmp_path = manifest_path.with_name(MANIFEST_NAME + '.tmp')
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+    os.replace(tmp_path, manifest_path)
+
+    for path in output_dir.rglob('*'):
+        if path.is_file() and path not in written:
+            path.unlink()
+    return manifest
+
+
+def load_manifest(path):
+    """Baca manifest hasil build_assets(); dict kosong bila belum pernah di-build."""
+    try:
+        with open(path, encoding='utf-8') as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return {'assets': {}, 'encodings': {}}
+    manifest.setdefault('assets', {})
+    manifest.setdefault('encodings', {})
+    return manifest
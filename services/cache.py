@@ -0,0 +1,67 @@
+# In-process cache utilities
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Cache LRU berukuran terbatas dengan masa berlaku (TTL) per entri.
+
+    Aman dipakai dari beberapa thread. Cache ini hidup di dalam satu proses
+    (per worker), jadi invalidasi hanya berlaku untuk worker yang memanggilnya;
+    worker lain mengandalkan TTL.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60, *, clock=time.monotonic):
+        self.maxsize = max(int(maxsize), 0)
+        self.ttl = float(ttl)
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Ambil nilai yang masih berlaku, atau default jika tidak ada/kedaluwarsa."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Simpan nilai; entri paling lama tidak dipakai dibuang bila cache penuh."""
+        if self.maxsize == 0:
+            return
+        expires_at = self._clock() + (self.ttl if ttl is None else float(ttl))
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+_MISSING = object()
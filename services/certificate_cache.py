@@ -0,0 +1,111 @@
+# Cache PDF sertifikat berbasis isi: nama file = hash semua masukan render, ukuran total dibatasi
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+SUFFIX = '.pdf'
+
+
+def certificate_key(*, student_id, course_id, student_name, instructor_name, material_type, course_title,
+                    issued_date, template_hash, renderer_version):
+    """Hash sha256 dari semua hal yang memengaruhi isi PDF; berubah bila salah satunya berubah."""
+    payload = json.dumps([renderer_version, template_hash, student_id, course_id, student_name, instructor_name,
+                          material_type, course_title, issued_date], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def file_digest(path, chunk_size=1 << 16):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CertificateCache:
+    """Direktori PDF ter-render: <dir>/<2 hex>/<key>.pdf, dibuang dari yang paling lama tidak dipakai.
+
+    Aman dipakai beberapa proses sekaligus: file ditulis ke file sementara lalu di-rename,
+    dan waktu pakai terakhir dicatat di mtime file (diperbarui setiap get()).
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path_for(self, key):
+        return self.directory / key[:2] / f'{key}{SUFFIX}'
+
+    def get(self, key):
+        """Path PDF untuk key, atau None bila belum ada di cache."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def open(self, key):
+        """PDF untuk key sebagai file biner yang sudah dibuka, atau None bila belum ada di cache.
+
+        Dipakai untuk mengirim file: path dari get() bisa dihapus evict() proses lain sebelum dibuka,
+        sedangkan file yang sudah terbuka tetap bisa dibaca sampai ditutup.
+        """
+        path = self.path_for(key)
+        try:
+            handle = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return handle
+
+    def put(self, key, data):
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                handle.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self.evict(keep=path)
+        return path
+
+    def entries(self):
+        """[(mtime, size, path)] semua PDF di cache."""
+        found = []
+        for path in self.directory.glob(f'*/*{SUFFIX}'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            found.append((stat.st_mtime, stat.st_size, path))
+        return found
+
+    def evict(self, keep=None):
+        """Hapus PDF yang paling lama tidak dipakai sampai total ukuran <= max_bytes; kembalikan jumlah yang dihapus."""
+        with self._lock:
+            entries = sorted(self.entries())
+            total = sum(size for _mtime, size, _path in entries)
+            removed = 0
+            for _mtime, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    path.unlink(missing_ok=True)
+                except OSError:  # misal masih dibuka untuk diunduh (Windows)
+                    continue
+                total -= size
+                removed += 1
+            return removed
@@ -0,0 +1,212 @@
+# Sertifikat PDF vektor: template sebagai satu image XObject, nama dan teks program sebagai teks PDF
+import threading
+import unicodedata
+import zlib
+from io import BytesIO
+from pathlib import Path
+
+from services.certificate_render import (BODY_FONT, BODY_WIDTH, INFO_FONT, ISSUER_NAME, SIGNATURE_FONT, SIGNATURE_X,
+                                         SIGNATURE_Y, STUDENT_FONT, STUDENT_Y, TEXT_COLOR, certificate_paragraph)
+
+# Lebar halaman A4 landscape (pt); tinggi mengikuti rasio template
+PAGE_WIDTH = 841.89
+TEMPLATE_JPEG_QUALITY = 75
+# Font standar PDF (tidak perlu di-embed, metrik sama dengan Arial); teks WinAnsi bisa dipilih/disalin
+PDF_FONTS = {'regular': ('F1', 'Helvetica'), 'bold': ('F2', 'Helvetica-Bold')}
+TEXT_ENCODING = 'cp1252'
+# Metrik Helvetica per 1000 unit em
+ASCENT = 905  # setara ascender Arial, agar posisi y sama dengan draw.text() Pillow
+CAP_HEIGHT = 718
+DESCENT = 207
+DESCENDER_CHARS = frozenset('gjpqy,;()[]{}|_Q@$')
+
+# Lebar glyph ASCII 32..126 (AFM Helvetica / Helvetica-Bold)
+_HELVETICA_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_HELVETICA_BOLD_WIDTHS = (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+)
+GLYPH_WIDTHS = {
+    'regular': {chr(32 + idx): width for idx, width in enumerate(_HELVETICA_WIDTHS)},
+    'bold': {chr(32 + idx): width for idx, width in enumerate(_HELVETICA_BOLD_WIDTHS)},
+}
+DEFAULT_GLYPH_WIDTH = 556
+
+
+def can_encode(*values):
+    """True bila semua teks bisa ditulis dengan font standar (WinAnsi); selain itu pakai renderer raster."""
+    try:
+        for value in values:
+            (value or '').encode(TEXT_ENCODING)
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def glyph_width(char, weight):
+    widths = GLYPH_WIDTHS[weight]
+    width = widths.get(char)
+    if width is None:
+        # Huruf beraksen (é, ñ, ...) selebar huruf dasarnya
+        base = unicodedata.normalize('NFKD', char)[:1]
+        width = widths.get(base, DEFAULT_GLYPH_WIDTH)
+    return width
+
+
+def text_width(text, size, weight):
+    return sum(glyph_width(char, weight) for char in text) * size / 1000
+
+
+def text_height(text, size):
+    """Perkiraan tinggi tinta satu baris, setara bbox Pillow yang dipakai renderer raster."""
+    descent = DESCENT if any(char in DESCENDER_CHARS for char in text) else 0
+    return (CAP_HEIGHT + descent) * size / 1000
+
+
+def pdf_string(text):
+    encoded = text.encode(TEXT_ENCODING)
+    escaped = encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+    return b'(' + escaped + b')'
+
+
+def wrap_text(value, size, weight, max_width):
+    words = value.split()
+    lines = []
+    current = ''
+    for word in words:
+        candidate = (current + ' ' + word).strip()
+        if candidate and text_width(candidate, size, weight) <= max_width:
+            current = candidate
+        else:
+            if current:
+                lines.append(current)
+            current = word
+    if current:
+        lines.append(current)
+    return lines or ['']
+
+
+def write_pdf(objects, *, root, info):
+    """Susun file PDF dari {nomor objek: isi (bytes)}; stream sudah berbentuk '<<...>>stream...endstream'."""
+    output = BytesIO()
+    output.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = output.tell()
+        output.write(b'%d 0 obj\n' % number + objects[number] + b'\nendobj\n')
+    xref_offset = output.tell()
+    size = max(objects) + 1
+    output.write(b'xref\n0 %d\n0000000000 65535 f \n' % size)
+    for number in range(1, size):
+        output.write(b'%010d 00000 n \n' % offsets[number])
+    output.write(b'trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                 % (size, root, info, xref_offset))
+    output.seek(0)
+    return output
+
+
+def stream_object(dictionary, data):
+    return b'<< ' + dictionary + b' /Length %d >>\nstream\n' % len(data) + data + b'\nendstream'
+
+
+class PdfTemplate:
+    """Template yang sudah dikodekan sekali sebagai JPEG (DCTDecode) dan dipakai ulang di setiap PDF."""
+
+    def __init__(self, path, quality=TEMPLATE_JPEG_QUALITY):
+        from PIL import Image
+
+        with Image.open(path) as source:
+            image = source.convert('RGB')
+        buffer = BytesIO()
+        # optimize: tabel Huffman optimal, lossless dan ~25% lebih kecil
+        image.save(buffer, format='JPEG', quality=quality, optimize=True)
+        self.width, self.height = image.size
+        self.xobject = stream_object(
+            b'/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB '
+            b'/BitsPerComponent 8 /Filter /DCTDecode' % (self.width, self.height), buffer.getvalue())
+
+
+class VectorCertificateRenderer:
+    """Render sertifikat sebagai PDF vektor; aman dipanggil dari beberapa thread sekaligus.
+
+    Tata letak sama dengan CertificateRenderer (raster), dihitung dalam piksel template lalu
+    diskalakan ke halaman A4. Template dimuat ulang bila ukuran/mtime filenya berubah.
+    """
+
+    def __init__(self, template_path):
+        self.template_path = Path(template_path)
+        self._template = None
+        self._template_token = None
+        self._lock = threading.Lock()
+
+    def template(self):
+        stat = self.template_path.stat()
+        token = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._template is None or self._template_token != token:
+                self._template = PdfTemplate(self.template_path)
+                self._template_token = token
+            return self._template
+
+    def supports(self, *, student_name, instructor_name, material_type, course_title, issued_date):
+        return can_encode(student_name, instructor_name, material_type, course_title, issued_date)
+
+    def render(self, *, student_name: str, instructor_name: str, material_type: str, course_title: str,
+               issued_date: str) -> BytesIO:
+        template = self.template()
+        width, height = template.width, template.height
+        scale = PAGE_WIDTH / width
+        color = b' '.join(b'%.3f' % (channel / 255) for channel in TEXT_COLOR)
+        commands = [b'q %.4f 0 0 %.4f 0 0 cm' % (scale, scale),
+                    b'q %d 0 0 %d 0 0 cm /Bg Do Q' % (width, height),
+                    color + b' rg']
+
+        def draw_centered(text, center_x, y, font, *, line_gap=10):
+            if not text:
+                return y
+            size, weight = font
+            x = center_x - text_width(text, size, weight) / 2
+            baseline = y + ASCENT * size / 1000
+            commands.append(b'BT /%s %d Tf %.2f %.2f Td %s Tj ET' % (
+                PDF_FONTS[weight][0].encode(), size, x, height - baseline, pdf_string(text)))
+            return y + text_height(text, size) + line_gap
+
+        center_x = width / 2
+        body_y = draw_centered(student_name, center_x, height * STUDENT_Y, STUDENT_FONT, line_gap=50)
+        paragraph = certificate_paragraph(material_type, course_title)
+        for line in wrap_text(paragraph, *BODY_FONT, max_width=width * BODY_WIDTH):
+            body_y = draw_centered(line, center_x, body_y, BODY_FONT)
+        draw_centered(f'Diterbitkan pada {issued_date}', center_x, body_y + 30, INFO_FONT)
+        signature_y = height * SIGNATURE_Y
+        draw_centered(instructor_name, width * SIGNATURE_X[0], signature_y, SIGNATURE_FONT, line_gap=0)
+        draw_centered(ISSUER_NAME, width * SIGNATURE_X[1], signature_y, SIGNATURE_FONT, line_gap=0)
+        commands.append(b'Q')
+
+        page_height = height * scale
+        objects = {
+            1: b'<< /Type /Catalog /Pages 2 0 R >>',
+            2: b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+            3: b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Contents 4 0 R '
+               b'/Resources << /XObject << /Bg 5 0 R >> /Font << %%s >> >> >>' % (PAGE_WIDTH, page_height),
+            4: stream_object(b'/Filter /FlateDecode', zlib.compress(b'\n'.join(commands))),
+            5: template.xobject,
+            6: b'<< /Title %s /Producer (LMS certificate) >>' % pdf_string(f'Sertifikat {student_name}'),
+        }
+        font_refs = []
+        for number, (name, base_font) in enumerate(PDF_FONTS.values(), start=7):
+            objects[number] = (b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>'
+                               % base_font.encode())
+            font_refs.append(b'/%s %d 0 R' % (name.encode(), number))
+        objects[3] = objects[3] % b' '.join(font_refs)
+        return write_pdf(objects, root=1, info=6)
@@ -0,0 +1,187 @@
+# Renderer sertifikat PDF: path font di-resolve sekali per proses, template didekode sekali lalu disalin per render
+import threading
+from io import BytesIO
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL.ImageFont import FreeTypeFont
+
+FONT_CANDIDATES = {
+    'regular': ('Arial.ttf', 'arial.ttf', 'DejaVuSans.ttf', 'LiberationSans-Regular.ttf'),
+    'bold': ('Arial Bold.ttf', 'arialbd.ttf', 'DejaVuSans-Bold.ttf', 'LiberationSans-Bold.ttf'),
+}
+TEXT_COLOR = (20, 45, 85)
+# (ukuran, ketebalan) per elemen sertifikat
+STUDENT_FONT = (72, 'bold')
+BODY_FONT = (38, 'regular')
+INFO_FONT = (30, 'regular')
+SIGNATURE_FONT = (32, 'bold')
+# Tata letak, relatif terhadap ukuran template
+STUDENT_Y = 0.42
+BODY_WIDTH = 0.75
+SIGNATURE_Y = 0.84
+SIGNATURE_X = (0.27, 0.73)
+ISSUER_NAME = 'TechNova Academy'
+
+
+def certificate_paragraph(material_type, course_title):
+    course_title = (course_title or '').strip()
+    material_label = (material_type or '').strip()
+    if material_label and course_title:
+        program_label = f'{material_label} - {course_title}'
+    elif material_label:
+        program_label = material_label
+    elif course_title:
+        program_label = course_title
+    else:
+        program_label = 'Program'
+    return ('Telah mengikuti dan menyelesaikan seluruh materi serta latihan pada program kursus '
+            f'{program_label} dan dinyatakan lulus dengan hasil yang memuaskan.')
+
+
+def default_font_directories(root_path):
+    root = Path(root_path)
+    return [
+        root / 'file_pendukung' / 'sertifikat',
+        root / 'file_pendukung',
+        Path.home() / 'fonts',
+        Path('C:/Windows/Fonts'),
+        Path('/usr/share/fonts/truetype'),
+        Path('/usr/share/fonts/truetype/dejavu'),
+        Path('/Library/Fonts'),
+    ]
+
+
+class FontRegistry:
+    """Font sertifikat per (ukuran, ketebalan).
+
+    File font di-probe sekali saat registry dibuat: file yang ada di directories (urut folder,
+    lalu kandidat), kemudian nama file saja agar Pillow mencarinya di folder font sistem.
+    Objek FreeTypeFont tidak aman dipakai bersamaan oleh beberapa thread, jadi setiap thread
+    memegang cache font-nya sendiri; sumber yang berhasil dimuat diingat untuk semua thread.
+    """
+
+    def __init__(self, directories, candidates=FONT_CANDIDATES):
+        self.sources = {
+            weight: [str(Path(directory) / name) for directory in directories for name in names
+                     if (Path(directory) / name).exists()] + list(names)
+            for weight, names in candidates.items()
+        }
+        self._chosen = {}
+        self._local = threading.local()
+
+    def get(self, size, weight='regular') -> 'FreeTypeFont':
+        fonts = getattr(self._local, 'fonts', None)
+        if fonts is None:
+            fonts = self._local.fonts = {}
+        font = fonts.get((size, weight))
+        if font is None:
+            font = fonts[(size, weight)] = self._load(size, weight)
+        return font
+
+    def _load(self, size, weight):
+        from PIL import ImageFont
+
+        chosen = self._chosen.get(weight)
+        for source in ([chosen] if chosen else self.sources[weight]):
+            try:
+                font = ImageFont.truetype(source, size=size)
+            except OSError:
+                continue
+            self._chosen[weight] = source
+            return font
+        return ImageFont.load_default()
+
+
+class CertificateRenderer:
+    """Render PDF sertifikat dari satu file template; aman dipanggil dari beberapa thread sekaligus.
+
+    Template didekode (RGB) sekali dan disimpan di memori; setiap render menggambar di salinannya.
+    Template dimuat ulang bila ukuran/mtime filenya berubah.
+    """
+
+    def __init__(self, template_path, fonts):
+        self.template_path = Path(template_path)
+        self.fonts = fonts
+        self._template = None
+        self._template_token = None
+        self._lock = threading.Lock()
+
+    def template(self):
+        from PIL import Image
+
+        stat = self.template_path.stat()
+        token = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._template is None or self._template_token != token:
+                with Image.open(self.template_path) as source:
+                    self._template = source.convert('RGB')
+                self._template_token = token
+            return self._template
+
+    def render(self, *, student_name: str, instructor_name: str, material_type: str, course_title: str,
+               issued_date: str) -> BytesIO:
+        from PIL import ImageDraw
+
+        background = self.template().copy()
+        draw = ImageDraw.Draw(background)
+        width, height = background.size
+
+        student_font = self.fonts.get(*STUDENT_FONT)
+        body_font = self.fonts.get(*BODY_FONT)
+        info_font = self.fonts.get(*INFO_FONT)
+        signature_font = self.fonts.get(*SIGNATURE_FONT)
+
+        def draw_centered(text: str, center_x: float, y: float, font: 'FreeTypeFont',
+                          *, fill=TEXT_COLOR, line_gap: int = 10) -> float:
+            if not text:
+                return y
+            bbox = draw.textbbox((0, 0), text, font=font)
+            text_width = bbox[2] - bbox[0]
+            text_height = bbox[3] - bbox[1]
+            x = int(center_x - text_width / 2)
+            draw.text((x, int(y)), text, font=font, fill=fill)
+            return y + text_height + line_gap
+
+        def measure_width(value: str, font: 'FreeTypeFont') -> float:
+            if hasattr(draw, 'textlength'):
+                return draw.textlength(value, font=font)
+            bbox = draw.textbbox((0, 0), value, font=font)
+            return bbox[2] - bbox[0]
+
+        def wrap_text(value: str, font: 'FreeTypeFont', max_width: float) -> list[str]:
+            words = value.split()
+            lines = []
+            current = ''
+            for word in words:
+                candidate = (current + ' ' + word).strip()
+                if candidate and measure_width(candidate, font) <= max_width:
+                    current = candidate
+                else:
+                    if current:
+                        lines.append(current)
+                    current = word
+            if current:
+                lines.append(current)
+            return lines or ['']
+
+        center_x = width / 2
+
+        student_y = height * STUDENT_Y
+        body_y = draw_centered(student_name, center_x, student_y, student_font, line_gap=50)
+
+        paragraph = certificate_paragraph(material_type, course_title)
+        for line in wrap_text(paragraph, body_font, max_width=width * BODY_WIDTH):
+            body_y = draw_centered(line, center_x, body_y, body_font)
+
+        draw_centered(f'Diterbitkan pada {issued_date}', center_x, body_y + 30, info_font)
+
+        signature_y = height * SIGNATURE_Y
+        draw_centered(instructor_name, width * SIGNATURE_X[0], signature_y, signature_font, line_gap=0)
+        draw_centered(ISSUER_NAME, width * SIGNATURE_X[1], signature_y, signature_font, line_gap=0)
+
+        output = BytesIO()
+        background.save(output, format='PDF')
+        output.seek(0)
+        return output
@@ -0,0 +1,93 @@
+# Turunan gambar upload (thumbnail kursus, pratinjau sertifikat): beberapa lebar, WebP + JPEG, tanpa metadata
+from pathlib import Path, PurePosixPath
+
+# Kartu kursus tampil ~300px: 1x, 1.5x, 2x
+THUMBNAIL_WIDTHS = (320, 480, 640)
+CERTIFICATE_PREVIEW_WIDTHS = (480,)
+DERIVED_DIR = 'derived'
+DERIVED_FORMATS = (('webp', 'WEBP'), ('jpg', 'JPEG'))
+WEBP_QUALITY = 75
+JPEG_QUALITY = 80
+# Warna latar saat gambar transparan diratakan ke JPEG
+JPEG_BACKGROUND = (255, 255, 255)
+
+
+def derivative_path(relative_path, width, ext):
+    """uploads/thumbnails/x.png -> uploads/thumbnails/derived/x-320.webp (relatif terhadap static)."""
+    path = PurePosixPath(relative_path)
+    return str(path.parent / DERIVED_DIR / f'{path.stem}-{width}.{ext}')
+
+
+def parse_variants(value):
+    """'320,480' -> [320, 480]; None/'' -> []."""
+    if not value:
+        return []
+    return [int(part) for part in value.split(',') if part.strip().isdigit()]
+
+
+def format_variants(widths):
+    return ','.join(str(width) for width in widths)
+
+
+def target_widths(original_width, widths):
+    """Lebar turunan tanpa upscale: lebar yang lebih kecil dari aslinya, plus satu versi selebar aslinya (maks. lebar terbesar)."""
+    return sorted({width for width in widths if width < original_width} | {min(max(widths), original_width)})
+
+
+def write_derivatives(static_dir, relative_path, widths, *, webp_quality=WEBP_QUALITY, jpeg_quality=JPEG_QUALITY):
+    """Tulis turunan WebP dan JPEG untuk setiap lebar; kembalikan daftar lebar yang ditulis.
+
+    Orientasi EXIF diterapkan ke piksel lalu metadata (EXIF, ICC, komentar) tidak ikut disimpan.
+    Untuk GIF animasi hanya frame pertama yang dipakai.
+    """
+    # Diimpor saat dibutuhkan agar worker web tidak memuat Pillow saat startup
+    from PIL import Image, ImageOps
+
+    static_dir = Path(static_dir)
+    with Image.open(static_dir / relative_path) as source:
+        source.seek(0)
+        oriented = ImageOps.exif_transpose(source)
+        has_alpha = oriented.mode in ('RGBA', 'LA', 'PA') or (oriented.mode == 'P' and 'transparency' in oriented.info)
+        image = oriented.convert('RGBA' if has_alpha else 'RGB')
+
+    written = []
+    for width in target_widths(image.width, widths):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        flattened = resized
+        if has_alpha:
+            flattened = Image.new('RGB', resized.size, JPEG_BACKGROUND)
+            flattened.paste(resized, mask=resized.getchannel('A'))
+        for ext, pil_format in DERIVED_FORMATS:
+            target = static_dir / derivative_path(relative_path, width, ext)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if pil_format == 'WEBP':
+                resized.save(target, pil_format, quality=webp_quality, method=6)
+            else:
+                flattened.save(target, pil_format, quality=jpeg_quality, optimize=True, progressive=True)
+        written.append(width)
+    return written
+
+
+def delete_derivatives(static_dir, relative_path):
+    """Hapus semua turunan milik satu file upload."""
+    path = PurePosixPath(relative_path)
+    derived_dir = Path(static_dir) / str(path.parent / DERIVED_DIR)
+    if not derived_dir.is_dir():
+        return
+    for ext, _pil_format in DERIVED_FORMATS:
+        for candidate in derived_dir.glob(f'{path.stem}-*.{ext}'):
+            if candidate.stem.rpartition('-')[2].isdigit():
+                candidate.unlink(missing_ok=True)
+
+
+def render_derivatives_job(job):
+    """Unit kerja untuk process pool: (key, static_dir, relative_path, widths) -> (key, variants, error).
+
+    variants berupa string untuk kolom *_variants ('' bila gambar tidak bisa diproses).
+    """
+    key, static_dir, relative_path, widths = job
+    try:
+        return key, format_variants(write_derivatives(static_dir, relative_path, widths)), None
+    except Exception as exc:  # file hilang, bukan gambar, atau rusak
+        return key, '', f'{type(exc).__name__}: {exc}'
@@ -0,0 +1,184 @@
+# Analisis butir soal kuis: jawaban per percobaan disimpan sebagai array int32 ter-pack, dianalisis dengan NumPy
+import sys
+from array import array
+
+# Proporsi kelompok atas/bawah untuk indeks daya beda (Kelley, 27%)
+GROUP_FRACTION = 0.27
+# Ambang penanda butir
+TOO_HARD = 0.3
+TOO_EASY = 0.9
+LOW_DISCRIMINATION = 0.2
+# Rentang id maksimum untuk tabel lookup langsung (lebih besar dari ini memakai searchsorted)
+DENSE_LOOKUP_SPAN = 1 << 20
+
+
+def pack_answers(responses):
+    """Pack respons satu percobaan menjadi bytes int32 little-endian.
+
+    Setiap soal yang ditampilkan diwakili satu nilai: id pilihan yang dipilih, atau -id soal
+    bila soal tidak dijawab (atau jawabannya bukan pilihan soal itu).
+    """
+    packed = array('i', responses)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_answers(blob):
+    packed = array('i')
+    packed.frombytes(blob or b'')
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tolist()
+
+
+def load_numpy():
+    """Import NumPy saat analisis pertama kali dijalankan; None bila belum terpasang."""
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover - dependency issue surfaced at runtime
+        return None
+    return numpy
+
+
+def analyze_items(blobs, questions, *, group_fraction=GROUP_FRACTION):
+    """Tingkat kesulitan, daya beda, dan frekuensi pengecoh per soal dari jawaban ter-pack.
+
+    blobs: bytes hasil pack_answers() per percobaan. questions: [(question_id, [(choice_id, is_correct), ...])]
+    sesuai soal kuis saat ini; id soal/pilihan yang sudah dihapus diabaikan, dan soal yang belum ada
+    saat percobaan dibuat tidak dihitung untuk percobaan itu.
+
+    Semua percobaan didekode sekaligus menjadi matriks percobaan x soal, lalu statistiknya dihitung
+    per kolom tanpa loop Python per percobaan:
+      - difficulty      : proporsi jawaban benar di antara percobaan yang menampilkan soal
+      - discrimination  : proporsi benar kelompok atas dikurangi kelompok bawah (27% skor tertinggi/terendah)
+      - point_biserial  : korelasi skor soal dengan skor sisa (total tanpa soal itu)
+      - choices         : jumlah dan proporsi pemilih setiap pilihan, total dan per kelompok atas/bawah
+    """
+    np = load_numpy()
+    if np is None:
+        raise RuntimeError('NumPy belum terpasang; analisis butir soal membutuhkan paket numpy.')
+
+    question_ids = np.array([question_id for question_id, _choices in questions], dtype=np.int32)
+    choice_ids = np.array([choice_id for _question_id, choices in questions for choice_id, _correct in choices],
+                          dtype=np.int32)
+    choice_column = np.repeat(np.arange(len(questions)), [len(choices) for _question_id, choices in questions])
+    choice_correct = np.array([bool(correct) for _question_id, choices in questions for _choice_id, correct in choices],
+                              dtype=bool)
+
+    blobs = [blob for blob in blobs if blob]
+    attempts = len(blobs)
+    lengths = np.array(list(map(len, blobs)), dtype=np.int64) // 4
+    flat = np.frombuffer(b''.join(blobs), dtype='<i4')
+    rows = np.repeat(np.arange(attempts), lengths)
+
+    def lookup(keys, values):
+        """Posisi setiap nilai di keys (-1 bila tidak ada)."""
+        if not len(keys):
+            return np.full(len(values), -1)
+        low, span = int(keys.min()), int(keys.max()) - int(keys.min())
+        if span <= DENSE_LOOKUP_SPAN:
+            # Id kuis satu kursus biasanya berdekatan: tabel langsung id -> posisi, slot terakhir = tidak ada
+            table = np.full(span + 2, -1, dtype=np.int64)
+            table[keys - low] = np.arange(len(keys))
+            offset = values.astype(np.int64) - low
+            return table[np.where((offset >= 0) & (offset <= span), offset, span + 1)]
+        order = np.argsort(keys, kind='stable')
+        ordered = keys[order]
+        position = np.minimum(np.searchsorted(ordered, values), len(keys) - 1)
+        return np.where(ordered[position] == values, order[position], -1)
+
+    chosen = flat > 0
+    choice_index = lookup(choice_ids, flat[chosen])
+    chosen_rows = rows[chosen][choice_index >= 0]
+    choice_index = choice_index[choice_index >= 0]
+    skipped_index = lookup(question_ids, -flat[~chosen])
+    skipped_rows = rows[~chosen][skipped_index >= 0]
+    skipped_index = skipped_index[skipped_index >= 0]
+
+    shape = (attempts, len(questions))
+    presented = np.zeros(shape, dtype=bool)
+    presented[chosen_rows, choice_column[choice_index]] = True
+    presented[skipped_rows, skipped_index] = True
+    correct = np.zeros(shape, dtype=np.float32)
+    correct[chosen_rows, choice_column[choice_index]] = choice_correct[choice_index]
+
+    presented_count = presented.sum(axis=0)
+    answered_count = np.bincount(choice_column[choice_index], minlength=len(questions))
+    correct_count = correct.sum(axis=0, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        difficulty = correct_count / presented_count
+
+        # Kelompok atas/bawah berdasarkan proporsi benar (jumlah soal yang ditampilkan bisa berbeda)
+        total = correct.sum(axis=1, dtype=np.float64)
+        shown = presented.sum(axis=1)
+        ranking = np.argsort(np.where(shown > 0, total / np.maximum(shown, 1), 0), kind='stable')
+        group_size = max(int(round(attempts * group_fraction)), 1) if attempts else 0
+        lower, upper = ranking[:group_size], ranking[attempts - group_size:]
+        in_upper = np.zeros(attempts, dtype=bool)
+        in_lower = np.zeros(attempts, dtype=bool)
+        in_upper[upper] = True
+        in_lower[lower] = True
+        upper_presented = presented[upper].sum(axis=0)
+        lower_presented = presented[lower].sum(axis=0)
+        discrimination = (correct[upper].sum(axis=0) / upper_presented
+                          - correct[lower].sum(axis=0) / lower_presented)
+
+        # Korelasi point-biserial terkoreksi, hanya atas percobaan yang menampilkan soal
+        rest = (total[:, None].astype(np.float32) - correct) * presented
+        mean_item = correct_count / presented_count
+        mean_rest = rest.sum(axis=0, dtype=np.float64) / presented_count
+        covariance = np.einsum('ij,ij->j', correct, rest, dtype=np.float64) / presented_count - mean_item * mean_rest
+        variance_item = mean_item * (1 - mean_item)
+        variance_rest = np.einsum('ij,ij->j', rest, rest, dtype=np.float64) / presented_count - mean_rest ** 2
+        point_biserial = covariance / np.sqrt(variance_item * variance_rest)
+
+        choice_count = np.bincount(choice_index, minlength=len(choice_ids))
+        upper_count = np.bincount(choice_index[in_upper[chosen_rows]], minlength=len(choice_ids))
+        lower_count = np.bincount(choice_index[in_lower[chosen_rows]], minlength=len(choice_ids))
+        choice_rate = choice_count / presented_count[choice_column]
+        upper_rate = upper_count / upper_presented[choice_column]
+        lower_rate = lower_count / lower_presented[choice_column]
+
+    def number(value, digits=3):
+        return None if not np.isfinite(value) else round(float(value), digits)
+
+    report = []
+    offset = 0
+    for column, (question_id, choices) in enumerate(questions):
+        item_difficulty = number(difficulty[column])
+        item_discrimination = number(discrimination[column])
+        flags = []
+        if item_difficulty is not None and item_difficulty < TOO_HARD:
+            flags.append('too_hard')
+        if item_difficulty is not None and item_difficulty > TOO_EASY:
+            flags.append('too_easy')
+        if item_discrimination is not None and item_discrimination < LOW_DISCRIMINATION:
+            flags.append('low_discrimination')
+        item_choices = []
+        for index in range(offset, offset + len(choices)):
+            is_correct = bool(choice_correct[index])
+            upper_value, lower_value = number(upper_rate[index]), number(lower_rate[index])
+            item_choices.append({
+                'choice_id': int(choice_ids[index]),
+                'is_correct': is_correct,
+                'count': int(choice_count[index]),
+                'rate': number(choice_rate[index]),
+                'upper_rate': upper_value,
+                'lower_rate': lower_value,
+                # Pengecoh yang lebih sering dipilih kelompok atas daripada kelompok bawah
+                'misleading': (not is_correct and upper_value is not None and lower_value is not None
+                               and upper_value > lower_value),
+            })
+        offset += len(choices)
+        report.append({
+            'question_id': question_id,
+            'presented': int(presented_count[column]),
+            'answered': int(answered_count[column]),
+            'difficulty': item_difficulty,
+            'discrimination': item_discrimination,
+            'point_biserial': number(point_biserial[column]),
+            'flags': flags,
+            'choices': item_choices,
+        })
+    return {'attempts': attempts, 'group_size': group_size, 'questions': report}
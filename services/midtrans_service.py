@@ -1,5 +1,4 @@
 # Midtrans Service Layer
-import midtransclient
 from flask import current_app
 import json
 from datetime import datetime
@@ -10,6 +9,9 @@ class MidtransService:
     @staticmethod
     def get_snap_client():
         """Initialize Midtrans Snap client"""
+        # Diimpor saat dibutuhkan agar worker tidak memuat SDK Midtrans saat startup
+        import midtransclient
+
         snap = midtransclient.Snap(
             is_production=current_app.config.get('MIDTRANS_IS_PRODUCTION', False),
             server_key=current_app.config.get('MIDTRANS_SERVER_KEY', ''),
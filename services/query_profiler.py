@@ -0,0 +1,81 @@
+# Instrumentasi query SQLAlchemy per request: jumlah statement, waktu DB, dan deteksi N+1
+import re
+import time
+from collections import Counter
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN \((?:\?|%s|%\(\w+\)s)(?:, (?:\?|%s|%\(\w+\)s))*\)', re.IGNORECASE)
+_PARAM_RE = re.compile(r'%\(\w+\)s|%s')
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Route menjalankan query melebihi anggaran (dipakai saat mode test)."""
+
+
+@lru_cache(maxsize=1024)
+def normalize_statement(statement):
+    """Bentuk kanonik statement: dua statement yang hanya beda parameter/literal menjadi sama.
+
+    Placeholder driver (?, %s, %(name)s) dan literal angka/string menjadi ?, dan daftar
+    IN (?, ?, ...) hasil expanding parameter diringkas menjadi IN (?).
+    """
+    text = _WHITESPACE_RE.sub(' ', statement).strip()
+    text = _STRING_RE.sub('?', text)
+    text = _NUMBER_RE.sub('?', text)
+    text = _PARAM_RE.sub('?', text)
+    return _IN_LIST_RE.sub('IN (?)', text)
+
+
+class QueryStats:
+    """Akumulator query untuk satu request (atau satu blok kode)."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements = Counter()
+
+    def record(self, statement, duration_ms):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.statements[normalize_statement(statement)] += 1
+
+    def repeated(self, threshold):
+        """Statement yang dijalankan >= threshold kali dengan parameter berbeda (pola N+1)."""
+        if threshold <= 1:
+            return []
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+_listeners_installed = False
+
+
+def install_query_listeners(current_stats):
+    """Pasang listener cursor di semua Engine (sekali per proses).
+
+    current_stats() mengembalikan QueryStats aktif untuk thread/konteks saat ini, atau None
+    bila query tidak perlu dicatat.
+    """
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    _listeners_installed = True
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_stats()
+        if stats is None:
+            return
+        started = getattr(context, '_query_started', None)
+        duration_ms = (time.perf_counter() - started) * 1000 if started is not None else 0.0
+        stats.record(statement, duration_ms)
@@ -0,0 +1,410 @@
+# In-process full-text search index untuk katalog kursus
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import repeat
+from operator import add, itemgetter, mul
+
+# Bobot per field: judul paling menentukan, lalu jenis materi, judul materi, dan deskripsi.
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'material_type': 2.0,
+    'lessons': 1.5,
+    'description': 1.0,
+}
+
+STOPWORDS = frozenset({
+    'dan', 'yang', 'di', 'ke', 'dari', 'untuk', 'dengan', 'pada', 'ini', 'itu', 'atau', 'dalam',
+    'akan', 'adalah', 'juga', 'serta', 'the', 'and', 'of', 'to', 'in', 'for', 'a', 'an', 'on', 'with',
+})
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Kualitas kecocokan istilah terhadap token di indeks
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.8
+FUZZY_MATCH = 0.7
+
+MAX_PREFIX_EXPANSIONS = 20
+MAX_FUZZY_EXPANSIONS = 5
+MAX_FUZZY_CANDIDATES = 200
+
+# Saturasi bobot ala BM25: skor per posting = bobot / (bobot + K)
+SATURATION_K = 1.2
+# Bila kandidat jauh lebih sedikit dari posting, cek kandidat satu per satu (bisect)
+LOOKUP_RATIO = 8
+
+
+def normalize(value):
+    """Huruf kecil dan tanpa diakritik, misal 'Presentasí' -> 'presentasi'."""
+    value = value or ''
+    if value.isascii():
+        return value.lower()
+    value = unicodedata.normalize('NFKD', value)
+    return ''.join(ch for ch in value if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(value):
+    return [token for token in _TOKEN_RE.findall(normalize(value))
+            if (len(token) > 1 or token.isdigit()) and token not in STOPWORDS]
+
+
+def edit_distance(source, target, limit):
+    """Jarak Damerau-Levenshtein (optimal string alignment); berhenti lebih awal bila > limit."""
+    previous2 = None
+    previous = list(range(len(target) + 1))
+    for i, source_char in enumerate(source, start=1):
+        current = [i] + [0] * len(target)
+        for j, target_char in enumerate(target, start=1):
+            cost = source_char != target_char
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and j > 1 and source_char == target[j - 2]
+                    and source[i - 2] == target_char):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def trigrams(token):
+    padded = f'${token}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+
+
+class CourseSearchIndex:
+    """Inverted index dengan ranking BM25 sederhana dan pencocokan fuzzy berbasis trigram.
+
+    Setiap kursus menempati satu "slot". Posting per token disimpan sebagai
+    array('i') slot (terurut naik) dan array('f') skor dampak, hanya ditambah
+    (append-only); memperbarui kursus mematikan slot lama dan menambah slot baru.
+    Indeks dipadatkan ulang saat slot mati terlalu banyak.
+    """
+
+    # Atribut yang tidak ikut ditukar saat build() memasang indeks baru
+    _BUILD_PRESERVED = frozenset({'_lock', '_changed_during_build'})
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.built_at = None
+        self._changed_during_build = None       # {course_id} selama build() berjalan
+
+    def _reset(self):
+        self._postings = {}                     # token -> (array slot, array skor dampak)
+        self._vocab_sorted = []                 # untuk pencarian prefix
+        self._vocab_dirty = False
+        self._trigram_index = defaultdict(set)  # trigram -> {token}
+        self._slot_course = array('i')          # slot -> course_id (-1 = mati)
+        self._slot_attrs = []                   # slot -> (instructor_id, material_type, is_premium)
+        self._attr_slots = defaultdict(set)     # ('instructor'|'material'|'premium', nilai) -> {slot hidup}
+        self._course_slot = {}                  # course_id -> slot hidup
+        self._dead = set()
+
+    # ---------- Penulisan ----------
+    def build(self, documents):
+        """Bangun ulang seluruh indeks dari iterable dokumen (lihat add_document).
+
+        Dokumen bisa dibaca lebih dulu dari add_document/remove_document yang masuk selama build,
+        dan perubahan itu tertimpa saat indeks baru dipasang. Mengembalikan set course_id yang
+        diubah selama build agar pemanggil menerapkannya ulang dari sumber data.
+        """
+        with self._lock:
+            self._changed_during_build = set()
+        try:
+            fresh = CourseSearchIndex()
+            for document in documents:
+                fresh._add(document)
+            fresh._refresh_vocab()
+            with self._lock:
+                changed = self._changed_during_build
+                self.__dict__.update({key: value for key, value in fresh.__dict__.items()
+                                      if key not in self._BUILD_PRESERVED})
+                self.built_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._changed_during_build = None
+        return changed
+
+    def add_document(self, document):
+        """Tambah atau perbarui satu kursus.
+
+        document: dict dengan id, title, description, material_type, lessons (list judul),
+        instructor_id, is_premium.
+        """
+        with self._lock:
+            self._note_change(document['id'])
+            self._remove(document['id'])
+            self._add(document)
+            self._maybe_compact()
+
+    def remove_document(self, course_id):
+        with self._lock:
+            self._note_change(course_id)
+            self._remove(course_id)
+            self._maybe_compact()
+
+    def _note_change(self, course_id):
+        if self._changed_during_build is not None:
+            self._changed_during_build.add(int(course_id))
+
+    def _add(self, document):
+        slot = len(self._slot_course)
+        course_id = int(document['id'])
+        attrs = (document.get('instructor_id'), document.get('material_type') or '', bool(document.get('is_premium')))
+        self._slot_course.append(course_id)
+        self._slot_attrs.append(attrs)
+        self._course_slot[course_id] = slot
+        for key in self._attr_keys(attrs):
+            self._attr_slots[key].add(slot)
+
+        weights = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            value = document.get(field)
+            if not value:
+                continue
+            if isinstance(value, (list, tuple)):
+                value = ' '.join(value)
+            for token in tokenize(value):
+                weights[token] += weight
+
+        for token, weight in weights.items():
+            entry = self._postings.get(token)
+            if entry is None:
+                entry = (array('i'), array('f'))
+                self._postings[token] = entry
+                for gram in trigrams(token):
+                    self._trigram_index[gram].add(token)
+                self._vocab_dirty = True
+            entry[0].append(slot)
+            entry[1].append(weight / (weight + SATURATION_K))
+
+    @staticmethod
+    def _attr_keys(attrs):
+        instructor_id, material_type, is_premium = attrs
+        return (('instructor', instructor_id), ('material', material_type), ('premium', is_premium))
+
+    def _remove(self, course_id):
+        slot = self._course_slot.pop(int(course_id), None)
+        if slot is None:
+            return
+        self._slot_course[slot] = -1
+        self._dead.add(slot)
+        for key in self._attr_keys(self._slot_attrs[slot]):
+            self._attr_slots[key].discard(slot)
+
+    def _maybe_compact(self):
+        if len(self._dead) > 1000 and len(self._dead) > len(self._course_slot) * 0.25:
+            self._compact()
+
+    def _compact(self):
+        remap = array('i', [-1]) * len(self._slot_course)
+        slot_course = array('i')
+        slot_attrs = []
+        attr_slots = defaultdict(set)
+        for slot, course_id in enumerate(self._slot_course):
+            if course_id < 0:
+                continue
+            target = len(slot_course)
+            remap[slot] = target
+            slot_course.append(course_id)
+            slot_attrs.append(self._slot_attrs[slot])
+            for key in self._attr_keys(self._slot_attrs[slot]):
+                attr_slots[key].add(target)
+        postings = {}
+        for token, (slots, impacts) in self._postings.items():
+            new_slots, new_impacts = array('i'), array('f')
+            for slot, impact in zip(slots, impacts):
+                target = remap[slot]
+                if target >= 0:
+                    new_slots.append(target)
+                    new_impacts.append(impact)
+            if new_slots:
+                postings[token] = (new_slots, new_impacts)
+        trigram_index = defaultdict(set)
+        for token in postings:
+            for gram in trigrams(token):
+                trigram_index[gram].add(token)
+        self._postings = postings
+        self._trigram_index = trigram_index
+        self._slot_course = slot_course
+        self._slot_attrs = slot_attrs
+        self._attr_slots = attr_slots
+        self._course_slot = {course_id: slot for slot, course_id in enumerate(slot_course)}
+        self._dead = set()
+        self._refresh_vocab()
+
+    def _refresh_vocab(self):
+        self._vocab_sorted = sorted(self._postings)
+        self._vocab_dirty = False
+
+    # ---------- Pencarian ----------
+    def __len__(self):
+        return len(self._course_slot)
+
+    @property
+    def vocabulary_size(self):
+        return len(self._postings)
+
+    def expand_term(self, term):
+        """{token: kualitas} yang cocok dengan satu istilah query (persis, prefix, atau fuzzy)."""
+        if self._vocab_dirty:
+            self._refresh_vocab()
+        matches = {}
+        if term in self._postings:
+            matches[term] = EXACT_MATCH
+        if len(term) >= 3:
+            start = bisect_left(self._vocab_sorted, term)
+            for token in self._vocab_sorted[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+                if not token.startswith(term):
+                    break
+                matches.setdefault(token, PREFIX_MATCH)
+        if not matches and len(term) >= 3:
+            # Kandidat dari trigram yang sama, lalu diverifikasi dengan jarak edit
+            # (transposisi dihitung satu kesalahan, misal "pivto" -> "pivot").
+            max_distance = 1 if len(term) <= 4 else 2
+            shared = defaultdict(int)
+            for gram in trigrams(term):
+                for token in self._trigram_index.get(gram, ()):
+                    shared[token] += 1
+            candidates = sorted(
+                (token for token in shared if abs(len(token) - len(term)) <= max_distance),
+                key=lambda token: -shared[token],
+            )[:MAX_FUZZY_CANDIDATES]
+            scored = []
+            for token in candidates:
+                distance = edit_distance(term, token, max_distance)
+                if distance <= max_distance:
+                    scored.append((distance, -shared[token], token))
+            scored.sort()
+            for distance, _shared, token in scored[:MAX_FUZZY_EXPANSIONS]:
+                matches[token] = FUZZY_MATCH * (1 - distance / (len(term) + 1))
+        return matches
+
+    def _allowed_slots(self, material_type, is_premium, instructor_id, restrict_to):
+        sets = []
+        if instructor_id is not None:
+            sets.append(self._attr_slots.get(('instructor', instructor_id), set()))
+        if material_type:
+            sets.append(self._attr_slots.get(('material', material_type), set()))
+        if is_premium is not None:
+            sets.append(self._attr_slots.get(('premium', bool(is_premium)), set()))
+        if restrict_to is not None:
+            course_slot = self._course_slot
+            sets.append({course_slot[course_id] for course_id in restrict_to if course_id in course_slot})
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def _weighted_postings(self, expansions):
+        total = max(len(self._course_slot), 1)
+        weighted = []
+        for token, quality in expansions.items():
+            slots, impacts = self._postings[token]
+            weighted.append((slots, impacts, quality * math.log(1 + total / len(slots))))
+        return weighted
+
+    @staticmethod
+    def _term_scores(weighted):
+        """Skor satu istilah untuk semua slot yang cocok: ({slot: skor}, faktor pengali).
+
+        Istilah dengan satu token (kasus paling umum) dibangun lewat dict(zip(...))
+        tanpa loop Python; faktor idf diterapkan belakangan oleh pemanggil.
+        """
+        slots, impacts, factor = weighted[0]
+        if len(weighted) == 1:
+            return dict(zip(slots, impacts)), factor
+        scores = {slot: factor * impact for slot, impact in zip(slots, impacts)}
+        for slots, impacts, factor in weighted[1:]:
+            for slot, impact in zip(slots, impacts):
+                score = factor * impact
+                if score > scores.get(slot, 0.0):
+                    scores[slot] = score
+        return scores, 1.0
+
+    @staticmethod
+    def _term_score_for(weighted, slot):
+        best = 0.0
+        for slots, impacts, factor in weighted:
+            position = bisect_left(slots, slot)
+            if position < len(slots) and slots[position] == slot:
+                best = max(best, factor * impacts[position])
+        return best
+
+    def search(self, query, *, material_type=None, is_premium=None, instructor_id=None,
+               restrict_to=None, limit=None):
+        """Cari kursus; kembalikan list (course_id, skor) terurut dari yang paling relevan.
+
+        Setiap istilah query harus cocok (AND), baik persis, prefix, maupun fuzzy.
+        Filter material_type/is_premium/instructor_id/restrict_to memakai himpunan slot
+        per atribut, sehingga tidak perlu kembali ke database.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            weighted_terms = []
+            for term in terms:
+                expansions = self.expand_term(term)
+                if not expansions:
+                    return []
+                weighted_terms.append(self._weighted_postings(expansions))
+            # Istilah paling jarang lebih dulu agar kandidat cepat menyusut.
+            weighted_terms.sort(key=lambda weighted: sum(len(slots) for slots, _i, _f in weighted))
+
+            allowed = self._allowed_slots(material_type, is_premium, instructor_id, restrict_to)
+            if allowed is None and limit is not None and len(weighted_terms) == 1 and len(weighted_terms[0]) == 1:
+                # Satu token tanpa filter: top-k langsung dari posting tanpa membangun dict.
+                slots, impacts, factor = weighted_terms[0][0]
+                ranked = heapq.nlargest(limit + len(self._dead), zip(impacts, slots))
+                slot_course = self._slot_course
+                return [(slot_course[slot], impact * factor) for impact, slot in ranked
+                        if slot not in self._dead][:limit]
+            if allowed is not None:
+                allowed -= self._dead
+                if not allowed:
+                    return []
+                scores = dict.fromkeys(allowed, 0.0)
+            else:
+                scores = None
+
+            scale = 1.0  # faktor yang belum diterapkan ke nilai di scores
+            for weighted in weighted_terms:
+                postings_size = sum(len(slots) for slots, _i, _f in weighted)
+                if scores is None:
+                    scores, scale = self._term_scores(weighted)
+                elif len(scores) * LOOKUP_RATIO < postings_size:
+                    matched = {}
+                    for slot, score in scores.items():
+                        term_score = self._term_score_for(weighted, slot)
+                        if term_score:
+                            matched[slot] = score * scale + term_score
+                    scores, scale = matched, 1.0
+                else:
+                    term_scores, factor = self._term_scores(weighted)
+                    common = list(scores.keys() & term_scores.keys())
+                    # map() dengan fungsi operator berjalan di C, jauh lebih cepat dari comprehension.
+                    previous = map(mul, map(scores.__getitem__, common), repeat(scale))
+                    current = map(mul, map(term_scores.__getitem__, common), repeat(factor))
+                    scores = dict(zip(common, map(add, previous, current)))
+                    scale = 1.0
+                if not scores:
+                    return []
+
+            for slot in self._dead.intersection(scores):
+                del scores[slot]
+            if limit is not None and limit < len(scores):
+                ranked = heapq.nlargest(limit, scores.items(), key=itemgetter(1, 0))
+            else:
+                ranked = sorted(scores.items(), key=itemgetter(1, 0), reverse=True)
+            slot_course = self._slot_course
+            return [(slot_course[slot], score * scale) for slot, score in ranked]
@@ -0,0 +1,90 @@
+"""Pendaftaran kursus setelah pembayaran Midtrans saat aplikasi dijalankan lewat "python app.py"."""
+import runpy
+import sys
+from pathlib import Path
+
+import flask
+import pytest
+
+APP_PATH = Path(__file__).resolve().parent.parent / 'app.py'
+
+
+@pytest.fixture
+def main_module(tmp_path, monkeypatch):
+    """Globals app.py yang dijalankan sebagai __main__ (tanpa menjalankan server)."""
+    monkeypatch.setenv('SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setenv('SCHEMA_BOOTSTRAP', 'create')
+    monkeypatch.setattr(flask.Flask, 'run', lambda *args, **kwargs: None)
+    monkeypatch.delitem(sys.modules, 'app', raising=False)
+    monkeypatch.syspath_prepend(str(APP_PATH.parent))
+    module = runpy.run_path(str(APP_PATH), run_name='__main__')
+    yield module
+    sys.modules.pop('app', None)
+
+
+def seed(module, course_count):
+    db = module['db']
+    student = module['User'](name='Siswa', email='siswa@example.com', role='student', password_hash='-')
+    instructor = module['User'](name='Instruktur', email='instruktur@example.com', role='instructor',
+                                password_hash='-')
+    db.session.add_all([student, instructor])
+    db.session.flush()
+    courses = [module['Course'](title=f'Kursus {idx}', description='-', instructor_id=instructor.id,
+                                is_premium=True, price=100000) for idx in range(course_count)]
+    db.session.add_all(courses)
+    db.session.flush()
+    return student, courses
+
+
+def enrolled_state(module, student_id, course_ids):
+    db = module['db']
+    Enrollment, EnrollmentProgress, Course = module['Enrollment'], module['EnrollmentProgress'], module['Course']
+    return [
+        (db.session.query(Enrollment).filter_by(user_id=student_id, course_id=course_id, unlocked=True).count(),
+         db.session.query(EnrollmentProgress).filter_by(user_id=student_id, course_id=course_id).count(),
+         db.session.get(Course, course_id).enrollment_count)
+        for course_id in course_ids
+    ]
+
+
+def test_enroll_after_payment_under_python_app(main_module):
+    from routes.payment_routes import _enroll_user_to_course
+
+    app = main_module['app']
+    with app.app_context():
+        db = main_module['db']
+        student, (course,) = seed(main_module, 1)
+        payment = main_module['Payment'](order_id='ORDER-1', user_id=student.id, course_id=course.id,
+                                         gross_amount=100000, transaction_status='settlement')
+        db.session.add(payment)
+        db.session.commit()
+
+        _enroll_user_to_course(payment)
+        db.session.commit()
+        # Notifikasi ulang untuk pembayaran yang sama tidak mendaftarkan dua kali
+        _enroll_user_to_course(payment)
+        db.session.commit()
+
+        assert enrolled_state(main_module, student.id, [course.id]) == [(1, 1, 1)]
+
+
+def test_enroll_cart_payment_under_python_app(main_module):
+    from routes.payment_routes import _enroll_user_to_course
+
+    app = main_module['app']
+    with app.app_context():
+        db = main_module['db']
+        student, courses = seed(main_module, 2)
+        course_ids = [course.id for course in courses]
+        db.session.add_all([main_module['CartItem'](user_id=student.id, course_id=course_id)
+                            for course_id in course_ids])
+        payment = main_module['Payment'](order_id='CART-1', user_id=student.id, course_id=course_ids[0],
+                                         gross_amount=200000, transaction_status='settlement')
+        db.session.add(payment)
+        db.session.commit()
+
+        _enroll_user_to_course(payment, ','.join(map(str, course_ids)))
+        db.session.commit()
+
+        assert enrolled_state(main_module, student.id, course_ids) == [(1, 1, 1), (1, 1, 1)]
+        assert db.session.query(main_module['CartItem']).filter_by(user_id=student.id).count() == 0
@@ -0,0 +1,14 @@
+# Entrypoint WSGI untuk production, contoh: gunicorn -c gunicorn.conf.py wsgi:app
+from app import bootstrap_schema, create_app, rebuild_course_search_index
+
+app = create_app()
+
+# Pemeriksaan skema sekali saat worker (atau master, bila preload_app aktif) dimulai.
+with app.app_context():
+    bootstrap_schema()
+    # Dengan preload_app, indeks pencarian dibangun sekali di master lalu diwariskan ke worker.
+    if app.config['SEARCH_INDEX_WARM']:
+        try:
+            rebuild_course_search_index()
+        except Exception:
+            app.logger.exception('Gagal membangun indeks pencarian kursus saat startup')